@@ -0,0 +1,104 @@
+"""
+Docstring for analytic
+
+This file includes the closed form fast path for constant parameter GBM.
+
+With daily drift mu and volatility sigma (same meaning as in gbm.gbm_paths()), the price on
+day t is lognormal: log S_t ~ N(log S0 + (mu - sigma^2 / 2) t, sigma^2 t). Every headline
+number and per-day band in the app follows directly, no paths needed.
+
+LognormalSummary has the same interface as streaming.PathSummary, so the app can use either.
+
+Functions:
+    - lognormal_summary()
+
+"""
+
+import numpy as np
+
+
+class LognormalSummary:
+    def __init__(self, S0: float, mu: float, sigma: float, days: int, n_bins: int = 2000):
+        """
+        Args:
+            - S0: float -> day 0 price
+            - mu: float -> daily drift
+            - sigma: float -> daily volatility
+            - days: int -> horizon
+            - n_bins: int -> resolution of terminal_hist()
+        """
+        self.S0 = S0
+        self.mu = mu
+        self.sigma = sigma
+        self.n_bins = n_bins
+
+        t = np.arange(days + 1)
+        self.t = t
+        self.center = np.log(S0) + (mu - 0.5 * sigma**2) * t
+        self.scale = sigma * np.sqrt(t)
+
+        # Nothing is sampled, so there are no paths to draw and no sampling error
+        self.n = np.inf
+        self.sample_paths = np.empty((days + 1, 0))
+        self.terminal_mean_se = 0.0
+        self.prob_gain_se = 0.0
+
+    def percentile(self, q: float) -> np.ndarray:
+        """
+        Per-day q-th percentile (0-100).
+        """
+        from scipy.special import ndtri
+
+        return np.exp(self.center + self.scale * ndtri(q / 100))
+
+    @property
+    def mean(self) -> np.ndarray:
+        return self.S0 * np.exp(self.mu * self.t)
+
+    @property
+    def terminal_mean(self) -> float:
+        return float(self.mean[-1])
+
+    @property
+    def terminal_std(self) -> float:
+        return float(self.terminal_mean * np.sqrt(np.expm1(self.scale[-1] ** 2)))
+
+    @property
+    def terminal_min(self) -> float:
+        return float(self.percentile(0.01)[-1])
+
+    @property
+    def terminal_max(self) -> float:
+        return float(self.percentile(99.99)[-1])
+
+    @property
+    def prob_gain(self) -> float:
+        """
+        P(final > S0).
+        """
+        from scipy.special import ndtr
+
+        if self.scale[-1] == 0:
+            return float(self.center[-1] > self.center[0])
+        return float(ndtr((self.center[-1] - self.center[0]) / self.scale[-1]))
+
+    def terminal_hist(self):
+        """
+        Returns (prices, weights) on an even price grid between the 0.01 and 99.99 percentiles,
+        weights proportional to the density. Plot like PathSummary.terminal_hist().
+        """
+        edges = np.linspace(self.terminal_min, self.terminal_max, self.n_bins + 1)
+        if self.scale[-1] == 0:
+            return edges[:1], np.ones(1)
+
+        from scipy.special import ndtr
+
+        cdf = ndtr((np.log(edges) - self.center[-1]) / self.scale[-1])
+        return 0.5 * (edges[1:] + edges[:-1]), np.diff(cdf)
+
+
+def lognormal_summary(S0: float, mu: float, sigma: float, days: int, n_bins: int = 2000) -> LognormalSummary:
+    """
+    Closed form stand in for streaming.simulate_summary(S0, mu, sigma, days, ...).
+    """
+    return LognormalSummary(S0, mu, sigma, days, n_bins=n_bins)
@@ -1,11 +1,16 @@
+import os
+import sys
 import streamlit as st
-import yfinance as yf
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-import matplotlib.ticker as mticker
-import seaborn as sns
-from scipy import stats
+
+# The on-disk price cache is shared with the trading strategy project
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "trading_strategy_analysis"))
+from price_store import load_prices
+
+from parallel import simulate_parallel
+from analytic import lognormal_summary
+from multi_asset import diversification_ratio, estimate_cov, simulate_portfolio
 
 # ── Page config ───────────────────────────────────────────────────────────────
 st.set_page_config(page_title="Monte Carlo Simulator", layout="wide")
@@ -24,17 +29,44 @@ with st.sidebar:
         "Apple (AAPL)":   "AAPL",
         "Custom":         None,
     }
-    preset = st.selectbox("Asset", list(PRESETS.keys()))
-    if preset == "Custom":
-        ticker_input = st.text_input("Ticker symbol", placeholder="e.g. TSLA")
+    mode = st.radio("Mode", ["Single asset", "Basket"], horizontal=True)
+    if mode == "Basket":
+        basket_input = st.multiselect("Assets", [t for t in PRESETS.values() if t],
+                                      default=[t for t in PRESETS.values() if t])
+        extra_input  = st.text_input("Extra tickers", placeholder="e.g. TSLA, MSFT")
+        ticker_input = None
     else:
-        ticker_input = PRESETS[preset]
-        st.caption(f"Ticker: `{ticker_input}`")
+        preset = st.selectbox("Asset", list(PRESETS.keys()))
+        if preset == "Custom":
+            ticker_input = st.text_input("Ticker symbol", placeholder="e.g. TSLA")
+        else:
+            ticker_input = PRESETS[preset]
+            st.caption(f"Ticker: `{ticker_input}`")
 
     period  = st.selectbox("Historical period", ["1y", "2y", "5y", "10y", "max"], index=2)
     horizon = st.slider("Forecast horizon (days)", 30, 730, 365)
+    fan     = st.toggle("Simulate path fan", value=False,
+                        help="Off: median, CI and bands come from the closed form lognormal distribution, no simulation. "
+                             "On: paths are simulated, needed to draw them.")
     n_sims  = st.slider("Number of simulations", 100, 5000, 1000, step=100)
     ci      = st.slider("Confidence interval (%)", 80, 99, 95)
+    seed    = st.number_input("Random seed", min_value=0, value=42, step=1)
+
+    VARIANCE_REDUCTION = {
+        "None":         "plain",
+        "Antithetic":   "antithetic",
+        "Sobol (QMC)":  "sobol",
+        "Halton (QMC)": "halton",
+    }
+    vr      = st.selectbox("Variance reduction", list(VARIANCE_REDUCTION.keys()),
+                           help="Same precision from fewer paths. Single asset mode only.")
+    control = st.checkbox("Control variate (analytic mean)", value=False,
+                          help="Adjusts P(gain) using the known GBM mean of the final price.")
+    CORES   = os.cpu_count() or 1
+    workers = st.number_input("Workers", min_value=1, max_value=CORES, value=min(4, CORES), step=1,
+                              help="Simulated paths are split across this many workers, each on its own random stream.")
+    backend = st.selectbox("Backend", ["thread", "process"],
+                           help="Threads share memory and start instantly, processes scale past the GIL.")
 
     st.divider()
     st.subheader("Market Scenario")
@@ -72,79 +104,266 @@ GRID  = "#DDDDDD"
 def apply_style(ax):
     ax.set_facecolor("white")
     ax.grid(True, axis="y", color=GRID, linewidth=0.5, linestyle=":")
-    sns.despine(ax=ax)
+    ax.spines[["top", "right"]].set_visible(False)
     ax.tick_params(colors=SLATE)
     ax.xaxis.label.set_color(SLATE)
     ax.yaxis.label.set_color(SLATE)
     ax.title.set_color(SLATE)
 
 def dollar_fmt(ax):
-    ax.yaxis.set_major_formatter(mticker.FuncFormatter(lambda x, _: f"${x:,.0f}"))
+    from matplotlib.ticker import FuncFormatter
+
+    ax.yaxis.set_major_formatter(FuncFormatter(lambda x, _: f"${x:,.0f}"))
+
+# ── Cached layers ─────────────────────────────────────────────────────────────
+# Prices by (ticker, period) with a TTL, μ/σ memoized on top, and simulation summaries
+# shared across sessions by every input that changes the paths. Display only settings
+# (CI, ...) never reach these, so changing them is a cheap rerun.
+PRICE_TTL = 3600
+SE_BATCHES = 20
+
+@st.cache_data(ttl=PRICE_TTL, show_spinner=False)
+def fetch_close(ticker: str, period: str) -> pd.Series:
+    try:
+        raw = load_prices(ticker, interval="1d", period=period)
+    except FileNotFoundError:
+        return pd.Series(dtype=float)
+    if raw.empty:
+        return pd.Series(dtype=float)
+
+    raw.columns = [col[0] for col in raw.columns]
+    return raw["Close"].dropna()
+
+@st.cache_data(ttl=PRICE_TTL, show_spinner=False)
+def estimate_params(ticker: str, period: str):
+    price = fetch_close(ticker, period)
+    log_r = np.log(price / price.shift(1)).dropna()
+    return log_r.mean(), log_r.std(), price.iloc[-1]
+
+@st.cache_resource(ttl=PRICE_TTL, max_entries=64, show_spinner=False)
+def simulate(ticker: str, period: str, horizon: int, n_sims: int, drift_scale: float, vol_scale: float, seed: int,
+             method: str = "plain", control: bool = False, n_workers: int = 1, backend: str = "thread"):
+    mu_daily, sigma_daily, S0 = estimate_params(ticker, period)
+    # GBM simulation split across workers, each folded batch by batch so memory stays flat for any n_sims;
+    # the batches (about SE_BATCHES over all workers) give the standard errors
+    return simulate_parallel(S0, mu_daily * drift_scale, sigma_daily * vol_scale, horizon, n_sims, seed=seed,
+                             n_workers=n_workers, backend=backend, method=method, control=control,
+                             n_batches=-(-SE_BATCHES // n_workers))
+
+BASKET_VALUE = 10_000
+
+@st.cache_data(ttl=PRICE_TTL, show_spinner=False)
+def fetch_closes(tickers: tuple, period: str) -> pd.DataFrame:
+    closes = {t: fetch_close(t, period) for t in tickers}
+    return pd.DataFrame({t: c for t, c in closes.items() if not c.empty})
+
+@st.cache_resource(ttl=PRICE_TTL, max_entries=16, show_spinner=False)
+def simulate_basket(tickers: tuple, period: str, horizon: int, n_sims: int, drift_scale: float, vol_scale: float, seed: int):
+    mu, cov, S0 = estimate_cov(fetch_closes(tickers, period))
+    # Equal weight buy and hold, correlated shocks from one Cholesky factor of the basket covariance
+    return simulate_portfolio(S0, mu * drift_scale, cov * vol_scale**2, np.ones(len(S0)), horizon, n_sims,
+                              value=BASKET_VALUE, rng=np.random.default_rng(seed))
 
 # ── Main logic ────────────────────────────────────────────────────────────────
-if run:
+if run and mode == "Basket":
+    extra   = [t.strip().upper() for t in extra_input.split(",") if t.strip()]
+    tickers = tuple(dict.fromkeys(basket_input + extra))
+    if len(tickers) < 2:
+        st.warning("Pick at least two assets for a basket.")
+        st.stop()
+
+    st.session_state["sim"] = {"mode": "basket", "tickers": tickers, "period": period, "horizon": horizon,
+                               "n_sims": n_sims, "seed": int(seed), "sc": sc}
+
+elif run:
     ticker = ticker_input.strip().upper() if ticker_input else None
     if not ticker:
         st.warning("Enter a ticker symbol.")
         st.stop()
 
+    # Remember what was run so later reruns (e.g. moving the CI slider) redraw the same simulation
+    st.session_state["sim"] = {"mode": "single", "ticker": ticker, "period": period, "horizon": horizon,
+                               "n_sims": n_sims, "seed": int(seed), "sc": sc,
+                               "method": VARIANCE_REDUCTION[vr], "control": control, "fan": fan,
+                               "workers": int(workers), "backend": backend}
+
+if "sim" in st.session_state and st.session_state["sim"]["mode"] == "basket":
+    sim     = st.session_state["sim"]
+    horizon = sim["horizon"]
+    n_sims  = sim["n_sims"]
+    sc      = sim["sc"]
+    SIM_COLOR = sc["color"]
+
+    with st.spinner("Fetching basket data..."):
+        closes = fetch_closes(sim["tickers"], sim["period"])
+
+    missing = [t for t in sim["tickers"] if t not in closes.columns]
+    if missing:
+        st.warning(f"No data returned for {', '.join(missing)}, simulating the rest.")
+    if closes.shape[1] < 2 or len(closes.dropna()) < 2:
+        st.error("Not enough overlapping price history to estimate the basket covariance.")
+        st.stop()
+
+    with st.spinner("Simulating..."):
+        summary = simulate_basket(tuple(closes.columns), sim["period"], horizon, n_sims,
+                                  sc["drift_scale"], sc["vol_scale"], sim["seed"])
+
+    _, cov, _ = estimate_cov(closes)
+    corr = closes.dropna().apply(np.log).diff().corr()
+
+    lo  = (100 - ci) / 2
+    hi  = 100 - lo
+    p_lo    = summary.percentile(lo)
+    p_hi    = summary.percentile(hi)
+    p_med   = summary.percentile(50)
+    final_x, final_w = summary.terminal_hist()
+    days_ax = np.arange(horizon + 1)
+
+    st.subheader(f"Equal weight basket of {closes.shape[1]} assets — {n_sims:,} simulations over {horizon} days  ·  {sc['label']} scenario")
+
+    col1, col2, col3, col4, col5 = st.columns(5)
+    col1.metric("Start Value",     f"${BASKET_VALUE:,.2f}")
+    col2.metric("Median Final",    f"${p_med[-1]:,.2f}",
+                f"{(p_med[-1]/BASKET_VALUE - 1)*100:+.1f}%")
+    col3.metric(f"{ci}% CI Low",   f"${p_lo[-1]:,.2f}",
+                f"{(p_lo[-1]/BASKET_VALUE - 1)*100:+.1f}%")
+    col4.metric(f"{ci}% CI High",  f"${p_hi[-1]:,.2f}",
+                f"{(p_hi[-1]/BASKET_VALUE - 1)*100:+.1f}%")
+    col5.metric("Diversification", f"{diversification_ratio(np.ones(len(cov)), cov):.2f}×",
+                help="Weighted average asset volatility over portfolio volatility")
+
+    st.divider()
+
+    # Plotting libraries load on the first draw, not with the landing page
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    fig1, ax1 = plt.subplots(figsize=(11, 4), facecolor="white")
+    for i in range(summary.sample_paths.shape[1]):
+        ax1.plot(days_ax, summary.sample_paths[:, i], color=SIM_COLOR, alpha=0.04, linewidth=0.5)
+    ax1.fill_between(days_ax, p_lo, p_hi, color=SIM_COLOR, alpha=0.12, label=f"{ci}% CI")
+    ax1.plot(days_ax, p_med,        color=SIM_COLOR, linewidth=1.8, label="Median")
+    ax1.plot(days_ax, summary.mean, color=RED, linewidth=1.2, linestyle="--", label="Mean")
+    ax1.axhline(BASKET_VALUE, color=SLATE, linewidth=0.8, linestyle=":", label="Start value")
+    ax1.set_xlabel("Days forward", fontsize=9)
+    ax1.set_ylabel("Portfolio value (USD)", fontsize=9)
+    ax1.set_title(f"(a) Correlated Monte Carlo — {', '.join(closes.columns)}", loc="left",
+                  fontsize=9, fontstyle="italic")
+    dollar_fmt(ax1)
+    ax1.legend(fontsize=8, frameon=False)
+    apply_style(ax1)
+    plt.tight_layout()
+    st.pyplot(fig1, use_container_width=True)
+    plt.close(fig1)
+
+    c1, c2 = st.columns(2)
+
+    with c1:
+        fig2, ax2 = plt.subplots(figsize=(6, 4), facecolor="white")
+        sns.histplot(x=final_x, weights=final_w, bins=80, stat="density", color=SIM_COLOR,
+                     edgecolor="white", linewidth=0.3, alpha=0.7, ax=ax2, label="Simulated")
+        ax2.axvline(BASKET_VALUE, color="black", linewidth=1.0, linestyle=":", label="Start")
+        ax2.axvline(p_lo[-1], color=SLATE, linewidth=0.8, linestyle="--", alpha=0.7)
+        ax2.axvline(p_hi[-1], color=SLATE, linewidth=0.8, linestyle="--", alpha=0.7,
+                    label=f"{ci}% CI bounds")
+        ax2.set_xlabel("Final Portfolio Value (USD)", fontsize=9)
+        ax2.set_ylabel("Density", fontsize=9)
+        ax2.set_title(f"(b) Final Value Distribution (day {horizon})",
+                      loc="left", fontsize=9, fontstyle="italic")
+        ax2.legend(fontsize=7, frameon=False)
+        apply_style(ax2)
+        plt.tight_layout()
+        st.pyplot(fig2, use_container_width=True)
+        plt.close(fig2)
+
+    with c2:
+        fig3, ax3 = plt.subplots(figsize=(6, 4), facecolor="white")
+        sns.heatmap(corr, vmin=-1, vmax=1, cmap="RdBu_r", annot=len(corr) <= 10, fmt=".2f",
+                    annot_kws={"fontsize": 7}, cbar_kws={"shrink": 0.8}, ax=ax3)
+        ax3.set_title("(c) Historical Log Return Correlation",
+                      loc="left", fontsize=9, fontstyle="italic", color=SLATE)
+        ax3.tick_params(labelsize=7, colors=SLATE)
+        plt.tight_layout()
+        st.pyplot(fig3, use_container_width=True)
+        plt.close(fig3)
+
+    with st.expander("Historical price data"):
+        st.dataframe(closes, use_container_width=True)
+
+elif "sim" in st.session_state:
+    sim     = st.session_state["sim"]
+    ticker  = sim["ticker"]
+    period  = sim["period"]
+    horizon = sim["horizon"]
+    n_sims  = sim["n_sims"]
+    sc      = sim["sc"]
+
     with st.spinner(f"Fetching {ticker} data..."):
-        raw = yf.Ticker(ticker).history(period=period, interval="1d")
+        price = fetch_close(ticker, period)
 
-    if raw.empty:
+    if price.empty:
         st.error(f"No data returned for **{ticker}**. Check the symbol and try again.")
         st.stop()
 
-    raw.index = raw.index.tz_localize(None)
-    price = raw["Close"].dropna()
     log_r = np.log(price / price.shift(1)).dropna()
-
-    mu_daily    = log_r.mean()
-    sigma_daily = log_r.std()
-    S0          = price.iloc[-1]
-
-    # Apply scenario scaling
-    mu_sim    = mu_daily    * sc["drift_scale"]
-    sigma_sim = sigma_daily * sc["vol_scale"]
+    S0    = price.iloc[-1]
     SIM_COLOR = sc["color"]
 
-    # GBM simulation
-    dt  = 1
-    rng = np.random.default_rng(42)
-    Z   = rng.standard_normal((horizon, n_sims))
-    daily = np.exp((mu_sim - 0.5 * sigma_sim**2) * dt + sigma_sim * np.sqrt(dt) * Z)
-    paths = np.vstack([np.ones(n_sims) * S0, daily])
-    paths = np.cumprod(paths, axis=0)
+    if sim["fan"]:
+        with st.spinner("Simulating..."):
+            summary = simulate(ticker, period, horizon, n_sims, sc["drift_scale"], sc["vol_scale"], sim["seed"],
+                               sim["method"], sim["control"], sim["workers"], sim["backend"])
+    else:
+        # Constant μ/σ GBM is lognormal on every day, so the numbers and bands need no paths
+        mu_daily, sigma_daily, _ = estimate_params(ticker, period)
+        summary = lognormal_summary(S0, mu_daily * sc["drift_scale"], sigma_daily * sc["vol_scale"], horizon)
 
     lo  = (100 - ci) / 2
     hi  = 100 - lo
-    p_lo    = np.percentile(paths, lo,  axis=1)
-    p_hi    = np.percentile(paths, hi,  axis=1)
-    p_med   = np.percentile(paths, 50,  axis=1)
-    p_mean  = paths.mean(axis=1)
-    final   = paths[-1, :]
+    p_lo    = summary.percentile(lo)
+    p_hi    = summary.percentile(hi)
+    p_med   = summary.percentile(50)
+    p_mean  = summary.mean
+    final_x, final_w = summary.terminal_hist()
 
     days_ax = np.arange(horizon + 1)
 
     # ── Layout ────────────────────────────────────────────────────────────────
-    st.subheader(f"{ticker} — {n_sims:,} simulations over {horizon} days  ·  {sc['label']} scenario")
+    engine = f"{n_sims:,} simulations" if sim["fan"] else "closed form"
+    st.subheader(f"{ticker} — {engine} over {horizon} days  ·  {sc['label']} scenario")
 
     col1, col2, col3, col4 = st.columns(4)
     col1.metric("Current Price",   f"${S0:,.2f}")
-    col2.metric("Median Final",    f"${np.median(final):,.2f}",
-                f"{(np.median(final)/S0 - 1)*100:+.1f}%")
+    col2.metric("Median Final",    f"${p_med[-1]:,.2f}",
+                f"{(p_med[-1]/S0 - 1)*100:+.1f}%")
     col3.metric(f"{ci}% CI Low",   f"${p_lo[-1]:,.2f}",
                 f"{(p_lo[-1]/S0 - 1)*100:+.1f}%")
     col4.metric(f"{ci}% CI High",  f"${p_hi[-1]:,.2f}",
                 f"{(p_hi[-1]/S0 - 1)*100:+.1f}%")
 
+    col5, col6, col7, _ = st.columns(4)
+    if sim["fan"]:
+        col5.metric("Mean Final",      f"${summary.terminal_mean:,.2f}",
+                    f"± ${summary.terminal_mean_se:,.2f} std. error", delta_color="off")
+        col6.metric("P(Final > Current)", f"{summary.prob_gain*100:.1f}%",
+                    f"± {summary.prob_gain_se*100:.2f}% std. error", delta_color="off")
+        col7.metric("Sampling", sim["method"].capitalize() + (" + control variate" if sim["control"] else ""),
+                    f"{len(summary.batches)} batches, {sim['backend']} x{sim['workers']}", delta_color="off")
+    else:
+        col5.metric("Mean Final",      f"${summary.terminal_mean:,.2f}", "exact", delta_color="off")
+        col6.metric("P(Final > Current)", f"{summary.prob_gain*100:.1f}%", "exact", delta_color="off")
+        col7.metric("Sampling", "Analytic", "lognormal", delta_color="off")
+
     st.divider()
 
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    from scipy import stats
+
     # ── Fig 1: Simulation paths ───────────────────────────────────────────────
     fig1, ax1 = plt.subplots(figsize=(11, 4), facecolor="white")
-    sample_idx = rng.choice(n_sims, size=min(300, n_sims), replace=False)
-    for i in sample_idx:
-        ax1.plot(days_ax, paths[:, i], color=SIM_COLOR, alpha=0.04, linewidth=0.5)
+    for i in range(summary.sample_paths.shape[1]):
+        ax1.plot(days_ax, summary.sample_paths[:, i], color=SIM_COLOR, alpha=0.04, linewidth=0.5)
     ax1.fill_between(days_ax, p_lo, p_hi, color=SIM_COLOR, alpha=0.12,
                      label=f"{ci}% CI")
     ax1.plot(days_ax, p_med,  color=SIM_COLOR, linewidth=1.8, label="Median")
@@ -152,7 +371,7 @@ if run:
     ax1.axhline(S0, color=SLATE, linewidth=0.8, linestyle=":", label="Current price")
     ax1.set_xlabel("Days forward", fontsize=9)
     ax1.set_ylabel("Price (USD)", fontsize=9)
-    ax1.set_title(f"(a) Monte Carlo Simulation — {ticker}", loc="left",
+    ax1.set_title(f"(a) {'Monte Carlo Simulation' if sim['fan'] else 'Forecast Bands'} — {ticker}", loc="left",
                   fontsize=9, fontstyle="italic")
     dollar_fmt(ax1)
     ax1.legend(fontsize=8, frameon=False)
@@ -167,10 +386,10 @@ if run:
     # Final price distribution
     with c1:
         fig2, ax2 = plt.subplots(figsize=(6, 4), facecolor="white")
-        sns.histplot(final, bins=80, stat="density", color=SIM_COLOR,
+        sns.histplot(x=final_x, weights=final_w, bins=80, stat="density", color=SIM_COLOR,
                      edgecolor="white", linewidth=0.3, alpha=0.7, ax=ax2, label="Simulated")
-        mu_f, sig_f = final.mean(), final.std()
-        xf = np.linspace(final.min(), final.max(), 300)
+        mu_f, sig_f = summary.terminal_mean, summary.terminal_std
+        xf = np.linspace(summary.terminal_min, summary.terminal_max, 300)
         ax2.plot(xf, stats.norm.pdf(xf, mu_f, sig_f), color=RED,
                  linewidth=1.4, linestyle="--", label="Normal fit")
         ax2.axvline(S0,       color="black", linewidth=1.0, linestyle=":", label="Current")
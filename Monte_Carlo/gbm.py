@@ -0,0 +1,149 @@
+"""
+Docstring for gbm
+
+This file includes the Geometric Brownian Motion path engine used by main.py and app.py.
+
+All shocks are drawn as one (days, n_sims) block, turned into log returns and
+cumulative-summed in log space, so there is no per-step Python loop.
+
+Shock methods (variance reduction):
+    - "plain": pseudo-random normals
+    - "antithetic": half the paths mirror the other half (z, -z)
+    - "sobol" / "halton": quasi-random points through the inverse normal CDF, built as a Brownian
+      bridge so the first (best spread) dimension sets the terminal price. Every call applies a fresh
+      random shift to one cached scrambled point set (digital XOR shift for Sobol, which keeps its
+      net structure, shift mod 1 for Halton), i.e. an independent randomized QMC replicate,
+      without paying for a new scramble each time
+
+Functions:
+    - normal_shocks()
+    - gbm_paths()
+
+"""
+
+import warnings
+from functools import lru_cache
+
+import numpy as np
+
+
+METHODS = ("plain", "antithetic", "sobol", "halton")
+_SOBOL_BITS = 30
+
+
+def _bridge_increments(z: np.ndarray) -> np.ndarray:
+    # Brownian bridge: z[0] fixes W(days), z[1:] fill in the steps between, each from W(t - 1) towards W(days)
+    days = len(z)
+    w_end = np.sqrt(days) * z[0]
+    w = np.empty_like(z)
+    prev = np.zeros_like(w_end)
+    for t in range(1, days):
+        left = days - t + 1
+        prev = prev + (w_end - prev) / left + np.sqrt((left - 1) / left) * z[t]
+        w[t - 1] = prev
+    w[-1] = w_end
+
+    w[1:] -= w[:-1].copy()
+    return w
+
+
+@lru_cache(maxsize=4)
+def _qmc_points(method: str, days: int, n_sims: int) -> np.ndarray:
+    from scipy.stats import qmc
+
+    engine = qmc.Sobol(days, seed=0) if method == "sobol" else qmc.Halton(days, seed=0)
+    with warnings.catch_warnings():
+        # Sobol warns when n_sims is not a power of 2, the points are still valid
+        warnings.simplefilter("ignore", UserWarning)
+        points = engine.random(n_sims).T
+    points.flags.writeable = False
+    return points
+
+
+def normal_shocks(days: int, n_sims: int, rng=None, method: str = "plain", dtype=np.float64) -> np.ndarray:
+    """
+    Standard normal step shocks for n_sims paths.
+
+    Args:
+        - days: int -> steps per path
+        - n_sims: int
+        - rng: np.random.Generator or seed (also seeds the QMC scramble)
+        - method: str -> one of METHODS
+
+    Return:
+        np.ndarray: (days, n_sims)
+    """
+    rng = np.random.default_rng(rng)
+
+    if method == "plain":
+        return rng.standard_normal((days, n_sims), dtype=dtype)
+
+    if method == "antithetic":
+        half = rng.standard_normal((days, (n_sims + 1) // 2), dtype=dtype)
+        return np.concatenate([half, -half], axis=1)[:, :n_sims]
+
+    if method in ("sobol", "halton"):
+        from scipy.special import ndtri
+
+        points = _qmc_points(method, days, n_sims)
+        if method == "sobol":
+            bits = (points * 2.0**_SOBOL_BITS).astype(np.uint64)
+            bits ^= rng.integers(0, 2**_SOBOL_BITS, size=(days, 1), dtype=np.uint64)
+            u = (bits + 0.5) / 2.0**_SOBOL_BITS
+        else:
+            u = points + rng.random((days, 1))
+            u %= 1.0
+        np.clip(u, 1e-12, 1 - 1e-12, out=u)
+        return _bridge_increments(ndtri(u)).astype(dtype, copy=False)
+
+    raise ValueError(f"Enter one of {METHODS} for method")
+
+
+def gbm_paths(S0: float, mu: float, sigma: float, days: int, n_sims: int, rng=None,
+              dt: float = 1.0, dtype=np.float64, terminal_only: bool = False, method: str = "plain") -> np.ndarray:
+    """
+    Simulates GBM price paths.
+
+    Args:
+        - S0: float -> day 0 price
+        - mu: float -> drift per step (daily if dt = 1)
+        - sigma: float -> volatility per step
+        - days: int -> number of steps to simulate
+        - n_sims: int -> number of paths
+        - rng: np.random.Generator or seed, default a fresh default_rng()
+        - dt: float = 1.0 -> step size
+        - dtype: np.float64 or np.float32
+        - terminal_only: bool -> only return the final prices
+        - method: str -> shock method, see normal_shocks()
+
+    Return:
+        np.ndarray: (days + 1, n_sims) with row 0 == S0, or (n_sims,) if terminal_only
+    """
+    rng = np.random.default_rng(rng)
+    drift = (mu - 0.5 * sigma**2) * dt
+    vol = sigma * np.sqrt(dt)
+
+    if terminal_only:
+        # Sum of `days` iid N(0, 1) shocks is N(0, days), one draw per path is enough
+        out = normal_shocks(1, n_sims, rng, method, dtype)[0]
+        out *= vol * np.sqrt(days)
+        out += drift * days
+        np.exp(out, out=out)
+        out *= S0
+        return out
+
+    out = np.empty((days + 1, n_sims), dtype=dtype)
+    out[0] = 0.0
+
+    steps = out[1:]
+    if method == "plain":
+        rng.standard_normal(out=steps, dtype=dtype)
+    else:
+        steps[:] = normal_shocks(days, n_sims, rng, method, dtype)
+    steps *= vol
+    steps += drift
+    np.cumsum(steps, axis=0, out=steps)
+
+    np.exp(out, out=out)
+    out *= S0
+    return out
@@ -1,20 +1,29 @@
+import os
+import sys
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-import yfinance as yf
 from datetime import datetime, timedelta
 
+# The on-disk price cache is shared with the trading strategy project
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "trading_strategy_analysis"))
+from price_store import load_prices
+
+from parallel import parallel_paths
+from walk_forward import walk_forward
+
 # Global variable 
 BACK_TEST = True
 BACK_TEST_DAYS = 30
+WALK_FORWARD_WINDOW = 252
+SEED = 42
+WORKERS = None      # None uses every core, 1 simulates in process
+BACKEND = "thread"  # "thread" or "process", see parallel.py
 
 def get_df(ticker:str, period:str= "max"):
     # Download data and return as pd "Date, Returns"
 
     try:
-        data = yf.download(
-            tickers=ticker,
-            period=period)
+        data = load_prices(ticker, period=period)
         
         if data is None or data.empty:
             print(f"No data returned for ticker: '{ticker}'.")
@@ -23,12 +32,21 @@ def get_df(ticker:str, period:str= "max"):
         data.columns = [col[0] for col in data.columns]
         return data 
     
-    except ValueError as e:
+    except (ValueError, FileNotFoundError) as e:
         print(f"Error Downloading Data: {e}")
         return pd.DataFrame()
 
 
 
+def split_df(df, x: int):
+    # Everything but the last x rows to calibrate on, the last x rows to test against
+    return df.iloc[:-x], df.iloc[-x:]
+
+def compute_log_returns(df):
+    out = df.copy()
+    out["logReturns"] = np.log(out["Close"] / out["Close"].shift(1))
+    return out.dropna(subset=["logReturns"])
+
 def calc_anualized_mu(df):
     mu_daily = df["logReturns"].mean()
     return mu_daily * 252
@@ -37,7 +55,7 @@ def calc_anualized_sigma(df):
     sigma_daily = df["logReturns"].std()
     return sigma_daily * np.sqrt(252) 
 
-def run_sim(mu_annual, sigma_annual, df, number_of_sims=10, days=100):
+def run_sim(mu_annual, sigma_annual, df, number_of_sims=10, days=100, seed=None, n_workers=1, backend="thread"):
     
     # Find day 0 price 
     last_price = df.tail(days).iloc[0]["Close"]
@@ -46,32 +64,25 @@ def run_sim(mu_annual, sigma_annual, df, number_of_sims=10, days=100):
     mu_daily = mu_annual / 252.0
     sigma_daily = sigma_annual / np.sqrt(252.0)
 
-    dt = 1.0  # 1 trading day
-
-    data = {}
-    for i in range(number_of_sims):
-        prices = [last_price]
-        for _ in range(days):
-            eps = np.random.normal()
-            next_price = prices[-1] * np.exp(
-                (mu_daily - 0.5 * sigma_daily**2) * dt
-                + sigma_daily * np.sqrt(dt) * eps
-            )
-            prices.append(round(next_price, 2))
-            print(round(next_price, 2))
-        data[f"Sim_{i}"] = prices
-    
-    sim_df = pd.DataFrame(data)
+    # One slice of the paths per worker, each on its own child stream of seed (an int or SeedSequence),
+    # so a (seed, n_workers) pair gives the same paths on either backend
+    paths = parallel_paths(last_price, mu_daily, sigma_daily, days, number_of_sims, seed=seed,
+                           n_workers=n_workers, backend=backend)
+
+    sim_df = pd.DataFrame(paths.round(2), columns=[f"Sim_{i}" for i in range(number_of_sims)])
     return sim_df
 
 if __name__ == "__main__":
+    # Only the script draws, importing run_sim() etc. shouldn't load matplotlib
+    import matplotlib.pyplot as plt
+
     ticker_input = "AAPL"
     period_input = "1y"
 
     price_df = get_df(ticker_input)
 
     if BACK_TEST:
-        train_data, test_data = split_df(price_df, x=100)
+        train_data, test_data = split_df(price_df, x=BACK_TEST_DAYS)
         last_price = round(float(train_data["Close"].iloc[-1]), 2)
     else:
         train_data = price_df
@@ -81,21 +92,28 @@ if __name__ == "__main__":
     anualized_mu = calc_anualized_mu(log_returns_df)
     anualized_sigma = calc_anualized_sigma(log_returns_df)
 
-    sim_df = run_sim(anualized_mu, anualized_sigma, last_price, price_df)
+    # Day 0 is the last training close
+    sim_df = run_sim(anualized_mu, anualized_sigma, train_data.iloc[-1:], number_of_sims=100,
+                     days=BACK_TEST_DAYS, seed=SEED, n_workers=WORKERS, backend=BACKEND)
 
     print(f"Day zero price {last_price}")
-    print(f"last price: {round(float(test_data["Close"].iloc[-1]), 2)}, Expected price: {round(sim_df.iloc[-1].mean(),2)}")
+    if BACK_TEST:
+        print(f"last price: {round(float(test_data['Close'].iloc[-1]), 2)}, Expected price: {round(sim_df.iloc[-1].mean(),2)}")
+
+        # Every origin in the history, not just the last one
+        wf = walk_forward(price_df["Close"], window=WALK_FORWARD_WINDOW, rng=SEED)
+        print(f"Walk-forward over {len(wf['origins'])} origins")
+        print(wf["scores"].round(3).to_string())
     sim_df.plot(legend=False)
 
     # Plots Actual Price
-    _ ,acutal_prices = split_df(price_df, x=100)
-    acutal_prices["Close"].reset_index(drop=True)
-    plt.plot(acutal_prices["Close"].reset_index(drop=True), color="black")
+    if BACK_TEST:
+        plt.plot(np.arange(1, BACK_TEST_DAYS + 1), test_data["Close"].to_numpy(), color="black")
 
     plt.axhline(last_price, linestyle="--", color="Black", label=f"Last Price: ${last_price}")
     plt.axhline(round(sim_df.iloc[-1].mean(),2), linestyle=":", color="Black")
 
-    plt.title(f"{ticker_input} GBM Simulations ({100}  days)")
+    plt.title(f"{ticker_input} GBM Simulations ({BACK_TEST_DAYS}  days)")
     plt.xlabel("Day")
     plt.ylabel("Price")
     plt.show()
\ No newline at end of file
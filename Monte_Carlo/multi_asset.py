@@ -0,0 +1,153 @@
+"""
+Docstring for multi_asset
+
+This file includes the correlated multi-asset GBM engine.
+
+The covariance of daily log returns across a basket is Cholesky factored once. For each
+block of paths, a (days * m, n_assets) matrix of iid shocks times L.T gives correlated shocks
+for every asset, day and path in one GEMM. The portfolio value is the held shares dotted
+with the asset prices, another single matrix product. Only the portfolio paths are kept, and
+each block is folded into a streaming.PathSummary, so memory is bounded by the block size.
+
+Functions:
+    - estimate_cov()
+    - cholesky()
+    - correlated_paths()
+    - portfolio_paths()
+    - simulate_portfolio()
+    - diversification_ratio()
+
+"""
+
+import numpy as np
+import pandas as pd
+
+from streaming import PathSummary
+
+
+def estimate_cov(closes: pd.DataFrame):
+    """
+    Mean and covariance of daily log returns, on the rows where every asset has a price.
+
+    Args:
+        - closes: pd.DataFrame -> dates x tickers close prices
+
+    Return:
+        (np.ndarray, np.ndarray, np.ndarray): mu (n,), cov (n, n), last prices (n,)
+    """
+    closes = closes.dropna()
+    log_r = np.diff(np.log(closes.to_numpy(dtype=np.float64)), axis=0)
+    return log_r.mean(axis=0), np.atleast_2d(np.cov(log_r, rowvar=False)), closes.iloc[-1].to_numpy(dtype=np.float64)
+
+
+def cholesky(cov: np.ndarray) -> np.ndarray:
+    """
+    Lower Cholesky factor of cov, adding a small diagonal jitter if it is only semi definite
+    (e.g. more assets than return rows, or two identical series).
+    """
+    cov = np.asarray(cov, dtype=np.float64)
+    jitter = 0.0
+    scale = np.mean(np.diag(cov)) or 1.0
+    for _ in range(8):
+        try:
+            return np.linalg.cholesky(cov + jitter * np.eye(len(cov)))
+        except np.linalg.LinAlgError:
+            jitter = scale * 1e-10 if jitter == 0.0 else jitter * 100
+    raise np.linalg.LinAlgError("covariance matrix is not positive semi definite")
+
+
+def correlated_paths(S0, mu, chol: np.ndarray, days: int, n_sims: int, rng=None) -> np.ndarray:
+    """
+    Correlated GBM log price paths for every asset.
+
+    Args:
+        - S0: array (n,) -> day 0 prices
+        - mu: array (n,) -> drift per day, same meaning as in gbm.gbm_paths()
+        - chol: np.ndarray (n, n) -> from cholesky()
+        - days: int
+        - n_sims: int
+        - rng: np.random.Generator or seed
+
+    Return:
+        np.ndarray: (days + 1, n_sims, n) log prices, row 0 == log(S0)
+    """
+    rng = np.random.default_rng(rng)
+    n = len(chol)
+    var = np.einsum("ij,ij->i", chol, chol)
+
+    out = np.empty((days + 1, n_sims, n))
+    out[0] = np.log(S0)
+
+    steps = out[1:].reshape(days * n_sims, n)
+    np.matmul(rng.standard_normal((days * n_sims, n)), chol.T, out=steps)
+    steps += np.asarray(mu, dtype=np.float64) - 0.5 * var
+    np.cumsum(out, axis=0, out=out)
+    return out
+
+
+def portfolio_paths(S0, mu, chol: np.ndarray, shares, days: int, n_sims: int, rng=None) -> np.ndarray:
+    """
+    Value of a fixed share holding along correlated paths.
+
+    Return:
+        np.ndarray: (days + 1, n_sims)
+    """
+    log_s = correlated_paths(S0, mu, chol, days, n_sims, rng=rng)
+    np.exp(log_s, out=log_s)
+    return log_s @ np.asarray(shares, dtype=np.float64)
+
+
+def simulate_portfolio(S0, mu, cov, weights, days: int, n_sims: int, value: float = 1.0, rng=None,
+                       chunk_size: int = None, max_block: int = 2**22, n_bins: int = 2000,
+                       n_sample: int = 300) -> PathSummary:
+    """
+    Buy and hold portfolio of correlated GBM assets, summarised like streaming.simulate_summary().
+
+    Args:
+        - S0, mu: array (n,) -> day 0 prices and daily drift per asset
+        - cov: np.ndarray (n, n) -> daily log return covariance
+        - weights: array (n,) -> day 0 value weights, normalised to sum to 1
+        - days: int
+        - n_sims: int
+        - value: float -> day 0 portfolio value
+        - rng: np.random.Generator or seed
+        - chunk_size: int -> paths per block, default the most that fits in max_block floats
+        - n_bins, n_sample: see streaming.PathSummary
+
+    Return:
+        PathSummary of the portfolio value
+    """
+    rng = np.random.default_rng(rng)
+    S0 = np.asarray(S0, dtype=np.float64)
+    mu = np.asarray(mu, dtype=np.float64)
+    cov = np.atleast_2d(np.asarray(cov, dtype=np.float64))
+    weights = np.asarray(weights, dtype=np.float64)
+    weights = weights / weights.sum()
+
+    chol = cholesky(cov)
+    shares = value * weights / S0
+    chunk_size = chunk_size or max(1, max_block // ((days + 1) * len(S0)))
+
+    # Lognormal approximation of the portfolio, only used to place the quantile sketch grid
+    drift = weights @ (mu - 0.5 * np.diag(cov))
+    sigma = np.sqrt(weights @ cov @ weights)
+    t = np.arange(days + 1)
+    summary = PathSummary(np.log(value) + drift * t, sigma * np.sqrt(t), n_bins=n_bins, n_sample=n_sample)
+
+    done = 0
+    while done < n_sims:
+        m = min(chunk_size, n_sims - done)
+        summary.update(portfolio_paths(S0, mu, chol, shares, days, m, rng=rng))
+        done += m
+
+    return summary
+
+
+def diversification_ratio(weights, cov) -> float:
+    """
+    Weighted average asset volatility over portfolio volatility, 1 for a single asset or perfect correlation.
+    """
+    weights = np.asarray(weights, dtype=np.float64)
+    weights = weights / weights.sum()
+    cov = np.atleast_2d(np.asarray(cov, dtype=np.float64))
+    return float(weights @ np.sqrt(np.diag(cov)) / np.sqrt(weights @ cov @ weights))
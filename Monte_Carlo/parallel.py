@@ -0,0 +1,102 @@
+"""
+Docstring for parallel
+
+This file includes the multi-core Monte Carlo backend.
+
+n_sims is split into one slice per worker and every worker gets its own child stream
+from np.random.SeedSequence(seed).spawn(n_workers). Worker summaries are merged in
+worker order, so the result is bit-identical for a given (seed, n_workers).
+
+Backends:
+    - "process": ProcessPoolExecutor, scales with cores, pays process start-up once per call
+    - "thread": ThreadPoolExecutor, NumPy releases the GIL in the RNG / exp / cumsum kernels
+
+Functions:
+    - simulate_parallel()
+    - parallel_paths()
+
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+from gbm import gbm_paths
+from streaming import simulate_summary
+
+
+def _simulate_slice(args):
+    S0, mu, sigma, days, n_sims, seed_seq, kwargs = args
+    return simulate_summary(S0, mu, sigma, days, n_sims, rng=np.random.default_rng(seed_seq), **kwargs)
+
+
+def _paths_slice(args):
+    S0, mu, sigma, days, n_sims, seed_seq, kwargs = args
+    return gbm_paths(S0, mu, sigma, days, n_sims, rng=np.random.default_rng(seed_seq), **kwargs)
+
+
+def _run_slices(fn, S0, mu, sigma, days, n_sims, seed, n_workers, backend, kwargs) -> list:
+    """
+    fn over one slice of n_sims per worker, each slice on its own child stream of seed, in worker order.
+    """
+    if seed is not None and not isinstance(seed, (int, np.integer, np.random.SeedSequence)):
+        raise TypeError(f"seed must be an int or np.random.SeedSequence, not {type(seed).__name__}")
+    n_workers = n_workers or os.cpu_count() or 1
+    n_workers = max(1, min(n_workers, n_sims))
+
+    root = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    sizes = [len(part) for part in np.array_split(np.arange(n_sims), n_workers)]
+    jobs = [(S0, mu, sigma, days, size, child, kwargs) for size, child in zip(sizes, root.spawn(n_workers))]
+
+    if n_workers == 1:
+        return [fn(jobs[0])]
+    if backend == "process":
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            return list(pool.map(fn, jobs))
+    if backend == "thread":
+        with ThreadPoolExecutor(max_workers=n_workers) as pool:
+            return list(pool.map(fn, jobs))
+    raise ValueError("Enter 'process' or 'thread' for backend")
+
+
+def simulate_parallel(S0: float, mu: float, sigma: float, days: int, n_sims: int, seed=None,
+                      n_workers: int = None, backend: str = "process", **kwargs):
+    """
+    Runs simulate_summary() across n_workers and merges the results.
+
+    Args:
+        - S0, mu, sigma, days, n_sims: see streaming.simulate_summary()
+        - seed: int or np.random.SeedSequence -> root of every worker stream
+        - n_workers: int -> default os.cpu_count()
+        - backend: str -> "process" or "thread"
+        - kwargs: passed on to simulate_summary() (chunk_size, dtype, n_bins, n_sample, method, control, n_batches)
+
+    Return:
+        streaming.PathSummary
+    """
+    parts = _run_slices(_simulate_slice, S0, mu, sigma, days, n_sims, seed, n_workers, backend, kwargs)
+
+    summary = parts[0]
+    for part in parts[1:]:
+        summary.merge(part)
+    return summary
+
+
+def parallel_paths(S0: float, mu: float, sigma: float, days: int, n_sims: int, seed=None,
+                   n_workers: int = None, backend: str = "thread", **kwargs) -> np.ndarray:
+    """
+    gbm.gbm_paths() with the paths split across n_workers, same streams as simulate_parallel().
+
+    Args:
+        - S0, mu, sigma, days, n_sims: see gbm.gbm_paths()
+        - seed: int or np.random.SeedSequence -> root of every worker stream
+        - n_workers: int -> default os.cpu_count()
+        - backend: str -> "process" or "thread"
+        - kwargs: passed on to gbm_paths() (dt, dtype, method)
+
+    Return:
+        np.ndarray: (days + 1, n_sims), worker slices side by side
+    """
+    parts = _run_slices(_paths_slice, S0, mu, sigma, days, n_sims, seed, n_workers, backend, kwargs)
+    return np.hstack(parts)
@@ -0,0 +1,255 @@
+"""
+Docstring for streaming
+
+This file includes the chunked Monte Carlo mode. Paths are simulated in blocks of
+chunk_size and each block is folded into a PathSummary, so peak memory is bounded
+by the chunk size instead of n_sims.
+
+A PathSummary keeps:
+    - running per-day mean
+    - per-day quantile sketch (fixed histogram in normalised log-price space)
+    - terminal distribution (histogram + mean / std / min / max)
+    - a small sample of whole paths for plotting
+    - per batch terminal sums, for standard errors
+
+Every update() is one batch. Standard errors are batch means errors, so they stay honest for
+antithetic and randomized QMC paths, where single paths are not independent. With a known
+analytic terminal mean (control_mean), P(final > threshold) is control variate adjusted.
+
+Functions:
+    - simulate_summary()
+
+"""
+
+import numpy as np
+
+from gbm import gbm_paths
+
+
+class PathSummary:
+    def __init__(self, center, scale, n_bins: int = 2000, z_range: float = 6.0, n_sample: int = 300,
+                 threshold: float = None, control_mean: float = None):
+        """
+        Args:
+            - center: array (days + 1,) -> expected log price per day
+            - scale: array (days + 1,) -> std of log price per day
+            - n_bins: int -> histogram bins per day over center +- z_range * scale
+            - z_range: float -> values further out are clipped into the edge bins
+            - n_sample: int -> whole paths kept for plotting
+            - threshold: float -> P(final > threshold) is tracked, default exp(center[0]) (the day 0 price)
+            - control_mean: float -> analytic E[final], enables the control variate
+        """
+        self.center = np.asarray(center, dtype=np.float64)
+        self.scale = np.maximum(np.asarray(scale, dtype=np.float64), 1e-12)
+        self.n_bins = n_bins
+        self.z_range = z_range
+        self.n_sample = n_sample
+
+        n_rows = len(self.center)
+        self.n = 0
+        self.counts = np.zeros((n_rows, n_bins), dtype=np.int64)
+        self.path_sum = np.zeros(n_rows, dtype=np.float64)
+
+        self.terminal_mean = 0.0
+        self.terminal_m2 = 0.0
+        self.terminal_min = np.inf
+        self.terminal_max = -np.inf
+
+        self.sample_paths = np.empty((n_rows, 0))
+        self._cum = None
+
+        self.threshold = float(np.exp(self.center[0])) if threshold is None else threshold
+        self.control_mean = control_mean
+        # Per batch: paths, sum of finals, number of finals above threshold, and that count's sum of finals
+        self.batches = np.empty((0, 4))
+        self.terminal_sq = 0.0
+
+    def update(self, paths: np.ndarray):
+        """
+        Folds a (days + 1, m) block of price paths into the summary.
+        """
+        n_rows, m = paths.shape
+
+        z = np.log(paths)
+        z -= self.center[:, None]
+        z /= self.scale[:, None]
+        bins = ((z + self.z_range) * (self.n_bins / (2 * self.z_range))).astype(np.int64)
+        np.clip(bins, 0, self.n_bins - 1, out=bins)
+        bins += (np.arange(n_rows) * self.n_bins)[:, None]
+        self.counts += np.bincount(bins.ravel(), minlength=n_rows * self.n_bins).reshape(n_rows, self.n_bins)
+
+        self.path_sum += paths.sum(axis=1, dtype=np.float64)
+
+        final = paths[-1].astype(np.float64)
+        chunk_mean = final.mean()
+        self._merge_terminal(m, chunk_mean, ((final - chunk_mean) ** 2).sum(), final.min(), final.max())
+        self._add_sample(paths)
+
+        gain = final > self.threshold
+        self.batches = np.vstack([self.batches, [m, final.sum(), gain.sum(), final[gain].sum()]])
+        self.terminal_sq += (final**2).sum()
+        self.n += m
+        self._cum = None
+
+    def merge(self, other: "PathSummary"):
+        """
+        Folds another summary built on the same grid (e.g. from another worker) into this one.
+        """
+        if other.n == 0:
+            return self
+
+        self.counts += other.counts
+        self.path_sum += other.path_sum
+        self._merge_terminal(other.n, other.terminal_mean, other.terminal_m2, other.terminal_min, other.terminal_max)
+        self._add_sample(other.sample_paths)
+        self.batches = np.vstack([self.batches, other.batches])
+        self.terminal_sq += other.terminal_sq
+        self.n += other.n
+        self._cum = None
+        return self
+
+    def _merge_terminal(self, m, mean, m2, lo, hi):
+        # Chan et al. parallel update for the terminal mean / variance
+        total = self.n + m
+        delta = mean - self.terminal_mean
+        self.terminal_mean += delta * m / total
+        self.terminal_m2 += m2 + delta**2 * self.n * m / total
+        self.terminal_min = min(self.terminal_min, lo)
+        self.terminal_max = max(self.terminal_max, hi)
+
+    def _add_sample(self, paths):
+        # Paths are iid, so the first n_sample paths are already a uniform sample
+        need = self.n_sample - self.sample_paths.shape[1]
+        if need > 0:
+            self.sample_paths = np.hstack([self.sample_paths, paths[:, :need].astype(np.float64)])
+
+    @property
+    def mean(self) -> np.ndarray:
+        return self.path_sum / self.n
+
+    @property
+    def terminal_std(self) -> float:
+        return np.sqrt(self.terminal_m2 / (self.n - 1)) if self.n > 1 else 0.0
+
+    @staticmethod
+    def _batch_se(n_b: np.ndarray, est_b: np.ndarray) -> float:
+        # Standard error of the pooled estimate from the spread of the batch estimates
+        if len(n_b) < 2:
+            return np.nan
+        w = n_b / n_b.sum()
+        pooled = w @ est_b
+        return float(np.sqrt((w**2) @ (est_b - pooled) ** 2 * len(n_b) / (len(n_b) - 1)))
+
+    @property
+    def terminal_mean_se(self) -> float:
+        """
+        Standard error of terminal_mean, NaN with fewer than 2 batches.
+        """
+        n_b, sum_b = self.batches[:, 0], self.batches[:, 1]
+        return self._batch_se(n_b, sum_b / n_b)
+
+    def _cv_beta(self) -> float:
+        # Regression slope of 1{final > threshold} on final over every path
+        n = self.n
+        var_x = self.terminal_sq / n - self.terminal_mean**2
+        if var_x <= 0:
+            return 0.0
+        p = self.batches[:, 2].sum() / n
+        cov = self.batches[:, 3].sum() / n - p * self.terminal_mean
+        return cov / var_x
+
+    def _gain_batches(self) -> np.ndarray:
+        n_b, sum_b, gain_b = self.batches[:, 0], self.batches[:, 1], self.batches[:, 2]
+        est = gain_b / n_b
+        if self.control_mean is not None:
+            est = est - self._cv_beta() * (sum_b / n_b - self.control_mean)
+        return est
+
+    @property
+    def prob_gain(self) -> float:
+        """
+        P(final > threshold), control variate adjusted when control_mean is set.
+        """
+        n_b = self.batches[:, 0]
+        return float(np.clip(n_b @ self._gain_batches() / n_b.sum(), 0.0, 1.0))
+
+    @property
+    def prob_gain_se(self) -> float:
+        return self._batch_se(self.batches[:, 0], self._gain_batches())
+
+    def _z_edges(self) -> np.ndarray:
+        return np.linspace(-self.z_range, self.z_range, self.n_bins + 1)
+
+    def percentile(self, q: float) -> np.ndarray:
+        """
+        Per-day q-th percentile (0-100, like np.percentile), linearly interpolated inside the bin.
+        """
+        # Cumulative counts are kept until the next update, so asking for more quantiles is cheap
+        if self._cum is None:
+            self._cum = np.cumsum(self.counts, axis=1)
+        cum = self._cum
+        # Same rank np.percentile's linear method uses, with samples sat at the middle of their share of the bin
+        target = q / 100 * (self.n - 1) + 0.5
+
+        idx = np.minimum((cum < target).sum(axis=1), self.n_bins - 1)
+        rows = np.arange(len(cum))
+        below = np.where(idx > 0, cum[rows, idx - 1], 0)
+        in_bin = np.maximum(self.counts[rows, idx], 1)
+        frac = np.clip((target - below) / in_bin, 0.0, 1.0)
+
+        width = 2 * self.z_range / self.n_bins
+        z = -self.z_range + (idx + frac) * width
+        return np.exp(self.center + self.scale * z)
+
+    def terminal_hist(self):
+        """
+        Returns (prices, counts) of the non-empty terminal bins, bin centres in price units.
+        Plot with weights, e.g. sns.histplot(x=prices, weights=counts, bins=80).
+        """
+        edges = self._z_edges()
+        mids = 0.5 * (edges[1:] + edges[:-1])
+        counts = self.counts[-1]
+        keep = counts > 0
+        prices = np.exp(self.center[-1] + self.scale[-1] * mids[keep])
+        return prices, counts[keep]
+
+
+def simulate_summary(S0: float, mu: float, sigma: float, days: int, n_sims: int, rng=None,
+                     chunk_size: int = 10_000, dtype=np.float64, n_bins: int = 2000,
+                     n_sample: int = 300, method: str = "plain", control: bool = False,
+                     n_batches: int = None) -> PathSummary:
+    """
+    Simulates n_sims GBM paths chunk_size at a time and returns their PathSummary.
+
+    Args:
+        - S0, mu, sigma, days: see gbm.gbm_paths()
+        - n_sims: int -> total number of paths
+        - rng: np.random.Generator or seed
+        - chunk_size: int -> paths per block, peak memory ~ (days + 1) * chunk_size floats
+        - n_bins: int -> quantile sketch resolution
+        - n_sample: int -> whole paths kept for plotting
+        - method: str -> shock method, see gbm.normal_shocks()
+        - control: bool -> control variate on the analytic mean S0 * exp(mu * days)
+        - n_batches: int -> split into at least this many batches for the standard errors
+
+    Return:
+        PathSummary
+    """
+    rng = np.random.default_rng(rng)
+
+    t = np.arange(days + 1)
+    center = np.log(S0) + (mu - 0.5 * sigma**2) * t
+    scale = sigma * np.sqrt(t)
+    control_mean = S0 * np.exp(mu * days) if control else None
+    summary = PathSummary(center, scale, n_bins=n_bins, n_sample=n_sample, threshold=S0, control_mean=control_mean)
+
+    if n_batches:
+        chunk_size = min(chunk_size, max(2, -(-n_sims // n_batches)))
+
+    done = 0
+    while done < n_sims:
+        m = min(chunk_size, n_sims - done)
+        summary.update(gbm_paths(S0, mu, sigma, days, m, rng=rng, dtype=dtype, method=method))
+        done += m
+
+    return summary
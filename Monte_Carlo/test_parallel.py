@@ -0,0 +1,52 @@
+import importlib.util
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from parallel import parallel_paths, simulate_parallel
+
+# Both projects have a main.py, load this one by path
+_spec = importlib.util.spec_from_file_location("mc_main", os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py"))
+mc_main = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(mc_main)
+
+
+@pytest.mark.parametrize("n_workers", [1, 3])
+def test_paths_bit_identical_across_backends(n_workers):
+    thread = parallel_paths(100.0, 5e-4, 0.02, 30, 1_001, seed=7, n_workers=n_workers, backend="thread")
+    process = parallel_paths(100.0, 5e-4, 0.02, 30, 1_001, seed=7, n_workers=n_workers, backend="process")
+
+    assert thread.shape == (31, 1_001)
+    np.testing.assert_array_equal(thread, process)
+
+
+@pytest.mark.parametrize("n_workers", [1, 3])
+def test_summary_bit_identical_across_backends(n_workers):
+    kwargs = dict(seed=7, n_workers=n_workers, n_batches=4, method="antithetic", control=True)
+    thread = simulate_parallel(100.0, 5e-4, 0.02, 30, 2_001, backend="thread", **kwargs)
+    process = simulate_parallel(100.0, 5e-4, 0.02, 30, 2_001, backend="process", **kwargs)
+
+    np.testing.assert_array_equal(thread.percentile(2.5), process.percentile(2.5))
+    np.testing.assert_array_equal(thread.mean, process.mean)
+    np.testing.assert_array_equal(thread.batches, process.batches)
+    assert thread.terminal_mean == process.terminal_mean
+    assert thread.prob_gain_se == process.prob_gain_se
+
+
+def test_run_sim_seed_and_workers():
+    df = pd.DataFrame({"Close": [100.0]})
+    thread = mc_main.run_sim(0.1, 0.3, df, number_of_sims=50, days=20, seed=42, n_workers=2, backend="thread")
+    process = mc_main.run_sim(0.1, 0.3, df, number_of_sims=50, days=20, seed=42, n_workers=2, backend="process")
+    pd.testing.assert_frame_equal(thread, process)
+
+    # An int seed and its SeedSequence are the same streams
+    seq = mc_main.run_sim(0.1, 0.3, df, number_of_sims=50, days=20, seed=np.random.SeedSequence(42), n_workers=2)
+    pd.testing.assert_frame_equal(thread, seq)
+
+
+def test_run_sim_rejects_generator():
+    with pytest.raises(TypeError):
+        mc_main.run_sim(0.1, 0.3, pd.DataFrame({"Close": [100.0]}), number_of_sims=10, days=5,
+                        seed=np.random.default_rng(1), n_workers=None)
@@ -0,0 +1,159 @@
+"""
+Docstring for walk_forward
+
+This file includes the walk-forward back test of the GBM forecast.
+
+Every day of the history with a full calibration window before it and `max(horizons)` days
+after it is a forecast origin. Per origin:
+
+    - μ/σ come from the `window` daily log returns before it, read off running sums of r and r²,
+      so sliding the window is O(1) instead of a refit
+    - GBM prices at the scored horizons are simulated for all origins at once, as one
+      (origins, horizons, n_sims) tensor (processed chunk_size origins at a time)
+    - predicted quantiles are compared with the realised close: hit rate per quantile, coverage
+      of the central intervals and pinball loss (on price / day 0 price, so tickers compare)
+
+Functions:
+    - rolling_params()
+    - forecast_quantiles()
+    - pinball_loss()
+    - walk_forward()
+    - walk_forward_ticker()
+
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+# The on-disk price cache is shared with the trading strategy project
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "trading_strategy_analysis"))
+from price_store import load_prices
+
+
+def rolling_params(close, window: int):
+    """
+    Mean and std of the `window` daily log returns ending at each price.
+
+    Return:
+        (np.ndarray, np.ndarray): mu, sigma per row of close, NaN for the first `window` rows
+    """
+    r = np.diff(np.log(np.asarray(close, dtype=np.float64)))
+    s1 = np.concatenate([[0.0], np.cumsum(r)])
+    s2 = np.concatenate([[0.0], np.cumsum(r * r)])
+
+    mu = np.full(len(r) + 1, np.nan)
+    sigma = np.full(len(r) + 1, np.nan)
+
+    sum1 = s1[window:] - s1[:-window]
+    sum2 = s2[window:] - s2[:-window]
+    mu[window:] = sum1 / window
+    sigma[window:] = np.sqrt(np.maximum(sum2 - window * mu[window:] ** 2, 0.0) / (window - 1))
+    return mu, sigma
+
+
+def forecast_quantiles(S0, mu, sigma, horizons, n_sims: int, quantiles, rng=None) -> np.ndarray:
+    """
+    GBM quantiles at several horizons for many origins from one batched simulation.
+
+    Paths are only built at the scored horizons: the Brownian motion gets one
+    N(0, h_k - h_(k-1)) increment per horizon, so each origin's horizons share a path.
+
+    Args:
+        - S0, mu, sigma: array (n_origins,) -> day 0 price and daily drift / vol, as in gbm.gbm_paths()
+        - horizons: sorted list of int -> days ahead
+        - n_sims: int -> paths per origin
+        - quantiles: list of float -> 0-100
+        - rng: np.random.Generator or seed
+
+    Return:
+        np.ndarray: (n_origins, len(horizons), len(quantiles)) prices
+    """
+    rng = np.random.default_rng(rng)
+    S0, mu, sigma = (np.asarray(a, dtype=np.float64)[:, None, None] for a in (S0, mu, sigma))
+    h = np.asarray(horizons, dtype=np.float64)
+
+    w = rng.standard_normal((S0.shape[0], len(h), n_sims))
+    w *= np.sqrt(np.diff(h, prepend=0.0))[None, :, None]
+    np.cumsum(w, axis=1, out=w)
+
+    log_s = np.log(S0) + (mu - 0.5 * sigma**2) * h[None, :, None] + sigma * w
+    return np.exp(np.moveaxis(np.percentile(log_s, quantiles, axis=-1), 0, -1))
+
+
+def pinball_loss(realised: np.ndarray, predicted: np.ndarray, quantiles) -> np.ndarray:
+    """
+    Pinball (quantile) loss, broadcast over a trailing quantile axis of predicted.
+    """
+    tau = np.asarray(quantiles, dtype=np.float64) / 100
+    diff = realised[..., None] - predicted
+    return np.maximum(tau * diff, (tau - 1) * diff)
+
+
+def walk_forward(close: pd.Series, window: int = 252, horizons=(1, 5, 10, 20, 30), n_sims: int = 1000,
+                 quantiles=(2.5, 5, 25, 50, 75, 95, 97.5), step: int = 1, rng=None, chunk_size: int = 250) -> dict:
+    """
+    Walk-forward evaluation of the GBM forecast over a whole close series.
+
+    Args:
+        - close: pd.Series -> daily closes
+        - window: int -> calibration window in returns
+        - horizons: list of int -> days ahead to score
+        - n_sims: int -> paths per origin
+        - quantiles: list of float -> 0-100, symmetric pairs give the coverage columns
+        - step: int -> days between origins
+        - rng: np.random.Generator or seed
+        - chunk_size: int -> origins per batch, peak memory ~ chunk_size * len(horizons) * n_sims floats
+
+    Return:
+        dict: "scores" (DataFrame per horizon: hit rate and mean pinball loss per quantile, coverage per
+              central interval), "origins" (DatetimeIndex), "predicted" (origins, horizons, quantiles)
+              and "realised" (origins, horizons)
+    """
+    rng = np.random.default_rng(rng)
+    horizons = sorted(horizons)
+    prices = close.to_numpy(dtype=np.float64)
+
+    mu, sigma = rolling_params(prices, window)
+    origins = np.arange(window, len(prices) - horizons[-1], step)
+    if len(origins) == 0:
+        raise ValueError(f"Need more than {window + horizons[-1]} closes for window={window} and horizons up to {horizons[-1]}")
+
+    predicted = np.empty((len(origins), len(horizons), len(quantiles)))
+    for lo in range(0, len(origins), chunk_size):
+        o = origins[lo:lo + chunk_size]
+        predicted[lo:lo + len(o)] = forecast_quantiles(prices[o], mu[o], sigma[o], horizons, n_sims, quantiles, rng=rng)
+
+    realised = prices[origins[:, None] + np.asarray(horizons)[None, :]]
+    S0 = prices[origins][:, None]
+
+    hits = (realised[..., None] <= predicted).mean(axis=0)
+    loss = pinball_loss(realised / S0, predicted / S0[..., None], quantiles).mean(axis=0)
+
+    scores = {}
+    for j, q in enumerate(quantiles):
+        scores[f"hit_{q:g}"] = hits[:, j]
+    for j, q in enumerate(quantiles):
+        scores[f"pinball_{q:g}"] = loss[:, j]
+    for j, q in enumerate(quantiles):
+        if q < 50 and (100 - q) in quantiles:
+            k = quantiles.index(100 - q)
+            inside = (realised >= predicted[..., j]) & (realised <= predicted[..., k])
+            scores[f"coverage_{100 - 2 * q:g}"] = inside.mean(axis=0)
+
+    return {
+        "scores": pd.DataFrame(scores, index=pd.Index(horizons, name="horizon")),
+        "origins": close.index[origins],
+        "predicted": predicted,
+        "realised": realised,
+    }
+
+
+def walk_forward_ticker(ticker: str, period: str = "max", **kwargs) -> dict:
+    """
+    walk_forward() on a ticker's closes from the price store, see walk_forward() for kwargs.
+    """
+    data = load_prices(ticker, period=period)
+    return walk_forward(data["Close"][ticker].dropna(), **kwargs)
@@ -0,0 +1,242 @@
+"""
+Docstring for bench
+
+This file includes the benchmark suite for the back test and Monte Carlo hot paths.
+
+Prices are synthetic GBM bars written to a temporary price store that is read offline, so
+nothing touches the network and every run sees the same data. Each case is timed over a few
+repeats (median and best are kept) and run once more under tracemalloc for its peak memory.
+Results go to a JSON file and are compared against a stored baseline.
+
+Usage:
+    python benchmarks/bench.py                      # run, write results.json, compare to baseline.json
+    python benchmarks/bench.py --quick              # smaller sizes, fewer repeats
+    python benchmarks/bench.py -k gbm               # only cases whose name contains "gbm"
+    python benchmarks/bench.py --save-baseline      # store this run as the new baseline
+
+Exits with 1 if any case is slower than threshold x its baseline median.
+
+Functions:
+    - synthetic_bars()
+    - make_store()
+    - cases()
+    - run_case()
+    - compare()
+
+"""
+
+import argparse
+import atexit
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+
+# Must be set before price_store is imported, it reads them once
+STORE = tempfile.mkdtemp(prefix="bench_prices_")
+atexit.register(shutil.rmtree, STORE, ignore_errors=True)
+os.environ["PRICE_STORE_DIR"] = STORE
+os.environ["PRICE_STORE_OFFLINE"] = "1"
+
+sys.path.append(os.path.join(ROOT, "trading_strategy_analysis"))
+sys.path.append(os.path.join(ROOT, "Monte_Carlo"))
+
+import price_store
+from functions import calc_cagr, populate_data, sample_start_end_idx
+from investor import Investor
+from runner import run_epochs
+from tickers import tickers
+
+from gbm import gbm_paths
+from streaming import simulate_summary
+
+# Both projects have a main.py, load the Monte Carlo one by path
+_spec = importlib.util.spec_from_file_location("mc_main", os.path.join(ROOT, "Monte_Carlo", "main.py"))
+mc_main = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(mc_main)
+
+
+BASELINE = os.path.join(HERE, "baseline.json")
+RESULTS = os.path.join(HERE, "results.json")
+HISTORY_ROWS = 8_000
+
+
+def synthetic_bars(n_rows: int, rng, start: str = "1990-01-02", S0: float = 50.0) -> np.ndarray:
+    """
+    GBM daily bars (business days) as a price_store.BAR_DTYPE array.
+    """
+    import pandas as pd
+
+    dates = pd.bdate_range(start, periods=n_rows)
+    close = S0 * np.exp(np.cumsum(rng.normal(0.0004, 0.02, n_rows)))
+
+    bars = np.empty(n_rows, dtype=price_store.BAR_DTYPE)
+    bars["date"] = dates.values
+    bars["close"] = close
+    bars["open"] = close * (1 + rng.normal(0, 0.003, n_rows))
+    bars["high"] = np.maximum(bars["open"], close) * 1.01
+    bars["low"] = np.minimum(bars["open"], close) * 0.99
+    bars["volume"] = 1e6
+    return bars
+
+
+def make_store(n_rows: int = HISTORY_ROWS, seed: int = 0):
+    """
+    Writes synthetic bars for every ticker in tickers.py (and AAPL, used by Monte_Carlo/main.py).
+    """
+    rng = np.random.default_rng(seed)
+    for ticker in dict.fromkeys(list(tickers) + ["AAPL"]):
+        price_store.write_bars(ticker, synthetic_bars(n_rows, rng))
+
+
+class FixedWindowRng:
+    """
+    Stands in for the Generator Investor samples its window with, so the window is the whole
+    frame: sample_start_end_idx() draws start from [0, ...) and end from [..., n_rows).
+    """
+    def integers(self, low, high=None):
+        return low if low == 0 else high - 1
+
+
+def _investor(strategy: str, data, window: int):
+    frame = data.iloc[:window + 1]
+
+    def run():
+        inv = Investor(strategy, cash=10_000, ticker="AAPL", data=frame)
+        inv.rng = FixedWindowRng()
+        inv.run_sim(0)
+    return run
+
+
+def cases(quick: bool = False) -> dict:
+    """
+    name -> zero argument callable, every callable is one timed unit of work.
+    """
+    data = populate_data("AAPL")
+    rng = np.random.default_rng(0)
+    out = {}
+
+    out["populate_data"] = lambda: populate_data("AAPL")
+
+    for window in ((250, 2_000) if quick else (250, 1_000, 4_000, 7_000)):
+        out[f"investor_sma[w={window}]"] = _investor("SMA", data, window)
+        out[f"investor_bh[w={window}]"] = _investor("Buy & Hold", data, window)
+
+    out["sample_start_end_idx[x1000]"] = lambda: [sample_start_end_idx(HISTORY_ROWS, rng=rng) for _ in range(1_000)]
+    out["calc_cagr[x10000]"] = lambda: [calc_cagr(3650, 10_000.0, 25_000.0) for _ in range(10_000)]
+
+    n_epochs = 20 if quick else 100
+    out[f"run_epochs[n={n_epochs}]"] = lambda: run_epochs(n_epochs, seed=0, n_workers=1)
+
+    sizes = ((1_000, 252), (5_000, 365)) if quick else ((1_000, 252), (5_000, 365), (10_000, 730))
+    for n_sims, days in sizes:
+        out[f"gbm_paths[{n_sims}x{days}]"] = lambda n=n_sims, d=days: gbm_paths(100.0, 5e-4, 0.02, d, n, rng=0)
+        out[f"mc_main.run_sim[{n_sims}x{days}]"] = (
+            lambda n=n_sims, d=days: mc_main.run_sim(0.12, 0.3, data[["Close"]].droplevel(1, axis=1), number_of_sims=n, days=d, seed=0))
+        out[f"simulate_summary[{n_sims}x{days}]"] = lambda n=n_sims, d=days: simulate_summary(100.0, 5e-4, 0.02, d, n, rng=0)
+    return out
+
+
+def run_case(fn, repeats: int) -> dict:
+    """
+    Median / best wall time over repeats (after one warm-up call) and tracemalloc peak of one more call.
+    """
+    sink = io.StringIO()
+    with contextlib.redirect_stdout(sink):
+        fn()
+        times = []
+        for _ in range(repeats):
+            t0 = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - t0)
+
+        tracemalloc.start()
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return {"median_s": statistics.median(times), "best_s": min(times), "repeats": repeats, "peak_mb": peak / 2**20}
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """
+    Prints current vs baseline medians and returns the names slower than threshold x baseline.
+    """
+    slower = []
+    print(f"\n{'case':40s} {'median':>10s} {'baseline':>10s} {'ratio':>7s} {'peak MB':>9s}")
+    for name, res in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:40s} {res['median_s']:10.4f} {'-':>10s} {'-':>7s} {res['peak_mb']:9.1f}")
+            continue
+        ratio = res["median_s"] / base["median_s"]
+        flag = "  << slower" if ratio > threshold else ""
+        print(f"{name:40s} {res['median_s']:10.4f} {base['median_s']:10.4f} {ratio:7.2f} {res['peak_mb']:9.1f}{flag}")
+        if ratio > threshold:
+            slower.append(name)
+    return slower
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks for the back test and Monte Carlo hot paths")
+    parser.add_argument("--quick", action="store_true", help="smaller sizes and fewer repeats")
+    parser.add_argument("-k", dest="filter", default="", help="only run cases whose name contains this")
+    parser.add_argument("--repeats", type=int, default=None)
+    parser.add_argument("--out", default=RESULTS)
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="write this run to the baseline file")
+    parser.add_argument("--threshold", type=float, default=1.25, help="ratio to baseline that counts as a regression")
+    args = parser.parse_args()
+
+    repeats = args.repeats or (3 if args.quick else 5)
+    make_store()
+
+    results = {}
+    for name, fn in cases(args.quick).items():
+        if args.filter in name:
+            results[name] = run_case(fn, repeats)
+            print(f"{name:40s} {results[name]['median_s']:.4f}s  peak {results[name]['peak_mb']:.1f} MB", flush=True)
+
+    report = {
+        "meta": {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "processor": platform.processor(),
+            "quick": args.quick,
+        },
+        "results": results,
+    }
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nBaseline saved to {args.baseline}")
+        sys.exit(0)
+
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}, run with --save-baseline to create one")
+        sys.exit(0)
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)["results"]
+    slower = compare(results, baseline, args.threshold)
+    if slower:
+        print(f"\n{len(slower)} case(s) slower than {args.threshold}x baseline: {', '.join(slower)}")
+        sys.exit(1)
@@ -0,0 +1,201 @@
+"""
+Docstring for startup
+
+This file includes the cold start benchmark for the CLI scripts, the worker side modules and
+the Streamlit app.
+
+Every target is started in a fresh interpreter under python -X importtime, so the numbers are
+what each short lived batch worker pays before doing any work. Per target the wall time of the
+whole process (median and best over a few repeats, after one run that warms the .pyc cache),
+the summed import time, the packages that cost the most and which heavy packages got loaded at
+all are kept. Results go to a JSON file and are compared against a stored baseline.
+
+Usage:
+    python benchmarks/startup.py                     # run, write startup_results.json, compare to startup_baseline.json
+    python benchmarks/startup.py --quick             # fewer repeats
+    python benchmarks/startup.py -k trading          # only targets whose name contains "trading"
+    python benchmarks/startup.py --top 10            # show the 10 most expensive packages per target
+    python benchmarks/startup.py --save-baseline     # store this run as the new baseline
+
+Exits with 1 if any target is slower than threshold x its baseline median.
+
+Functions:
+    - parse_importtime()
+    - run_target()
+    - compare()
+
+"""
+
+import argparse
+import json
+import os
+import platform
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+TRADING = os.path.join(ROOT, "trading_strategy_analysis")
+MONTE_CARLO = os.path.join(ROOT, "Monte_Carlo")
+
+BASELINE = os.path.join(HERE, "startup_baseline.json")
+RESULTS = os.path.join(HERE, "startup_results.json")
+
+# name -> (working directory, interpreter args after -X importtime)
+TARGETS = {
+    "python": (ROOT, ["-c", "pass"]),
+    "trading.main": (TRADING, ["-c", "import main"]),
+    "trading.runner": (TRADING, ["-c", "import runner"]),
+    "trading.investor": (TRADING, ["-c", "import investor"]),
+    "trading.functions": (TRADING, ["-c", "import functions"]),
+    "trading.prefetch": (TRADING, ["-c", "import prefetch"]),
+    "trading.resampling": (TRADING, ["-c", "import resampling"]),
+    "monte_carlo.main": (MONTE_CARLO, ["-c", "import main"]),
+    "monte_carlo.analytic": (MONTE_CARLO, ["-c", "import analytic"]),
+    "monte_carlo.streaming": (MONTE_CARLO, ["-c", "import streaming"]),
+    # Bare mode run of the script, i.e. the landing page before Run Simulation is clicked
+    "monte_carlo.app": (MONTE_CARLO, ["app.py"]),
+}
+
+# Packages that should only load when a run actually plots / tests / fetches / stores
+HEAVY = ("matplotlib", "seaborn", "scipy", "yfinance", "pyarrow", "streamlit", "pandas")
+
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def parse_importtime(stderr: str) -> list:
+    """
+    Parses python -X importtime output.
+
+    Return:
+        list: (module, self_us, cumulative_us, depth) per import, in the order they finished
+    """
+    rows = []
+    for line in stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cum_us, indent, name = match.groups()
+            rows.append((name, int(self_us), int(cum_us), (len(indent) - 1) // 2))
+    return rows
+
+
+def run_target(cwd: str, args: list, repeats: int, top: int = 5) -> dict:
+    """
+    Starts the target repeats times (after one warm-up start) and summarises the last import report.
+
+    Return:
+        dict: median_s / best_s wall time, import_s, top packages by self time, heavy packages loaded
+    """
+    cmd = [sys.executable, "-X", "importtime", *args]
+    times = []
+    for i in range(repeats + 1):
+        t0 = time.perf_counter()
+        proc = subprocess.run(cmd, cwd=cwd, capture_output=True, text=True)
+        if i:
+            times.append(time.perf_counter() - t0)
+        if proc.returncode != 0:
+            raise RuntimeError(f"{' '.join(args)} failed in {cwd}:\n{proc.stderr[-2000:]}")
+
+    rows = parse_importtime(proc.stderr)
+
+    # Self times never overlap, so summing them per top level package splits the total cleanly
+    by_package = defaultdict(int)
+    for name, self_us, _, _ in rows:
+        by_package[name.split(".")[0]] += self_us
+    ranked = sorted(by_package.items(), key=lambda kv: -kv[1])
+
+    return {
+        "median_s": statistics.median(times),
+        "best_s": min(times),
+        "repeats": repeats,
+        "import_s": sum(by_package.values()) / 1e6,
+        "n_modules": len(rows),
+        "top": {name: us / 1e6 for name, us in ranked[:top]},
+        "heavy": [name for name in HEAVY if name in by_package],
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """
+    Prints current vs baseline medians and returns the names slower than threshold x baseline.
+    """
+    slower = []
+    print(f"\n{'target':28s} {'median':>10s} {'baseline':>10s} {'ratio':>7s}  heavy")
+    for name, res in results.items():
+        heavy = ", ".join(res["heavy"]) or "-"
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:28s} {res['median_s']:10.4f} {'-':>10s} {'-':>7s}  {heavy}")
+            continue
+        ratio = res["median_s"] / base["median_s"]
+        flag = "  << slower" if ratio > threshold else ""
+        print(f"{name:28s} {res['median_s']:10.4f} {base['median_s']:10.4f} {ratio:7.2f}  {heavy}{flag}")
+        if ratio > threshold:
+            slower.append(name)
+    return slower
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cold start / import time benchmark")
+    parser.add_argument("--quick", action="store_true", help="fewer repeats")
+    parser.add_argument("-k", dest="filter", default="", help="only run targets whose name contains this")
+    parser.add_argument("--repeats", type=int, default=None)
+    parser.add_argument("--top", type=int, default=5, help="packages to list per target, by import self time")
+    parser.add_argument("--out", default=RESULTS)
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="write this run to the baseline file")
+    parser.add_argument("--threshold", type=float, default=1.25, help="ratio to baseline that counts as a regression")
+    args = parser.parse_args()
+
+    repeats = args.repeats or (3 if args.quick else 5)
+
+    # Nothing here should touch the network or the real price cache, even if a target regresses into loading data
+    store = tempfile.mkdtemp(prefix="startup_prices_")
+    os.environ["PRICE_STORE_DIR"] = store
+    os.environ["PRICE_STORE_OFFLINE"] = "1"
+
+    results = {}
+    try:
+        for name, (cwd, target_args) in TARGETS.items():
+            if args.filter in name:
+                results[name] = res = run_target(cwd, target_args, repeats, args.top)
+                top = ", ".join(f"{pkg} {s:.3f}" for pkg, s in res["top"].items())
+                print(f"{name:28s} {res['median_s']:.4f}s  imports {res['import_s']:.3f}s  [{top}]", flush=True)
+    finally:
+        shutil.rmtree(store, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "processor": platform.processor(),
+            "quick": args.quick,
+        },
+        "results": results,
+    }
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nBaseline saved to {args.baseline}")
+        sys.exit(0)
+
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}, run with --save-baseline to create one")
+        sys.exit(0)
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)["results"]
+    slower = compare(results, baseline, args.threshold)
+    if slower:
+        print(f"\n{len(slower)} target(s) slower than {args.threshold}x baseline: {', '.join(slower)}")
+        sys.exit(1)
@@ -0,0 +1,312 @@
+"""
+Docstring for backtest
+
+This file includes the array based back test kernels used by Investor and for batch runs.
+
+Everything works on plain NumPy arrays (open prices and the two SMAs) and integer
+positions, no DataFrame lookups. Signals and the equity curve are vectorized; fills
+walk only the crossover events because all-in sizing (cash // price - 1) depends on
+the cash left by the previous fill.
+
+Functions:
+    - crossover_signals()
+    - fill_orders()
+    - equity_curve()
+    - sma_backtest()
+    - calc_cagrs()
+    - next_after()
+    - walk_fills()
+    - batch_backtest()
+
+"""
+
+import numpy as np
+
+
+BUY = 1
+SELL = -1
+
+FILL_DTYPE = np.dtype([
+    ("idx", "i8"),       # row of the fill inside the window
+    ("side", "i1"),      # BUY or SELL
+    ("price", "f8"),
+    ("shares", "f8"),
+    ("total", "f8"),
+])
+
+
+def crossover_signals(fast: np.ndarray, slow: np.ndarray) -> np.ndarray:
+    """
+    Golden / death cross signals with the same rules as Investor.run_sma_sim.
+
+    A buy is fast - slow going from < 0 to > 0 between two rows, a sell the opposite.
+    The row before the window counts as -1, so a window that opens with fast > slow buys on day one.
+
+    Works along the last axis, so (n_pairs, n_rows) spreads give one signal row per pair.
+
+    Return:
+        np.ndarray: int8, BUY / SELL / 0 per row
+    """
+    spread = np.asarray(fast, dtype=np.float64) - np.asarray(slow, dtype=np.float64)
+
+    prev = np.empty_like(spread)
+    prev[..., :1] = -1.0
+    prev[..., 1:] = spread[..., :-1]
+
+    signal = np.zeros(spread.shape, dtype=np.int8)
+    signal[(prev < 0) & (spread > 0)] = BUY
+    signal[(prev > 0) & (spread < 0)] = SELL
+    return signal
+
+
+def fill_orders(open_: np.ndarray, signal: np.ndarray, cash: float, dates: np.ndarray = None,
+                cooldown=None, close_out: bool = True):
+    """
+    Turns signals into fills with Investor's rules: all-in buys of cash // price - 1 shares,
+    no buying while holding, no selling while flat.
+
+    Args:
+        - open_: np.ndarray -> fill prices
+        - signal: np.ndarray -> from crossover_signals()
+        - cash: float -> starting bank roll
+        - dates: np.ndarray -> datetime64 per row, only needed with cooldown
+        - cooldown: np.timedelta64 -> skip signals this close to the last acted one (intraday data)
+        - close_out: bool -> sell on the last row if still holding
+
+    Return:
+        (np.ndarray FILL_DTYPE, float): fills and the final cash
+    """
+    events = np.flatnonzero(signal)
+    fills = np.empty(len(events) + 1, dtype=FILL_DTYPE)
+    n_fills = 0
+
+    shares = 0.0
+    last = None
+
+    for i in events:
+        if cooldown is not None:
+            if last is not None and dates[i] - last < cooldown:
+                continue
+            last = dates[i]
+
+        price = open_[i]
+        if signal[i] == BUY:
+            size = cash // price - 1
+            if shares > 0 or size <= 0:
+                continue
+            cash -= size * price
+            shares = size
+            fills[n_fills] = (i, BUY, price, size, size * price)
+        else:
+            if shares <= 0:
+                continue
+            cash += shares * price
+            fills[n_fills] = (i, SELL, price, shares, shares * price)
+            shares = 0.0
+        n_fills += 1
+
+    if close_out and shares > 0:
+        i = len(open_) - 1
+        price = open_[i]
+        cash += shares * price
+        fills[n_fills] = (i, SELL, price, shares, shares * price)
+        n_fills += 1
+
+    return fills[:n_fills], cash
+
+
+def equity_curve(open_: np.ndarray, fills: np.ndarray, cash: float) -> np.ndarray:
+    """
+    Cash + shares * open for every row, marked at the open like the fills.
+
+    Args:
+        - open_: np.ndarray
+        - fills: np.ndarray FILL_DTYPE -> from fill_orders()
+        - cash: float -> starting bank roll
+    """
+    if len(fills) == 0:
+        return np.full(len(open_), float(cash))
+
+    # Cash and shares held after each fill
+    flow = np.where(fills["side"] == BUY, -fills["total"], fills["total"])
+    cash_after = cash + np.cumsum(flow)
+    shares_after = np.where(fills["side"] == BUY, fills["shares"], 0.0)
+
+    # Which fill each row is after (-1 = before the first one)
+    k = np.searchsorted(fills["idx"], np.arange(len(open_)), side="right") - 1
+    held = np.where(k >= 0, shares_after[np.maximum(k, 0)], 0.0)
+    free = np.where(k >= 0, cash_after[np.maximum(k, 0)], float(cash))
+    return free + held * open_
+
+
+def sma_backtest(open_: np.ndarray, fast: np.ndarray, slow: np.ndarray, cash: float, **kwargs):
+    """
+    crossover_signals() followed by fill_orders(), see those for kwargs.
+
+    Return:
+        (np.ndarray FILL_DTYPE, float): fills and the final cash
+    """
+    return fill_orders(np.asarray(open_, dtype=np.float64), crossover_signals(fast, slow), cash, **kwargs)
+
+
+def calc_cagrs(days, start_balance, end_balance, trading_days_per_year: int = 252):
+    """
+    functions.calc_cagr() over arrays, NaN where it can't be computed.
+    """
+    days = np.asarray(days, dtype=np.float64)
+    end_balance = np.asarray(end_balance, dtype=np.float64)
+    ok = (days > 0) & (start_balance > 0) & (end_balance > 0)
+
+    out = np.full(days.shape, np.nan)
+    out[ok] = ((end_balance[ok] / start_balance) ** (trading_days_per_year / days[ok]) - 1) * 100
+    return out
+
+
+def next_after(positions: np.ndarray, after: np.ndarray) -> np.ndarray:
+    """
+    First entry of the sorted positions strictly after each value, a huge sentinel if there is none.
+    """
+    padded = np.append(positions, np.iinfo(np.int64).max // 2)
+    return padded[np.searchsorted(positions, after, side="right")]
+
+
+def walk_fills(open_: np.ndarray, offsets: np.ndarray, cand: np.ndarray, ends: np.ndarray,
+               buy_pos: np.ndarray, sell_pos: np.ndarray, cash: float):
+    """
+    fill_orders() for many independent lanes (windows, SMA pairs, ...) at once.
+
+    Each lane reads rows of open_ and finds its events in the sorted buy_pos / sell_pos arrays
+    at offsets[lane] + row. From the current row a lane jumps straight to the next sell while
+    holding, or the next buy while flat, which is exactly what fill_orders() ends up doing, so the
+    loop runs once per fill and each pass is vectorized across lanes.
+
+    Args:
+        - open_: np.ndarray -> fill prices by row
+        - offsets: np.ndarray -> per lane offset of its rows inside buy_pos / sell_pos
+        - cand: np.ndarray -> first buy row per lane
+        - ends: np.ndarray -> per lane end row (exclusive), open positions are sold on ends - 1
+        - buy_pos, sell_pos: np.ndarray -> sorted event positions
+        - cash: float -> starting bank roll
+
+    Return:
+        (np.ndarray, np.ndarray): final cash and number of trades per lane
+    """
+    cand = np.array(cand, dtype=np.int64)
+    n_lanes = len(cand)
+    cash = np.full(n_lanes, float(cash))
+    shares = np.zeros(n_lanes)
+    holding = np.zeros(n_lanes, dtype=bool)
+    trades = np.zeros(n_lanes, dtype=np.int64)
+
+    while True:
+        live = np.flatnonzero(cand < ends)
+        if len(live) == 0:
+            break
+
+        rows = cand[live]
+        price = open_[rows]
+        buying = ~holding[live]
+
+        b, pb = live[buying], price[buying]
+        size = cash[b] // pb - 1
+        ok = size > 0
+        b, pb, size = b[ok], pb[ok], size[ok]
+        cash[b] -= size * pb
+        shares[b] = size
+        holding[b] = True
+        trades[b] += 1
+
+        s, ps = live[~buying], price[~buying]
+        cash[s] += shares[s] * ps
+        shares[s] = 0.0
+        holding[s] = False
+        trades[s] += 1
+
+        at = offsets[live] + rows
+        cand[live] = np.where(holding[live], next_after(sell_pos, at), next_after(buy_pos, at)) - offsets[live]
+
+    # Close out anything still open on the last row
+    cash[holding] += shares[holding] * open_[ends[holding] - 1]
+    trades[holding] += 1
+    return cash, trades
+
+
+def batch_backtest(open_: np.ndarray, fast: np.ndarray, slow: np.ndarray, dates: np.ndarray,
+                   starts: np.ndarray, ends: np.ndarray, cash: float = 10_000.0,
+                   cooldown=np.timedelta64(1, "D")) -> dict:
+    """
+    Buy & Hold and SMA back tests of many windows of one ticker at once.
+
+    Windows are iloc style [start, end) on the full history, like Investor uses. Trades and cash
+    match running Investor on each window separately; CAGR can differ in the last bit because
+    NumPy's vectorized pow is used.
+
+    Crossover events are found once for the whole history; a window only differs on its first
+    row, where the previous spread counts as -1. Each window then jumps straight to the next
+    event of the opposite side (next sell while holding, next buy while flat), so the work per
+    window is O(fills) and every step is vectorized across windows.
+
+    The jump skips nothing Investor acts on as long as no two crossover events are closer than
+    the cooldown, which holds on daily bars. Windows where two events are closer (intraday bars)
+    are run through fill_orders() one by one instead.
+
+    Args:
+        - open_, fast, slow: np.ndarray -> full history of open prices and the two SMAs
+        - dates: np.ndarray -> datetime64 per row
+        - starts, ends: np.ndarray -> window bounds
+        - cash: float -> starting bank roll
+        - cooldown: np.timedelta64 -> same as Investor.run_sma_sim, None to turn it off
+
+    Return:
+        dict of np.ndarray: bh_cagr, bh_num_trades, sma_cagr, sma_num_trades, len
+    """
+    open_ = np.asarray(open_, dtype=np.float64)
+    fast = np.asarray(fast, dtype=np.float64)
+    slow = np.asarray(slow, dtype=np.float64)
+    starts = np.asarray(starts, dtype=np.int64)
+    ends = np.asarray(ends, dtype=np.int64)
+    last = ends - 1
+    dates = np.asarray(dates)
+    days = (dates[last] - dates[starts]).astype("timedelta64[D]").astype(np.int64)
+
+    # Buy & Hold: all in on the first open, out on the last
+    first = open_[starts]
+    size = cash // first - 1
+    bought = size > 0
+    bh_cash = np.where(bought, (cash - size * first) + size * open_[last], cash)
+    bh_trades = np.where(bought, 2, 0)
+
+    # SMA crossover
+    signal = crossover_signals(fast, slow)
+    buy_rows = np.flatnonzero(signal == BUY)
+    sell_rows = np.flatnonzero(signal == SELL)
+
+    spread_start = fast[starts] - slow[starts]
+    cand = np.where(spread_start > 0, starts, next_after(buy_rows, starts))
+
+    sma_cash, sma_trades = walk_fills(open_, np.zeros_like(starts), cand, ends, buy_rows, sell_rows, cash)
+
+    if cooldown is not None:
+        # Windows holding two events closer than the cooldown, counting the day one buy a window opens with
+        events = np.flatnonzero(signal)
+        tight = events[:-1][np.diff(dates[events]) < cooldown]
+        per_window = np.searchsorted(tight, last) > np.searchsorted(tight, starts)
+
+        following = next_after(events, starts)
+        near = following < ends
+        near[near] = dates[following[near]] - dates[starts[near]] < cooldown
+        per_window |= (spread_start > 0) & near
+
+        for w in np.flatnonzero(per_window):
+            window = slice(starts[w], ends[w])
+            fills, sma_cash[w] = fill_orders(open_[window], crossover_signals(fast[window], slow[window]), cash,
+                                             dates=dates[window], cooldown=cooldown)
+            sma_trades[w] = len(fills)
+
+    return {
+        "bh_cagr": calc_cagrs(days, cash, bh_cash),
+        "bh_num_trades": bh_trades,
+        "sma_cagr": calc_cagrs(days, cash, sma_cash),
+        "sma_num_trades": sma_trades,
+        "len": ends - starts,
+    }
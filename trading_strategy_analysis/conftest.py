@@ -0,0 +1,33 @@
+import pytest
+
+import prefetch
+import price_store
+import runner
+from data_sources import SyntheticSource, set_source
+
+
+UNIVERSE = ["AAA", "BBB", "CCC", "DDD"]
+
+
+@pytest.fixture
+def synthetic(tmp_path, monkeypatch):
+    """
+    A SyntheticSource behind a price store in tmp_path, nothing touches the network or ~/.cache.
+    """
+    source = SyntheticSource(seed=0, start="2000-01-03", end="2012-12-31", max_listing_lag=500)
+    set_source(source)
+    monkeypatch.setattr(price_store, "STORE_DIR", str(tmp_path / "prices"))
+    monkeypatch.setattr(price_store, "OFFLINE", False)
+    prefetch.clear()
+    yield source
+    prefetch.clear()
+    set_source(None)
+
+
+@pytest.fixture
+def universe(synthetic, monkeypatch):
+    """
+    runner's epochs pick from UNIVERSE instead of the full tickers.py list.
+    """
+    monkeypatch.setattr(runner, "tickers", UNIVERSE)
+    return UNIVERSE
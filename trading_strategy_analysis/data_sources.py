@@ -0,0 +1,338 @@
+"""
+Docstring for data_sources
+
+This file includes the pluggable price sources price_store downloads through.
+
+A source is any object with:
+    - download(ticker, interval="1d", start=None) -> pd.DataFrame in the yf.download layout
+      ((Price, Ticker) column MultiIndex, Close / High / Low / Open / Volume, index "Date")
+    - download_many(tickers, interval="1d", start=None) -> the same layout for a batch in one request
+    - network: bool -> whether it needs the network (PRICE_STORE_OFFLINE blocks those)
+    - subdir: str -> folder under PRICE_STORE_DIR its bars are cached in, so sources never mix
+
+Sources:
+    - YahooSource: yfinance, the default
+    - SyntheticSource: GBM or 2 state regime switching OHLCV, no network. Every ticker has its own
+      streams (SeedSequence(seed, spawn_key=(crc32(ticker),))), so a ticker's history is the same
+      whichever tickers are generated with it, and extending the end date only appends bars
+    - HTTPSource: CSV bars from a price server, e.g. the local stand in serve() starts
+
+Settings (environment variables):
+    - PRICE_SOURCE: "yahoo" (default), "synthetic" or "http"
+    - PRICE_SOURCE_URL: base url for "http", e.g. http://127.0.0.1:8765
+    - PRICE_SYNTHETIC_MODEL: "gbm" (default) or "regime"
+    - PRICE_SYNTHETIC_SEED: int, default 0
+
+Functions:
+    - get_source()
+    - set_source()
+    - source_from_env()
+    - serve()
+    - to_long_csv()
+    - from_long_csv()
+    - SyntheticSource.generate()
+    - SyntheticSource.iter_generate()
+    - SyntheticSource.bars()
+
+"""
+
+import io
+import os
+import re
+import threading
+import time
+import urllib.parse
+import urllib.request
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+
+# Same column order yf.download uses
+PRICE_COLUMNS = ["Close", "High", "Low", "Open", "Volume"]
+
+_SOURCE = None
+
+
+class YahooSource:
+    network = True
+    subdir = ""
+
+    def download(self, ticker: str, interval: str = "1d", start=None) -> pd.DataFrame:
+        import yfinance as yf
+
+        if start is None:
+            return yf.download(ticker, interval=interval, period="max", progress=False)
+        return yf.download(ticker, interval=interval, start=start, progress=False)
+
+    def download_many(self, tickers: list, interval: str = "1d", start=None) -> pd.DataFrame:
+        import yfinance as yf
+
+        # threads=False, the prefetch pool already runs batches concurrently
+        if start is None:
+            return yf.download(list(tickers), interval=interval, period="max", progress=False, threads=False)
+        return yf.download(list(tickers), interval=interval, start=start, progress=False, threads=False)
+
+
+class SyntheticSource:
+    network = False
+
+    def __init__(self, model: str = "gbm", seed: int = 0, start: str = "1990-01-02", end=None,
+                 max_listing_lag: int = 5_000):
+        """
+        Args:
+            - model: str -> "gbm" or "regime"
+            - seed: int -> root of every ticker's streams
+            - start: str -> first business day any ticker can trade
+            - end: date like -> last business day, default today
+            - max_listing_lag: int -> tickers list up to this many business days after start (0 = all at start)
+        """
+        if model not in ("gbm", "regime"):
+            raise ValueError("Enter 'gbm' or 'regime' for model")
+
+        self.model = model
+        self.seed = seed
+        self.start = pd.Timestamp(start)
+        self.end = end
+        self.max_listing_lag = max_listing_lag
+        self.subdir = f"synthetic_{model}_{seed}"
+
+    def _dates(self) -> pd.DatetimeIndex:
+        end = pd.Timestamp.today().normalize() if self.end is None else pd.Timestamp(self.end)
+        return pd.bdate_range(self.start, end, name="Date")
+
+    def _streams(self, ticker: str):
+        # One child per component, so each is prefix stable when more days are drawn
+        root = np.random.SeedSequence(self.seed, spawn_key=(zlib.crc32(ticker.upper().encode()),))
+        return [np.random.default_rng(child) for child in root.spawn(6)]
+
+    def _columns(self, tickers: list, n_days: int):
+        """
+        Draws every ticker's parameters and shocks, shocks as (n_tickers, n_days) arrays (one row per ticker).
+        """
+        k = len(tickers)
+        S0, mu, sigma, listing = np.empty(k), np.empty(k), np.empty(k), np.empty(k, dtype=np.int64)
+        z, gap, hi, lo, vol, switch = (np.empty((k, n_days)) for _ in range(6))
+
+        for j, ticker in enumerate(tickers):
+            params, r_z, r_gap, r_range, r_vol, r_switch = self._streams(ticker)
+            S0[j] = np.exp(params.uniform(np.log(10), np.log(500)))
+            mu[j] = params.uniform(-0.0001, 0.0006)
+            sigma[j] = params.uniform(0.01, 0.035)
+            listing[j] = params.integers(0, self.max_listing_lag + 1) if self.max_listing_lag else 0
+
+            r_z.standard_normal(out=z[j])
+            r_gap.standard_normal(out=gap[j])
+            hi[j], lo[j] = np.abs(r_range.standard_normal((n_days, 2))).T
+            r_vol.standard_normal(out=vol[j])
+            r_switch.random(out=switch[j])
+
+        return S0[:, None], mu[:, None], sigma[:, None], listing, z, gap, hi, lo, vol, switch
+
+    def _regimes(self, switch: np.ndarray) -> np.ndarray:
+        # 0 = calm, 1 = stressed; a calm spell lasts ~200 days, a stressed one ~40
+        leave = np.array([1 / 200, 1 / 40])
+        state = np.zeros(switch.shape, dtype=np.int8)
+        for t in range(1, switch.shape[1]):
+            prev = state[:, t - 1]
+            state[:, t] = np.where(switch[:, t] < leave[prev], 1 - prev, prev)
+        return state
+
+    def bars(self, tickers: list) -> dict:
+        """
+        Vectorized across tickers: every price array is (n_days, len(tickers)), NaN before a ticker lists.
+
+        Return:
+            dict: "dates" plus one array per PRICE_COLUMNS name
+        """
+        dates = self._dates()
+        n = len(dates)
+        S0, mu, sigma, listing, z, gap, hi, lo, vol, switch = self._columns(list(tickers), n)
+
+        if self.model == "regime":
+            stressed = self._regimes(switch).astype(bool)
+            mu = np.where(stressed, -2 * np.abs(mu) - 0.0005, mu)
+            sigma = np.where(stressed, 2.0 * sigma, sigma)
+
+        # Built ticker major, so every ticker's history is contiguous
+        log_r = (mu - 0.5 * sigma**2) + sigma * z
+        close = S0 * np.exp(np.cumsum(log_r, axis=1))
+
+        prev_close = np.hstack([S0, close[:, :-1]])
+        open_ = prev_close * np.exp(0.25 * sigma * gap)
+        high = np.maximum(open_, close) * np.exp(0.5 * sigma * hi)
+        low = np.minimum(open_, close) * np.exp(-0.5 * sigma * lo)
+        volume = np.round(np.exp(13.5 + 0.4 * vol) * (1 + 25 * np.abs(log_r)))
+
+        out = {"dates": dates, "Close": close, "High": high, "Low": low, "Open": open_, "Volume": volume}
+        before = np.arange(n)[None, :] < listing[:, None]
+        for name in PRICE_COLUMNS:
+            out[name][before] = np.nan
+            out[name] = out[name].T
+        return out
+
+    def generate(self, tickers: list, start=None) -> pd.DataFrame:
+        """
+        One yf.download style frame for many tickers, rows from start on.
+        """
+        tickers = [t.upper() for t in tickers]
+        bars = self.bars(tickers)
+        columns = pd.MultiIndex.from_product([PRICE_COLUMNS, tickers], names=["Price", "Ticker"])
+        values = np.concatenate([bars[name] for name in PRICE_COLUMNS], axis=1)
+
+        data = pd.DataFrame(values, index=bars["dates"], columns=columns)
+        if start is not None:
+            data = data.loc[data.index >= pd.Timestamp(start)]
+        return data
+
+    def iter_generate(self, tickers: list, block: int = 256, start=None):
+        """
+        generate() block tickers at a time, for universes too big for one frame (10k tickers x 30 years).
+        """
+        for lo in range(0, len(tickers), block):
+            yield self.generate(tickers[lo:lo + block], start=start)
+
+    def download(self, ticker: str, interval: str = "1d", start=None) -> pd.DataFrame:
+        if interval != "1d":
+            raise ValueError(f"SyntheticSource only generates daily bars, not '{interval}'")
+        return self.generate([ticker], start=start).dropna()
+
+    def download_many(self, tickers: list, interval: str = "1d", start=None) -> pd.DataFrame:
+        if interval != "1d":
+            raise ValueError(f"SyntheticSource only generates daily bars, not '{interval}'")
+        return self.generate(tickers, start=start).dropna(how="all")
+
+
+class HTTPSource:
+    network = True
+
+    def __init__(self, url: str, timeout: float = 30.0):
+        """
+        Args:
+            - url: str -> server root, GET {url}/prices?tickers=A,B&interval=1d[&start=YYYY-MM-DD]
+              answers long CSV: Date,Ticker,Close,High,Low,Open,Volume
+            - timeout: float -> seconds per request
+        """
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+        self.subdir = "http_" + re.sub(r"[^A-Za-z0-9\-\.]", "_", urllib.parse.urlsplit(self.url).netloc)
+
+    def download_many(self, tickers: list, interval: str = "1d", start=None) -> pd.DataFrame:
+        query = {"tickers": ",".join(tickers), "interval": interval}
+        if start is not None:
+            query["start"] = str(start)
+
+        with urllib.request.urlopen(f"{self.url}/prices?{urllib.parse.urlencode(query)}", timeout=self.timeout) as resp:
+            return from_long_csv(resp.read())
+
+    def download(self, ticker: str, interval: str = "1d", start=None) -> pd.DataFrame:
+        return self.download_many([ticker], interval=interval, start=start)
+
+
+def to_long_csv(data: pd.DataFrame) -> bytes:
+    """
+    A yf.download style frame as Date,Ticker,Close,High,Low,Open,Volume rows, the wire format of HTTPSource.
+    """
+    long = data.stack(level="Ticker", future_stack=True).dropna(how="all")
+    return long[PRICE_COLUMNS].reset_index().to_csv(index=False, date_format="%Y-%m-%d").encode()
+
+
+def from_long_csv(body: bytes) -> pd.DataFrame:
+    """
+    Inverse of to_long_csv(), back to the (Price, Ticker) column layout.
+    """
+    long = pd.read_csv(io.BytesIO(body), parse_dates=["Date"])
+    data = long.pivot(index="Date", columns="Ticker", values=PRICE_COLUMNS)
+    data.columns.names = ["Price", "Ticker"]
+    return data.sort_index()
+
+
+def serve(source=None, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0, fail_every: int = 0):
+    """
+    Starts a local stand in price server for HTTPSource on a daemon thread.
+
+    Args:
+        - source: default SyntheticSource()
+        - port: int -> 0 picks a free one
+        - latency: float -> seconds each request sleeps first, like a round trip
+        - fail_every: int -> k answers every k-th request with 503, 0 never
+
+    Return:
+        ThreadingHTTPServer: server.url is the base url, server.requests the count so far,
+        server.shutdown() stops it
+    """
+    source = SyntheticSource() if source is None else source
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            with lock:
+                server.requests += 1
+                n = server.requests
+            time.sleep(latency)
+
+            url = urllib.parse.urlsplit(self.path)
+            query = urllib.parse.parse_qs(url.query)
+            if url.path != "/prices" or "tickers" not in query:
+                return self.send_error(404)
+            if fail_every and n % fail_every == 0:
+                return self.send_error(503)
+
+            tickers = query["tickers"][0].split(",")
+            try:
+                data = source.download_many(tickers, interval=query.get("interval", ["1d"])[0],
+                                            start=query.get("start", [None])[0])
+            except ValueError as e:
+                return self.send_error(400, str(e))
+
+            body = to_long_csv(data)
+            self.send_response(200)
+            self.send_header("Content-Type", "text/csv")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    server.requests = 0
+    server.url = f"http://{host}:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def source_from_env():
+    """
+    The source PRICE_SOURCE (and PRICE_SYNTHETIC_* / PRICE_SOURCE_URL) ask for.
+    """
+    name = os.environ.get("PRICE_SOURCE", "yahoo")
+    if name == "yahoo":
+        return YahooSource()
+    if name == "synthetic":
+        return SyntheticSource(model=os.environ.get("PRICE_SYNTHETIC_MODEL", "gbm"),
+                               seed=int(os.environ.get("PRICE_SYNTHETIC_SEED", 0)))
+    if name == "http":
+        return HTTPSource(os.environ["PRICE_SOURCE_URL"])
+    raise ValueError(f"Unknown PRICE_SOURCE: {name}, enter 'yahoo', 'synthetic' or 'http'")
+
+
+def get_source():
+    """
+    The source price_store downloads through, from the environment unless set_source() was called.
+    """
+    global _SOURCE
+    if _SOURCE is None:
+        _SOURCE = source_from_env()
+    return _SOURCE
+
+
+def set_source(source):
+    """
+    Plugs in a source for this process (None goes back to the environment's).
+    """
+    global _SOURCE
+    _SOURCE = source
@@ -7,6 +7,7 @@ This file includes the functions that help run back testing
 Functions:
     - plot_buy_sell()
     - calc_cagr()
+    - sample_windows()
 
 """
 
@@ -14,10 +15,12 @@ Functions:
 
 import pandas as pd 
 import numpy as np 
-import yfinance as yf 
 import os
 import platform
 
+from price_store import load_prices
+from timing import stage
+
 def plot_buy_sell(ax, data, action: str, date: str, line: str = "Open"):
     """ 
     Plots either buy or sell indicators on any date, on any line.
@@ -85,11 +88,13 @@ def populate_data(ticker:str, interval: str="1d", period="max"):
         raise ValueError("No Ticker Passed")
     
     ticker = ticker.upper()
-    data = yf.download(ticker, interval=interval, period=period)
+    with stage("load"):
+        data = load_prices(ticker, interval=interval, period=period)
     
-    data["SMA_OPEN_50"] = data["Open"].rolling(window=50).mean()
-    data["SMA_OPEN_255"] = data["Open"].rolling(window=255).mean()
-    data = data.dropna()
+    with stage("sma"):
+        data["SMA_OPEN_50"] = data["Open"].rolling(window=50).mean()
+        data["SMA_OPEN_255"] = data["Open"].rolling(window=255).mean()
+        data = data.dropna()
 
     if len(data.index) < 550:
         print(ticker)
@@ -119,6 +124,20 @@ def sample_start_end_idx(n_rows: int, min_window: int = 200, rng=np.random.defau
     return start, end
 
 
+def sample_windows(n_rows: int, n: int, min_window: int = 200, rng=None):
+    """
+    Vectorized sample_start_end_idx(), returns (starts, ends) arrays of n windows
+    drawn from the same distribution.
+    """
+    if n_rows <= min_window:
+        raise ValueError(f"Not enough data points ({n_rows}) for min_window={min_window}")
+
+    rng = np.random.default_rng(rng)
+    starts = rng.integers(0, n_rows - min_window, size=n)
+    ends = rng.integers(starts + min_window, n_rows)
+    return starts, ends
+
+
 def clear_screen():
     # Check the operating system name
     if platform.system() == "Windows":
@@ -9,8 +9,12 @@ Attributes:
     - Cash - starting bank roll
     - Shares - used when buying / selling
     - Total - cash * shares
-    - Trades - meta data of each trade made
+    - Trades - TradeLedger of each trade made (see ledger.py)
     - ar_return - 
+    - Rng - np.random.Generator used to sample the back test window
+    - Plot - render a PNG after each sim, otherwise use plot_job() to render later
+    - Data - price frame; setting it pulls Open / SMA out once as contiguous float64 arrays,
+      so each sim works on zero copy slices of those by integer position
 
 Functions:
     place_order(investor: Investor, action: str, date: str, price: float, shares: float = 0.0)
@@ -22,39 +26,85 @@ Functions:
 
 """
 
-from functions import calc_cagr, plot_buy_sell, populate_data, sample_start_end_idx
+from functions import calc_cagr, populate_data, sample_start_end_idx
+from backtest import BUY, crossover_signals, fill_orders
+from ledger import TradeLedger
+from plots import render_plot
+from timing import stage
+
+import weakref
 
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt     
-
 
-"""
-trade = {
-    "type": "buy",          # "buy" or "sell"
-    "date": date,           # pd.Timestamp
-    "price": price,         # execution price 
-    "shares": shares,       # number of shares - not yet
-    "total": price * shares, - not yet
-}
-
-"""
 
 SMA_INDX = 0
 BH_INDX = 0
 
+# id(frame) -> (weakref to frame, extracted arrays), so every Investor on a cached frame shares one extraction
+_ARRAYS = {}
+
+
+def _column(data: pd.DataFrame, name: str, ticker: str) -> np.ndarray:
+    """
+    One price column as a contiguous float64 array, whether data has the yf.download
+    (Price, Ticker) columns or flat ones.
+    """
+    col = data[name]
+    if isinstance(col, pd.DataFrame):
+        col = col[ticker] if ticker in col.columns else col.iloc[:, 0]
+    return np.ascontiguousarray(col.to_numpy(dtype=np.float64))
+
+
+def _arrays(data: pd.DataFrame, ticker: str) -> dict:
+    """
+    Open, SMA and date arrays of a price frame, pulled out once per frame (frames are treated as read-only).
+    """
+    key = id(data)
+    entry = _ARRAYS.get(key)
+    if entry is not None and entry[0]() is data and entry[1]["ticker"] == ticker:
+        return entry[1]
+
+    arrays = {
+        "ticker": ticker,
+        "dates_ns": data.index.values,
+        "open": _column(data, "Open", ticker),
+        "sma_fast": _column(data, "SMA_OPEN_50", ticker) if "SMA_OPEN_50" in data.columns else None,
+        "sma_slow": _column(data, "SMA_OPEN_255", ticker) if "SMA_OPEN_255" in data.columns else None,
+    }
+    _ARRAYS[key] = (weakref.ref(data, lambda _, key=key: _ARRAYS.pop(key, None)), arrays)
+    return arrays
+
+
 class Investor:
-    def __init__(self, strategy, data,  ticker, cash=10_000):
+    def __init__(self, strategy, data,  ticker, cash=10_000, rng=None, plot=False):
         self.ticker = ticker
-        self.data = data
         self.strategy = strategy
+        self.data = data
         self.cash = float(cash)
         self.shares = 0.0
         self.position_open = False
-        self.trades = []
+        self.trades = TradeLedger()
         self.cagr = 0
         self.len = 0
         self.start_ammount = float(cash)
+        self.rng = np.random.default_rng(rng)
+        self.plot = plot
+        self.start = self.end = 0
+
+    @property
+    def data(self) -> pd.DataFrame:
+        return self._data
+
+    @data.setter
+    def data(self, data: pd.DataFrame):
+        arrays = _arrays(data, self.ticker)
+        self._data = data
+        self.dates = data.index
+        self._dates_ns = arrays["dates_ns"]
+        self._open = arrays["open"]
+        self._sma_fast = arrays["sma_fast"]
+        self._sma_slow = arrays["sma_slow"]
 
     def buy(self, date: str, price: float, shares: float):
         if self.position_open:          # can't buy twice
@@ -70,13 +120,7 @@ class Investor:
         self.shares = shares           
         self.position_open = True
 
-        self.trades.append({
-            "type": "buy", 
-            "date": date,
-            "price": price,
-            "shares": shares, 
-            "total": cost
-        })
+        self.trades.append("buy", date, price, shares, cost)
         return 1
 
 
@@ -89,13 +133,7 @@ class Investor:
         proceeds = self.shares * price
         self.cash += proceeds
 
-        self.trades.append({
-            "type": "sell", 
-            "date": date, 
-            "price": price,
-            "shares": self.shares, 
-            "total": proceeds
-        })
+        self.trades.append("sell", date, price, self.shares, proceeds)
 
         self.shares = 0.0
         self.position_open = False
@@ -114,114 +152,80 @@ class Investor:
             return 0 
     
     def run_bh_sim(self, title) -> float:
-        fig, ax = plt.subplots()
-        
-        stock = self.ticker
-        
-        
-        start, end = sample_start_end_idx(n_rows=len(self.data))
+        with stage("sample_window"):
+            start, end = sample_start_end_idx(n_rows=len(self._open), rng=self.rng)
+        self.start, self.end = start, end
         self.len = end - start 
 
-        df = self.data.iloc[start:end].copy()
-        
-        ax.plot(df.index, df["Open"], label="Open", color="black", alpha=0.5)
-        ax.plot(df.index, df["SMA_OPEN_50"], label="SMA_50_OPEN", color="r")
-        ax.plot(df.index, df["SMA_OPEN_255"], label="SMA_OPEN_255", color="b")
+        first, last = start, end - 1
+        with stage("orders"):
+            price = self._open[first]
+            self.place_order("buy",  self.dates[first], price=price, shares= (self.cash // price - 1))
 
-        date = df.index[0]
-        self.place_order("buy",  date, price=df.loc[date]["Open"][stock], shares= (self.cash // df.loc[date]["Open"][stock] - 1))
-        plot_buy_sell(ax, df, "buy", date)
-
-        date = df.index[-1]
-        self.place_order("sell",  date, price=df.loc[date]["Open"][stock])
-        plot_buy_sell(ax, df, "sell", date)
-        
-        if self.position_open:
-            print(f"Closing")
-            self.place_order("sell",  df.index[-1], price=df.loc[df.index[-1]]["Open"][stock])
-            plot_buy_sell(ax, df, "sell", date)
+            self.place_order("sell",  self.dates[last], price=self._open[last])
+            
+            if self.position_open:
+                print(f"Closing")
+                self.place_order("sell",  self.dates[last], price=self._open[last])
 
     
-        days = (df.index[-1] - df.index[0]).days  
-        cagr = calc_cagr(days=days, start_balance=self.start_ammount, end_balance=self.cash) 
+        days = (self.dates[last] - self.dates[first]).days  
+        with stage("cagr"):
+            cagr = calc_cagr(days=days, start_balance=self.start_ammount, end_balance=self.cash) 
         
-        ax.set_title(f"Bh | {stock} stock \n Starting Bank Roll: {self.start_ammount:,.2f} | Final Bank Roll: {round(self.cash,2):,.2f} | Compounded Annualized Growth Rate: {cagr:,.2f}%")
-        ax.set_xlabel("Date")
-        ax.set_ylabel("Open Price ($)")
-
-        fig.set_size_inches([15,5])
-        fig.legend(loc="upper left")
-        
-        fig.savefig(f"bh_plots/{title}")
         self.cagr = cagr 
+        if self.plot:
+            render_plot(self.plot_job(title))
         return cagr 
 
     def run_sma_sim(self, title) -> float:
-            
-            fig, ax = plt.subplots()
-
-            stock = self.ticker
-
             cooldown_days = 1
 
-            start, end = sample_start_end_idx(n_rows=len(self.data))
+            with stage("sample_window"):
+                start, end = sample_start_end_idx(n_rows=len(self._open), rng=self.rng)
+            self.start, self.end = start, end
             self.len = end - start 
-            df = self.data.iloc[start:end].copy()
-
-
-            # Spread and sign
-            spread = df["SMA_OPEN_50"] - df["SMA_OPEN_255"]
-            sign = np.sign(spread)
-
-            # Cross happens when sign changes (ignore zeros by forward filling)
-            # Thanks CHAT for this holy 
-            sign = sign.replace(0, np.nan).ffill()
-            cross = sign.ne(sign.shift(1))  # True on crossover dates
-            cross_dates = df.index[cross.fillna(False)]
-
-            last_plotted_date = None
-
-            ax.plot(df.index, df["Open"], label="Open", color="black", alpha=0.5)
-            ax.plot(df.index, df["SMA_OPEN_50"], label="SMA_50_OPEN", color="r")
-            ax.plot(df.index, df["SMA_OPEN_255"], label="SMA_OPEN_255", color="b")
-
-
-            for date in cross_dates:
-                if last_plotted_date is None or (date - last_plotted_date).days >= cooldown_days:
-                    # Determine direction of cross:
-                    # if spread goes from negative -> positive => golden cross (buy)
-                    prev_spread = spread.loc[:date].iloc[-2] if spread.loc[:date].shape[0] >= 2 else -1
-                    curr_spread = spread.loc[date]
-
-                    if prev_spread < 0 and curr_spread > 0:
-                        if  self.place_order("buy",  date, price=df.loc[date]["Open"][stock], shares= (self.cash // df.loc[date]["Open"][stock] - 1)):
-                            plot_buy_sell(ax, df, "buy", date)
-                            last_plotted_date = date
 
-                    elif prev_spread > 0 and curr_spread < 0:
-                        if self.place_order("sell",  date, price=df.loc[date]["Open"][stock]):
-                            plot_buy_sell(ax, df, "sell", date)
-                            last_plotted_date = date
-
-            if self.position_open:
-                self.place_order("sell",  df.index[-1], price=df.loc[df.index[-1]]["Open"][stock])
-                plot_buy_sell(ax, df, "sell", df.index[-1])
-            
-            days = (df.index[-1] - df.index[0]).days 
-            cagr = calc_cagr(days=days, start_balance=self.start_ammount, end_balance=self.cash)
-            
-            ax.set_title(f"SMA | {stock} stock \n Starting Bank Roll: {self.start_ammount:,.2f} | Final Bank Roll: {round(self.cash,2):,.2f} | Compounded Annualized Growth Rate: {cagr:,.2f}%")
-            ax.set_xlabel("Date")
-            ax.set_ylabel("Open Price ($)")
-
-            fig.set_size_inches([15,5])
-            fig.legend(loc="upper left")
-            
-            fig.savefig(f"sma_plots/{title}")
+            # Views into the arrays pulled out when data was set, nothing is copied per window
+            open_ = self._open[start:end]
+            with stage("signals"):
+                signal = crossover_signals(self._sma_fast[start:end], self._sma_slow[start:end])
+
+            with stage("orders"):
+                fills, _ = fill_orders(open_, signal, cash=self.cash, dates=self._dates_ns[start:end],
+                                       cooldown=np.timedelta64(cooldown_days, "D"))
+
+                # Replay the kernel's fills so cash, shares and trades stay in sync
+                for fill in fills:
+                    date = self.dates[start + fill["idx"]]
+                    if fill["side"] == BUY:
+                        self.place_order("buy", date, price=fill["price"], shares=fill["shares"])
+                    else:
+                        self.place_order("sell", date, price=fill["price"])
             
+            days = (self.dates[end - 1] - self.dates[start]).days 
+            with stage("cagr"):
+                cagr = calc_cagr(days=days, start_balance=self.start_ammount, end_balance=self.cash)
             
             self.cagr = cagr 
+            if self.plot:
+                render_plot(self.plot_job(title))
             return cagr
+
+    def plot_job(self, title) -> dict:
+        """
+        Everything plots.render_plot() needs to draw the last sim, after the fact or in another process.
+        """
+        return {
+            "strategy": self.strategy,
+            "ticker": self.ticker,
+            "title": title,
+            "data": self.data.iloc[self.start:self.end],
+            "trades": self.trades.copy(),
+            "start_ammount": self.start_ammount,
+            "cash": self.cash,
+            "cagr": self.cagr,
+        }
     
 
     def run_sim(self, EPOCH):
@@ -0,0 +1,95 @@
+"""
+Docstring for ledger
+
+This file includes the TradeLedger Investor records its trades in.
+
+Trades live in one preallocated structured array (TRADE_DTYPE) that doubles when full,
+instead of a dict per trade. Indexing or iterating still gives the old trade dicts:
+
+trade = {
+    "type": "buy",          # "buy" or "sell"
+    "date": date,           # pd.Timestamp
+    "price": price,         # execution price
+    "shares": shares,       # number of shares
+    "total": price * shares,
+}
+
+Functions:
+    - TradeLedger.append()
+    - TradeLedger.to_frame()
+
+"""
+
+import numpy as np
+import pandas as pd
+
+from backtest import BUY, SELL
+
+
+TRADE_DTYPE = np.dtype([
+    ("date", "datetime64[ns]"),
+    ("side", "i1"),      # BUY or SELL
+    ("price", "f8"),
+    ("shares", "f8"),
+    ("total", "f8"),
+])
+
+SIDES = {"buy": BUY, "sell": SELL}
+NAMES = {BUY: "buy", SELL: "sell"}
+
+
+class TradeLedger:
+    def __init__(self, capacity: int = 8):
+        self._data = np.empty(capacity, dtype=TRADE_DTYPE)
+        self._n = 0
+
+    def append(self, side: str, date, price: float, shares: float, total: float):
+        if self._n == len(self._data):
+            grown = np.empty(max(1, 2 * len(self._data)), dtype=TRADE_DTYPE)
+            grown[:self._n] = self._data
+            self._data = grown
+
+        self._data[self._n] = (np.datetime64(pd.Timestamp(date), "ns"), SIDES[side], price, shares, total)
+        self._n += 1
+
+    @property
+    def array(self) -> np.ndarray:
+        """
+        The recorded trades as a TRADE_DTYPE view, no copy.
+        """
+        return self._data[:self._n]
+
+    def copy(self) -> "TradeLedger":
+        ledger = TradeLedger(max(1, self._n))
+        ledger._data[:self._n] = self.array
+        ledger._n = self._n
+        return ledger
+
+    def to_frame(self) -> pd.DataFrame:
+        trades = self.array
+        return pd.DataFrame({
+            "type": np.where(trades["side"] == BUY, "buy", "sell"),
+            "date": trades["date"],
+            "price": trades["price"],
+            "shares": trades["shares"],
+            "total": trades["total"],
+        })
+
+    def __len__(self) -> int:
+        return self._n
+
+    def __getitem__(self, i: int) -> dict:
+        trade = self.array[i]
+        return {
+            "type": NAMES[int(trade["side"])],
+            "date": pd.Timestamp(trade["date"]),
+            "price": float(trade["price"]),
+            "shares": float(trade["shares"]),
+            "total": float(trade["total"]),
+        }
+
+    def __iter__(self):
+        return (self[i] for i in range(self._n))
+
+    def __repr__(self) -> str:
+        return f"TradeLedger({self._n} trades)"
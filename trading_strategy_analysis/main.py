@@ -1,63 +1,45 @@
 """
 """
-from functions import calc_cagr, plot_buy_sell, populate_data, clear_screen
-from investor import Investor
-from tickers import tickers 
+from runner import run_epochs
+from resampling import compare_cagrs
+import timing
 import pandas as pd 
 
-import random
-import matplotlib.pyplot as plt  
-from scipy.stats import mannwhitneyu
-
-
-import os
-import platform
-
 import warnings
 warnings.simplefilter(action='ignore', category=FutureWarning)
 
 
 EPOCHS  = 200
 CASH = 10_000   
+SEED = None      # None draws a fresh seed, it is printed so the run can be replayed
+WORKERS = None   # None uses every core
+PLOT_EVERY = 0   # 0 = no per epoch plots, k = save bh/sma plots for every k-th epoch
+TIMING = True    # per stage timings, summarised at the end of the run
+PROFILE_EVERY = 0  # 0 = no profiles, k = cProfile every k-th epoch into profiles/
+RESAMPLES = 20_000 # bootstrap / permutation resamples for the median CAGR comparison
+STORE = None       # None = memory only, a folder (e.g. "results", needs pyarrow) checkpoints rows there and a rerun resumes it
+FLUSH_EVERY = 1000 # epochs per checkpoint
 
 
-BH = "Buy & Hold"
-SMA = "SMA"
-
-sma_num_trades = []
-sma_cagrs = []
-sma_len = []
-
-bh_num_trades = []
-bh_cagrs = []
-bh_len = []
-
 if __name__ == "__main__":
-    for i in (range(EPOCHS)):
-
-        # SMA Strategy
-        TICKER_SMA = random.choice(tickers)
-        DATA_SMA = populate_data(TICKER_SMA)
-
-        inv_sma = Investor(SMA, cash=CASH, ticker=TICKER_SMA, data=DATA_SMA)
-        inv_sma.run_sim(i) 
-
-        sma_num_trades.append(len(inv_sma.trades))
-        sma_cagrs.append(inv_sma.cagr)
-        sma_len.append(inv_sma.len)
-
-        # Buy & Hold Strategy
-        TICKER_BH = random.choice(tickers)
-        DATA_BH = populate_data(TICKER_BH)
-
-        inv_bh = Investor(BH, cash=CASH, ticker=TICKER_BH, data=DATA_BH)
-        inv_bh.run_sim(i)
-
-        bh_num_trades.append(len(inv_bh.trades))
-        bh_cagrs.append(inv_bh.cagr)
-        bh_len.append(inv_bh.len)
-
-        clear_screen()
+    # matplotlib / scipy load here, not at import, so spawned worker processes (which re-import
+    # this file as __mp_main__) never pay for them
+    import matplotlib.pyplot as plt
+    from scipy.stats import mannwhitneyu
+
+    results = run_epochs(EPOCHS, seed=SEED, n_workers=WORKERS, cash=CASH, plot_every=PLOT_EVERY,
+                         timing=TIMING, profile_every=PROFILE_EVERY, store=STORE, flush_every=FLUSH_EVERY)
+    print(f"Seed: {results['seed'].iloc[0]}")
+    if STORE:
+        print(f"{len(results)} epochs in {STORE}/ (a rerun resumes this run, delete the folder for a fresh one)")
+
+    sma_num_trades = results["sma_num_trades"].tolist()
+    sma_cagrs = results["sma_cagr"].tolist()
+    sma_len = results["sma_len"].tolist()
+
+    bh_num_trades = results["bh_num_trades"].tolist()
+    bh_cagrs = results["bh_cagr"].tolist()
+    bh_len = results["bh_len"].tolist()
         
 
     fig, ax = plt.subplots(1,1)
@@ -112,4 +94,12 @@ if __name__ == "__main__":
     if p_value < alpha:
         print("Result: Reject the null hypothesis (there is a significant difference between the distributions).")
     else:
-        print("Result: Fail to reject the null hypothesis (there is no sufficient evidence of a significant difference).")
\ No newline at end of file
+        print("Result: Fail to reject the null hypothesis (there is no sufficient evidence of a significant difference).")
+
+    # Median SMA - BH CAGR: 95% bootstrap CI and one sided permutation p-value, pooled and within ticker
+    print(f"\nMedian CAGR difference (SMA - BH), {RESAMPLES} resamples")
+    print(compare_cagrs(results, n_resamples=RESAMPLES, rng=results["seed"].iloc[0]).round(4).to_string())
+
+    if TIMING:
+        print("\nStage timings")
+        print(timing.summary().round(3).to_string())
\ No newline at end of file
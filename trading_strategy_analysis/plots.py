@@ -0,0 +1,85 @@
+"""
+Docstring for plots
+
+This file includes the rendering of Investor back test plots, kept out of the simulation
+so sweeps only pay for the figures they ask for.
+
+A plot job is a plain dict (see Investor.plot_job()) holding the window, the trades and
+the result, so it can be rendered later or shipped to another process. Figures are built
+with matplotlib.figure.Figure (Agg, never registered with pyplot), so nothing piles up
+in memory across epochs.
+
+Functions:
+    - render_plot()
+    - render_plots()
+
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+from functions import plot_buy_sell
+from timing import drain, enable, enabled, merge, reset, stage
+
+
+PLOT_DIRS = {"Buy & Hold": "bh_plots", "SMA": "sma_plots"}
+TITLES = {"Buy & Hold": "Bh", "SMA": "SMA"}
+
+
+def render_plot(job: dict) -> str:
+    """
+    Draws one back test and saves it as a PNG.
+
+    Args:
+        - job: dict -> from Investor.plot_job()
+
+    Return:
+        str: path of the saved file
+    """
+    from matplotlib.figure import Figure
+
+    with stage("plot"):
+        df = job["data"]
+        fig = Figure(figsize=(15, 5))
+        ax = fig.subplots()
+
+        ax.plot(df.index, df["Open"], label="Open", color="black", alpha=0.5)
+        ax.plot(df.index, df["SMA_OPEN_50"], label="SMA_50_OPEN", color="r")
+        ax.plot(df.index, df["SMA_OPEN_255"], label="SMA_OPEN_255", color="b")
+
+        for trade in job["trades"]:
+            plot_buy_sell(ax, df, trade["type"], trade["date"])
+
+        ax.set_title(f"{TITLES[job['strategy']]} | {job['ticker']} stock \n Starting Bank Roll: {job['start_ammount']:,.2f} | Final Bank Roll: {round(job['cash'],2):,.2f} | Compounded Annualized Growth Rate: {job['cagr']:,.2f}%")
+        ax.set_xlabel("Date")
+        ax.set_ylabel("Open Price ($)")
+        fig.legend(loc="upper left")
+
+    path = os.path.join(PLOT_DIRS[job["strategy"]], str(job["title"]))
+    with stage("png"):
+        fig.savefig(path)
+    fig.clear()
+    return path
+
+
+def render_plots(jobs: list, n_workers: int = 1) -> list:
+    """
+    Renders many plot jobs, on a separate process pool when n_workers > 1.
+    """
+    if n_workers <= 1 or len(jobs) <= 1:
+        return [render_plot(job) for job in jobs]
+
+    # reset() drops the samples a forked worker inherits, so each worker only hands back its own
+    with ProcessPoolExecutor(max_workers=n_workers, initializer=reset) as pool:
+        results = list(pool.map(_render_timed, jobs, repeat(enabled())))
+
+    for _, samples in results:
+        merge(samples)
+    return [path for path, _ in results]
+
+
+def _render_timed(job: dict, timed: bool):
+    # Worker side of render_plots(), hands its stage timings back to the parent
+    enable(timed)
+    return render_plot(job), drain()
@@ -0,0 +1,172 @@
+"""
+Docstring for portfolio
+
+This file includes the portfolio back test: the SMA and Buy & Hold rules run across a whole
+ticker universe at once instead of one random ticker per epoch.
+
+Prices sit in one aligned (dates x tickers) matrix, NaN before a ticker lists. A missing bar
+inside a ticker's history (the union of dates has rows it didn't trade) carries its last open
+forward, so returns and SMAs run across the gap. The bank roll is
+split into equal sleeves, one per ticker. A sleeve is all in on its ticker while the rule holds
+it and in cash otherwise, like Investor, but with fractional shares so the whole universe is a
+handful of matrix operations:
+
+    - SMAs: one rolling mean over the matrix (forward filled over gaps, see listed_span())
+    - signals: crossover_signals() rules, the row before a ticker's first valid spread counts as -1
+    - positions: last BUY / SELL forward filled down each column
+    - equity: cumprod of 1 + position * open to open return per sleeve, summed across sleeves
+
+Buy & Hold is the same sleeve machinery with the position on from a ticker's first open.
+
+Functions:
+    - load_universe()
+    - listed_span()
+    - positions_from_signals()
+    - sleeve_growth()
+    - portfolio_backtest()
+    - run_portfolio()
+
+"""
+
+import numpy as np
+import pandas as pd
+
+from backtest import BUY, SELL, calc_cagrs
+from price_store import load_prices
+from tickers import tickers as TICKERS
+
+
+def load_universe(tickers: list = TICKERS, field: str = "Open") -> pd.DataFrame:
+    """
+    One column of `field` per ticker on the union of their dates.
+
+    Tickers missing from the store (offline) or with no rows are left out.
+
+    Return:
+        pd.DataFrame: dates x tickers, NaN where a ticker has no bar
+    """
+    columns = {}
+    for ticker in tickers:
+        try:
+            data = load_prices(ticker)
+        except FileNotFoundError:
+            continue
+        if len(data):
+            columns[ticker] = data[field][ticker]
+
+    return pd.DataFrame(columns).sort_index()
+
+
+def listed_span(prices: np.ndarray) -> np.ndarray:
+    """
+    Each column forward filled between its first and last valid value, NaN outside that span.
+    """
+    n_rows = prices.shape[0]
+    rows = np.arange(n_rows)[:, None]
+    valid = np.isfinite(prices)
+
+    # Row of the last valid value at or before each row, and whether one still comes later
+    last = np.maximum.accumulate(np.where(valid, rows, -1), axis=0)
+    later = np.flip(np.logical_or.accumulate(np.flip(valid, axis=0), axis=0), axis=0)
+
+    filled = np.take_along_axis(prices, np.maximum(last, 0), axis=0)
+    return np.where((last >= 0) & later, filled, np.nan)
+
+
+def positions_from_signals(signal: np.ndarray) -> np.ndarray:
+    """
+    In / out of the market per row and column: the last BUY or SELL carried forward, out before the first.
+
+    A BUY while already in (or a SELL while out) changes nothing, same as Investor ignoring it.
+    """
+    n_rows = signal.shape[0]
+    rows = np.arange(n_rows)[:, None]
+
+    # Row of the last event at or before each row, -1 if none yet
+    last = np.maximum.accumulate(np.where(signal != 0, rows, -1), axis=0)
+    held = np.take_along_axis(signal, np.maximum(last, 0), axis=0) == BUY
+    return held & (last >= 0)
+
+
+def sleeve_growth(open_: np.ndarray, held: np.ndarray) -> np.ndarray:
+    """
+    Value of 1 unit put in each sleeve, marked at every open.
+
+    The position decided on row t earns the open to open return from t to t + 1, so fills
+    happen at the open of the signal row like Investor. Returns are taken against the last
+    valid open, a held sleeve keeps what it made across a missing bar.
+    """
+    open_ = listed_span(open_)
+    ret = np.zeros_like(open_)
+    ret[1:] = open_[1:] / open_[:-1] - 1
+    ret[~np.isfinite(ret)] = 0.0
+
+    step = np.ones_like(open_)
+    step[1:] += np.where(held[:-1], ret[1:], 0.0)
+    return np.cumprod(step, axis=0)
+
+
+def portfolio_backtest(prices: pd.DataFrame, fast: int = 50, slow: int = 255, cash: float = 10_000.0,
+                       start=None, end=None) -> dict:
+    """
+    SMA and Buy & Hold across every column of prices at once.
+
+    Args:
+        - prices: pd.DataFrame -> dates x tickers open prices, from load_universe()
+        - fast, slow: int -> SMA windows
+        - cash: float -> starting bank roll, split equally across the tickers
+        - start, end: date like -> window to trade in, default from the first full slow SMA to the last row.
+          SMAs are computed on the full history first, like populate_data()
+
+    Return:
+        dict: "equity" (DataFrame of daily SMA / Buy & Hold portfolio value), "sma_cagr", "bh_cagr",
+              "sma_num_trades" and "exposure" (Series per ticker / per day)
+    """
+    # On the listed span a missing bar doesn't blank the next `slow` rows of SMAs, which would hide
+    # any crossover in that stretch
+    listed = pd.DataFrame(listed_span(prices.to_numpy(dtype=np.float64)), index=prices.index, columns=prices.columns)
+    sma_fast = listed.rolling(fast).mean()
+    sma_slow = listed.rolling(slow).mean()
+
+    start = prices.index[slow - 1] if start is None else pd.Timestamp(start)
+    window = slice(start, end)
+    dates = prices.loc[window].index
+    open_ = prices.loc[window].to_numpy(dtype=np.float64)
+    spread = (sma_fast.loc[window] - sma_slow.loc[window]).to_numpy()
+
+    # Crossovers, with the row before each ticker's first valid spread counting as -1
+    prev = np.full_like(spread, -1.0)
+    prev[1:] = spread[:-1]
+    prev[np.isnan(prev)] = -1.0
+
+    signal = np.zeros(spread.shape, dtype=np.int8)
+    signal[(prev < 0) & (spread > 0)] = BUY
+    signal[(prev > 0) & (spread < 0)] = SELL
+
+    sma_held = positions_from_signals(signal)
+    # Held from the first open to the last, gaps included
+    bh_held = np.isfinite(listed_span(open_))
+
+    sleeve = cash / open_.shape[1]
+    sma_equity = sleeve * sleeve_growth(open_, sma_held).sum(axis=1)
+    bh_equity = sleeve * sleeve_growth(open_, bh_held).sum(axis=1)
+
+    # Every switch is a trade, plus the close out on the last row if still in
+    flips = np.diff(sma_held, axis=0, prepend=False).sum(axis=0) + sma_held[-1]
+
+    days = (dates[-1] - dates[0]).days
+    return {
+        "equity": pd.DataFrame({"SMA": sma_equity, "Buy & Hold": bh_equity}, index=dates),
+        "sma_cagr": float(calc_cagrs(days, cash, sma_equity[-1])),
+        "bh_cagr": float(calc_cagrs(days, cash, bh_equity[-1])),
+        "sma_num_trades": pd.Series(flips, index=prices.columns, name="sma_num_trades"),
+        "exposure": pd.Series(sma_held.mean(axis=1), index=dates, name="exposure"),
+    }
+
+
+def run_portfolio(tickers: list = TICKERS, fast: int = 50, slow: int = 255, cash: float = 10_000.0,
+                  start=None, end=None) -> dict:
+    """
+    load_universe() then portfolio_backtest(), see those for the args.
+    """
+    return portfolio_backtest(load_universe(tickers), fast=fast, slow=slow, cash=cash, start=start, end=end)
@@ -0,0 +1,149 @@
+"""
+Docstring for prefetch
+
+This file includes the bulk warm up of the ticker universe before the epoch loop.
+
+prefetch() checks the price store for every ticker and downloads only the missing / stale
+ones, batch_size tickers per request (source.download_many()), with the batches run on a
+bounded thread pool. A failed batch is retried with exponential backoff. With max_workers >=
+number of batches the warm up takes about as long as the slowest batch instead of the sum
+over tickers.
+
+warm() then loads every cached ticker through populate_data() (SMA columns included) into
+SMA_STORE, the in-memory store the epoch runner reads from. Worker processes forked after
+warm() share it.
+
+Functions:
+    - prefetch()
+    - warm()
+    - get()
+    - clear()
+
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+import price_store
+from data_sources import get_source
+from functions import populate_data
+from tickers import tickers as TICKERS
+
+
+# ticker -> populate_data() frame
+SMA_STORE = {}
+
+
+def _batches(items: list, size: int) -> list:
+    return [items[lo:lo + size] for lo in range(0, len(items), size)]
+
+
+def _with_retry(fn, retries: int, backoff: float):
+    """
+    fn(), retried up to retries more times, sleeping backoff * 2**attempt in between.
+    """
+    for attempt in range(retries + 1):
+        try:
+            return fn()
+        except Exception:
+            if attempt == retries:
+                raise
+            time.sleep(backoff * 2**attempt)
+
+
+def _fetch_batch(source, batch: list, cached: dict, interval: str, store_dir: str, retries: int, backoff: float) -> dict:
+    # Stale tickers are re-fetched from the earliest last bar in the batch, update_bars() splices each one
+    last = [pd.Timestamp(cached[t]["date"][-1]) for t in batch if cached[t] is not None]
+    start = min(last).strftime("%Y-%m-%d") if len(last) == len(batch) else None
+
+    try:
+        data = _with_retry(lambda: source.download_many(batch, interval=interval, start=start), retries, backoff)
+    except Exception:
+        return {ticker: "failed" for ticker in batch}
+
+    status = {}
+    fetched = set(data.columns.get_level_values("Ticker")) if len(data.columns) else set()
+    for ticker in batch:
+        if ticker not in fetched:
+            status[ticker] = "failed"
+            continue
+        new = price_store._frame_to_bars(data.xs(ticker, level="Ticker", axis=1))
+        if cached[ticker] is None and len(new) == 0:
+            status[ticker] = "failed"
+            continue
+        price_store.update_bars(ticker, cached[ticker], new, interval, store_dir)
+        status[ticker] = "fetched"
+    return status
+
+
+def prefetch(tickers: list = TICKERS, batch_size: int = 20, max_workers: int = 8, retries: int = 3,
+             backoff: float = 0.5, interval: str = "1d", max_age: float = None, offline: bool = None,
+             store_dir: str = None, source=None) -> dict:
+    """
+    Brings the price store up to date for tickers with batched, concurrent downloads.
+
+    Args:
+        - tickers: list -> default the whole universe in tickers.py
+        - batch_size: int -> tickers per request
+        - max_workers: int -> batches in flight at once
+        - retries: int -> extra attempts per batch
+        - backoff: float -> seconds before the first retry, doubled every retry
+        - max_age / offline / store_dir: same as price_store.load_prices()
+        - source: default data_sources.get_source()
+
+    Return:
+        dict: ticker -> "cached" (fresh already), "fetched", "failed" or "missing" (offline, not cached)
+    """
+    source = get_source() if source is None else source
+    offline = price_store.OFFLINE if offline is None else offline
+    offline = offline and source.network
+
+    status, cached, missing, stale = {}, {}, [], []
+    for ticker in dict.fromkeys(t.upper() for t in tickers):
+        state, bars = price_store.cache_state(ticker, interval, max_age, store_dir)
+        if state == "fresh" or (state == "stale" and offline):
+            status[ticker] = "cached"
+        elif offline:
+            status[ticker] = "missing"
+        else:
+            cached[ticker] = bars
+            (missing if bars is None else stale).append(ticker)
+
+    # Missing and stale tickers are batched apart, so a stale batch only asks for its new bars
+    batches = _batches(missing, batch_size) + _batches(stale, batch_size)
+    if batches:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(batches)))) as pool:
+            for result in pool.map(lambda b: _fetch_batch(source, b, cached, interval, store_dir, retries, backoff), batches):
+                status.update(result)
+
+    return status
+
+
+def warm(tickers: list = TICKERS, **kwargs) -> dict:
+    """
+    prefetch() then loads every ticker with data into SMA_STORE, kwargs go to prefetch().
+
+    Return:
+        dict: prefetch() status per ticker
+    """
+    status = prefetch(tickers, **kwargs)
+    for ticker in tickers:
+        if ticker not in SMA_STORE and status.get(ticker.upper()) in ("cached", "fetched"):
+            SMA_STORE[ticker] = populate_data(ticker)
+    return status
+
+
+def get(ticker: str) -> pd.DataFrame:
+    """
+    The ticker's frame from SMA_STORE, loaded (and kept) on a miss.
+    """
+    data = SMA_STORE.get(ticker)
+    if data is None:
+        data = SMA_STORE[ticker] = populate_data(ticker)
+    return data
+
+
+def clear():
+    SMA_STORE.clear()
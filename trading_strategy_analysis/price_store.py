@@ -0,0 +1,243 @@
+"""
+Docstring for price_store
+
+This file includes a local on-disk cache of OHLCV bars that sits in front of the price source
+(yfinance unless PRICE_SOURCE says otherwise, see data_sources), so repeated runs stop
+re-downloading the full history of the same ticker.
+
+Each (ticker, interval) pair is one .npy file holding a structured array of bars
+(see BAR_DTYPE), which is read back memory-mapped. When a file is older than the
+freshness limit only the missing trailing bars are downloaded and appended.
+
+Settings (environment variables):
+    - PRICE_STORE_DIR: folder for the .npy files (default ~/.cache/finance_ds_projects/prices)
+    - PRICE_STORE_MAX_AGE: hours before a cached file is refreshed (default 12)
+    - PRICE_STORE_OFFLINE: "1" to never touch the network, only read the cache
+      (sources without network, e.g. the synthetic one, still fill it)
+
+Functions:
+    - load_prices()
+    - read_bars()
+    - write_bars()
+    - write_frame()
+    - cache_state()
+    - update_bars()
+    - store_path()
+
+"""
+
+import os
+import re
+import time
+
+import numpy as np
+import pandas as pd
+
+from data_sources import PRICE_COLUMNS, get_source
+
+
+STORE_DIR = os.environ.get(
+    "PRICE_STORE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "finance_ds_projects", "prices"),
+)
+MAX_AGE_HOURS = float(os.environ.get("PRICE_STORE_MAX_AGE", 12))
+OFFLINE = os.environ.get("PRICE_STORE_OFFLINE", "0") == "1"
+
+BAR_DTYPE = np.dtype([
+    ("date", "datetime64[ns]"),
+    ("open", "f8"),
+    ("high", "f8"),
+    ("low", "f8"),
+    ("close", "f8"),
+    ("volume", "f8"),
+])
+
+
+def store_path(ticker: str, interval: str = "1d", store_dir: str = None) -> str:
+    """
+    Path of the cache file for one ticker / interval, e.g. ~/.cache/.../BRK-B_1d.npy
+    (in the source's subfolder, e.g. .../synthetic_gbm_0/BRK-B_1d.npy, for non yfinance sources)
+    """
+    safe = re.sub(r"[^A-Za-z0-9\-\.]", "_", ticker.upper())
+    return os.path.join(store_dir or STORE_DIR, get_source().subdir, f"{safe}_{interval}.npy")
+
+
+def read_bars(ticker: str, interval: str = "1d", store_dir: str = None):
+    """
+    Returns the cached bars as a read-only memory-mapped structured array, or None if nothing is cached.
+    """
+    path = store_path(ticker, interval, store_dir)
+    if not os.path.exists(path):
+        return None
+    return np.load(path, mmap_mode="r")
+
+
+def write_bars(ticker: str, bars: np.ndarray, interval: str = "1d", store_dir: str = None):
+    """
+    Atomically replaces the cache file for one ticker / interval with bars.
+    """
+    path = store_path(ticker, interval, store_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        np.save(f, np.ascontiguousarray(bars, dtype=BAR_DTYPE))
+    os.replace(tmp, path)
+
+
+def write_frame(data: pd.DataFrame, interval: str = "1d", store_dir: str = None) -> list:
+    """
+    Caches every ticker of a multi ticker yf.download style frame, e.g. a SyntheticSource.generate() block.
+
+    Return:
+        list: tickers written (all NaN columns are skipped)
+    """
+    written = []
+    for ticker in data.columns.get_level_values("Ticker").unique():
+        bars = _frame_to_bars(data.xs(ticker, level="Ticker", axis=1))
+        if len(bars):
+            write_bars(ticker, bars, interval, store_dir)
+            written.append(ticker)
+    return written
+
+
+def cache_state(ticker: str, interval: str = "1d", max_age: float = None, store_dir: str = None):
+    """
+    Whether a ticker's cache file needs a download.
+
+    Return:
+        (str, np.ndarray): "missing" / "stale" / "fresh" and the cached bars (None when missing)
+    """
+    max_age = MAX_AGE_HOURS if max_age is None else max_age
+    bars = read_bars(ticker, interval, store_dir)
+    if bars is None:
+        return "missing", None
+    if time.time() - os.path.getmtime(store_path(ticker, interval, store_dir)) > max_age * 3600:
+        return "stale", bars
+    return "fresh", bars
+
+
+def update_bars(ticker: str, bars: np.ndarray, new: np.ndarray, interval: str = "1d", store_dir: str = None) -> np.ndarray:
+    """
+    Writes the cached bars with new ones from a re-fetch spliced on the end (new wins where they overlap).
+
+    Return:
+        np.ndarray: the bars now cached
+    """
+    if bars is None or len(bars) == 0:
+        if len(new):
+            write_bars(ticker, new, interval, store_dir)
+        return new
+
+    if len(new):
+        keep = np.asarray(bars[bars["date"] < new["date"][0]])
+        bars = np.concatenate([keep, new])
+        write_bars(ticker, bars, interval, store_dir)
+    else:
+        # Nothing new, mark the file as fresh so we don't hit the network again
+        os.utime(store_path(ticker, interval, store_dir))
+    return bars
+
+
+def _download(ticker: str, interval: str, start=None) -> pd.DataFrame:
+    return get_source().download(ticker, interval=interval, start=start)
+
+
+def _frame_to_bars(data: pd.DataFrame) -> np.ndarray:
+    bars = np.empty(len(data), dtype=BAR_DTYPE)
+    if len(data) == 0:
+        return bars
+
+    index = pd.DatetimeIndex(data.index)
+    if index.tz is not None:
+        index = index.tz_convert(None)
+    bars["date"] = index.values.astype("datetime64[ns]")
+
+    for name in PRICE_COLUMNS:
+        col = data[name]
+        # yf.download returns a (Price, Ticker) MultiIndex so data["Open"] is a 1 column frame
+        if isinstance(col, pd.DataFrame):
+            col = col.iloc[:, 0]
+        bars[name.lower()] = col.to_numpy(dtype="f8")
+
+    return bars[~np.isnan(bars["close"])]
+
+
+def _bars_to_frame(ticker: str, bars: np.ndarray) -> pd.DataFrame:
+    columns = pd.MultiIndex.from_product([PRICE_COLUMNS, [ticker]], names=["Price", "Ticker"])
+    index = pd.DatetimeIndex(np.asarray(bars["date"]), name="Date")
+    values = np.column_stack([np.asarray(bars[name.lower()]) for name in PRICE_COLUMNS]) if len(bars) else np.empty((0, 5))
+    return pd.DataFrame(values, index=index, columns=columns)
+
+
+def _period_start(period: str, last_date: pd.Timestamp):
+    """
+    Converts a yfinance period string ("5y", "6mo", "ytd", ...) to a start date.
+    Anchored on the last cached bar rather than today so offline runs are reproducible.
+    """
+    if period in (None, "max"):
+        return None
+    if period == "ytd":
+        return pd.Timestamp(year=last_date.year, month=1, day=1)
+
+    match = re.fullmatch(r"(\d+)(d|wk|mo|y)", period)
+    if not match:
+        raise ValueError(f"Unknown period: {period}")
+
+    n, unit = int(match.group(1)), match.group(2)
+    offset = {
+        "d": pd.DateOffset(days=n),
+        "wk": pd.DateOffset(weeks=n),
+        "mo": pd.DateOffset(months=n),
+        "y": pd.DateOffset(years=n),
+    }[unit]
+    return last_date - offset
+
+
+def load_prices(ticker: str, interval: str = "1d", period: str = "max", max_age: float = None,
+                offline: bool = None, store_dir: str = None) -> pd.DataFrame:
+    """
+    Drop in replacement for yf.download(ticker, interval=interval, period=period).
+
+    Args:
+        - ticker: str -> "AAPL"
+        - interval: str -> "1d"
+        - period: str -> "max", "5y", "6mo", ... sliced from the cached history
+        - max_age: float -> hours before the cache is refreshed, default PRICE_STORE_MAX_AGE
+        - offline: bool -> never touch the network, default PRICE_STORE_OFFLINE
+        - store_dir: str -> default PRICE_STORE_DIR
+
+    Return:
+        pd.DataFrame: same (Price, Ticker) column MultiIndex as yf.download
+    """
+    if not ticker:
+        raise ValueError("No Ticker Passed")
+
+    ticker = ticker.upper()
+    offline = OFFLINE if offline is None else offline
+    # Offline only rules out sources that need the network
+    offline = offline and get_source().network
+
+    path = store_path(ticker, interval, store_dir)
+    state, bars = cache_state(ticker, interval, max_age, store_dir)
+
+    if state == "missing":
+        if offline:
+            raise FileNotFoundError(f"No cached data for {ticker} ({interval}) at {path} and offline mode is on")
+
+        bars = update_bars(ticker, None, _frame_to_bars(_download(ticker, interval)), interval, store_dir)
+
+    elif state == "stale" and not offline:
+        # Re-fetch from the last cached bar, it may have been a partial bar when stored
+        last_date = pd.Timestamp(bars["date"][-1])
+        new = _frame_to_bars(_download(ticker, interval, start=last_date.strftime("%Y-%m-%d")))
+        bars = update_bars(ticker, bars, new, interval, store_dir)
+
+    data = _bars_to_frame(ticker, bars)
+
+    if len(data):
+        start = _period_start(period, data.index[-1])
+        if start is not None:
+            data = data.loc[data.index >= start]
+
+    return data
@@ -0,0 +1,411 @@
+"""
+Docstring for resampling
+
+This file includes the bootstrap and permutation tests for the SMA vs Buy & Hold CAGR comparison.
+
+The statistic is median(sma) - median(bh). Stratified variants (strata = ticker per row) only
+resample / relabel within a ticker, so a result can't come from which tickers happened to be drawn
+for which strategy:
+
+    - bootstrap: every ticker keeps its row count in each group
+    - permutation: SMA / BH labels are shuffled among rows of the same ticker only
+
+A median only depends on where the middle order statistics land among the sorted values, so no
+resample is materialised. All resamples are drawn at once, chunked so the per chunk matrices stay
+under max_bytes:
+
+    - plain bootstrap: the k-th smallest of n uniform indices is floor(n * U_(k)) with
+      U_(k) ~ Beta(k, n + 1 - k), one draw per resample
+    - stratified bootstrap / permutations: every ticker's count of draws (or SMA labels) below a
+      window around the middle is one binomial (hypergeometric) draw, then the window, about
+      8 sqrt(n) sorted rows, is stepped through with the urn probabilities, vectorized across
+      resamples, recording the rows where the middle counts are crossed
+
+Either way the resampled medians have exactly the distribution of resampling the rows. The odd
+resample whose middle falls outside the window (> 8 sd out) is redrawn on an index matrix of
+the rows, keeping only draws whose middle falls outside the window too, so the tails are not
+thinned (see _bootstrap_matrix() / _permutation_matrix()). Those redraws cost about as much in
+expectation as running the matrix path for every resample, and are almost never needed.
+
+Functions:
+    - median_diff()
+    - bootstrap_median_diff()
+    - permutation_test()
+    - compare_cagrs()
+
+"""
+
+import numpy as np
+import pandas as pd
+
+
+MAX_BYTES = 2**27
+WINDOW_SDS = 8
+
+
+def _chunk_rows(n_cols: int, max_bytes: int) -> int:
+    return max(1, max_bytes // (8 * max(n_cols, 1)))
+
+
+def _clean(values, strata=None):
+    """
+    Drops NaN CAGRs (calc_cagr() returns NaN for a wiped out or 0 day window), with their strata.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    keep = ~np.isnan(values)
+    if strata is None:
+        return values[keep], None
+    return values[keep], np.asarray(strata)[keep]
+
+
+def _middle(n: int) -> np.ndarray:
+    """
+    1-based ranks whose values average to the median of n values.
+    """
+    k = (n + 1) // 2
+    return np.array([k, k] if n % 2 else [k, k + 1])
+
+
+def _window(n: int):
+    # The middle order statistics sit within sd <= sqrt(n) / 2 rows of n / 2, keep WINDOW_SDS of those either side
+    half = int(WINDOW_SDS * np.sqrt(n) / 2) + 16
+    return max(0, n // 2 - half), min(n, n // 2 + half)
+
+
+def _middle_positions(pos: np.ndarray, n: int):
+    """
+    Per row of pos the positions at the middle ranks of n values, partitioning pos in place (pos is a scratch matrix).
+    """
+    k = _middle(n) - 1
+    pos.partition(np.unique(k), axis=1)
+    return pos[:, k[0]], pos[:, k[1]]
+
+
+def _outside(low: np.ndarray, high: np.ndarray, window) -> np.ndarray:
+    """
+    Where the middle positions are not both inside window = (j0, j1), i.e. where a walk gives up.
+    """
+    j0, j1 = window
+    return (low < j0) | (high >= j1)
+
+
+def median_diff(a, b) -> float:
+    """
+    median(a) - median(b), NaNs dropped.
+    """
+    a, _ = _clean(a)
+    b, _ = _clean(b)
+    return float(np.median(a) - np.median(b))
+
+
+def _sorted_codes(values, strata):
+    """
+    values sorted, with their strata as 0..S-1 codes.
+    """
+    order = np.argsort(values, kind="stable")
+    _, codes = np.unique(strata, return_inverse=True)
+    return values[order], codes[order]
+
+
+def _order_stat_medians(values, n_resamples: int, rng) -> np.ndarray:
+    """
+    Plain bootstrap medians from the order statistics of the resampled indices.
+    """
+    values = np.sort(values)
+    n = len(values)
+    k = (n + 1) // 2
+
+    u = rng.beta(k, n + 1 - k, n_resamples)
+    low = np.minimum((u * n).astype(np.int64), n - 1)
+    if n % 2:
+        return values[low]
+
+    # Even n averages the k-th and (k + 1)-th: the next of n - k uniforms above U_(k)
+    u_next = u + (1 - u) * rng.beta(1, n - k, n_resamples)
+    high = np.minimum((u_next * n).astype(np.int64), n - 1)
+    return 0.5 * (values[low] + values[high])
+
+
+def _bootstrap_matrix(values, codes, n_resamples: int, rng, max_bytes: int, outside=None) -> np.ndarray:
+    """
+    Stratified bootstrap medians the direct way: one (resamples, n) index matrix per chunk.
+    values sorted, codes their strata. With outside = (j0, j1) only resamples whose middle rows
+    fall outside that window are kept, which is what _bootstrap_walk() hands over.
+    """
+    n = len(values)
+    order = np.argsort(codes, kind="stable")
+    sizes = np.bincount(codes)
+    starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+    start, size = starts[codes[order]], sizes[codes[order]]
+
+    out = np.empty(n_resamples)
+    done = 0
+    rows = _chunk_rows(n, max_bytes)
+    while done < n_resamples:
+        m = rows if outside is not None else min(rows, n_resamples - done)
+        # Row i draws from its own block: start + floor(u * size), order maps that back to a sorted position
+        pos = order[start + (rng.random((m, n)) * size).astype(np.int64)]
+        low, high = _middle_positions(pos, n)
+        if outside is not None:
+            keep = _outside(low, high, outside)
+            low, high = low[keep], high[keep]
+
+        take = min(len(low), n_resamples - done)
+        out[done:done + take] = 0.5 * (values[low[:take]] + values[high[:take]])
+        done += take
+    return out
+
+
+def _bootstrap_walk(values, codes, n_resamples: int, rng, max_bytes: int) -> np.ndarray:
+    """
+    Stratified bootstrap medians: values sorted, codes their strata, each stratum resampled to its own size.
+    """
+    n = len(values)
+    sizes = np.bincount(codes)
+    target = _middle(n)
+    j0, j1 = _window(n)
+    below = np.bincount(codes[:j0], minlength=len(sizes))
+
+    out = np.empty(n_resamples)
+    rows = _chunk_rows(max(len(sizes), j1 - j0), max_bytes)
+    for lo in range(0, n_resamples, rows):
+        m = min(rows, n_resamples - lo)
+
+        # Draws landing below the window, per stratum: Binomial(size, share of the stratum below j0)
+        # (strata x resamples, so a stratum's row is contiguous)
+        drawn = rng.binomial(sizes[:, None], (below / sizes)[:, None], size=(len(sizes), m))
+        total = drawn.sum(axis=0)
+        left = sizes[:, None] - drawn      # draws still to place per stratum
+        rest = sizes - below               # rows still to visit per stratum
+
+        pos = np.full((m, 2), -1)
+        for t in range(j0, j1):
+            s = codes[t]
+            d = left[s].copy() if rest[s] == 1 else rng.binomial(left[s], 1 / rest[s])
+            left[s] -= d
+            rest[s] -= 1
+            after = total + d
+            for q in (0, 1):
+                pos[(total < target[q]) & (after >= target[q]), q] = t
+            total = after
+
+        ok = (pos >= 0).all(axis=1)
+        chunk = out[lo:lo + m]
+        chunk[ok] = 0.5 * (values[pos[ok, 0]] + values[pos[ok, 1]])
+        if not ok.all():
+            chunk[~ok] = _bootstrap_matrix(values, codes, int((~ok).sum()), rng, max_bytes, (j0, j1))
+    return out
+
+
+def _bootstrap_medians(values, strata, n_resamples: int, rng, max_bytes: int) -> np.ndarray:
+    """
+    Medians of n_resamples bootstrap resamples of values, within strata when given.
+    """
+    if strata is None:
+        return _order_stat_medians(values, n_resamples, rng)
+    values, codes = _sorted_codes(values, strata)
+    return _bootstrap_walk(values, codes, n_resamples, rng, max_bytes)
+
+
+def _permutation_matrix(pooled, codes, n_a: int, n_resamples: int, rng, max_bytes: int, outside=None) -> np.ndarray:
+    """
+    Permuted median differences the direct way: one (resamples, n) shuffled matrix per chunk.
+    pooled / codes are in original order, the first n_a rows labelled a. With outside = (j0, j1)
+    only permutations where a middle row of either group falls outside that window are kept,
+    which is what _permutation_walk() hands over.
+    """
+    n = len(pooled)
+    sorted_order = np.argsort(pooled, kind="stable")
+    values = pooled[sorted_order]
+    rank = np.empty(n, dtype=np.int64)
+    rank[sorted_order] = np.arange(n)
+
+    order = np.argsort(codes, kind="stable")
+    rank, codes = rank[order], codes[order]
+    is_a = order < n_a
+    pos_a, pos_b = np.flatnonzero(is_a), np.flatnonzero(~is_a)
+
+    out = np.empty(n_resamples)
+    done = 0
+    rows = _chunk_rows(n, max_bytes)
+    while done < n_resamples:
+        m = rows if outside is not None else min(rows, n_resamples - done)
+        # Sorting code + U(0, 1) keys shuffles rows only inside their stratum's block
+        shuffled = rank[np.argsort(codes + rng.random((m, n)), axis=1)]
+        low_a, high_a = _middle_positions(shuffled[:, pos_a], n_a)
+        low_b, high_b = _middle_positions(shuffled[:, pos_b], n - n_a)
+        if outside is not None:
+            keep = _outside(low_a, high_a, outside) | _outside(low_b, high_b, outside)
+            low_a, high_a, low_b, high_b = low_a[keep], high_a[keep], low_b[keep], high_b[keep]
+
+        take = min(len(low_a), n_resamples - done)
+        out[done:done + take] = (0.5 * (values[low_a[:take]] + values[high_a[:take]])
+                                 - 0.5 * (values[low_b[:take]] + values[high_b[:take]]))
+        done += take
+    return out
+
+
+def _permutation_walk(pooled, codes, n_a: int, n_resamples: int, rng, max_bytes: int) -> np.ndarray:
+    """
+    Permuted median differences: labels drawn as an urn per stratum while walking the sorted pooled rows.
+    pooled / codes are in original order, the first n_a rows labelled a.
+    """
+    n = len(pooled)
+    order = np.argsort(pooled, kind="stable")
+    values, sorted_codes = pooled[order], codes[order]
+
+    sizes = np.bincount(codes)
+    labels_a = np.bincount(codes[:n_a], minlength=len(sizes))
+    target_a, target_b = _middle(n_a), _middle(n - n_a)
+    j0, j1 = _window(n)
+    below = np.bincount(sorted_codes[:j0], minlength=len(sizes))
+
+    out = np.empty(n_resamples)
+    rows = _chunk_rows(max(len(sizes), j1 - j0), max_bytes)
+    for lo in range(0, n_resamples, rows):
+        m = min(rows, n_resamples - lo)
+
+        # a labels landing below the window, per stratum: Hypergeometric(a labels, b labels, rows below j0)
+        # (strata x resamples, so a stratum's row is contiguous)
+        drawn = rng.hypergeometric(labels_a[:, None], (sizes - labels_a)[:, None], below[:, None], size=(len(sizes), m))
+        count_a = drawn.sum(axis=0)
+        left = labels_a[:, None] - drawn   # a labels still to place per stratum
+        rest = (sizes - below).astype(np.float64)
+        u = rng.random((j1 - j0, m))
+
+        pos_a = np.full((m, 2), -1)
+        pos_b = np.full((m, 2), -1)
+        for i, t in enumerate(range(j0, j1)):
+            s = sorted_codes[t]
+            take = u[i] < left[s] / rest[s]
+            left[s] -= take
+            rest[s] -= 1
+            count_a += take
+            count_b = t + 1 - count_a
+            for q in (0, 1):
+                pos_a[take & (count_a == target_a[q]), q] = t
+                pos_b[~take & (count_b == target_b[q]), q] = t
+
+        ok = (pos_a >= 0).all(axis=1) & (pos_b >= 0).all(axis=1)
+        chunk = out[lo:lo + m]
+        chunk[ok] = (0.5 * (values[pos_a[ok, 0]] + values[pos_a[ok, 1]])
+                     - 0.5 * (values[pos_b[ok, 0]] + values[pos_b[ok, 1]]))
+        if not ok.all():
+            chunk[~ok] = _permutation_matrix(pooled, codes, n_a, int((~ok).sum()), rng, max_bytes, (j0, j1))
+    return out
+
+
+def bootstrap_median_diff(a, b, n_resamples: int = 20_000, ci: float = 95, strata_a=None, strata_b=None,
+                          rng=None, max_bytes: int = MAX_BYTES) -> dict:
+    """
+    Percentile bootstrap CI for median(a) - median(b), the two groups resampled independently.
+
+    Args:
+        - a, b: array like -> CAGRs (%) per epoch, e.g. sma_cagr and bh_cagr
+        - n_resamples: int
+        - ci: float -> confidence level in %
+        - strata_a, strata_b: array like -> ticker per row, resample within ticker (stratified)
+        - rng: np.random.Generator or seed
+        - max_bytes: int -> cap on one chunk's working matrices
+
+    Return:
+        dict: estimate, ci_low, ci_high, se, n_resamples, distribution (np.ndarray of resampled differences)
+    """
+    rng = np.random.default_rng(rng)
+    a, strata_a = _clean(a, strata_a)
+    b, strata_b = _clean(b, strata_b)
+
+    diffs = (_bootstrap_medians(a, strata_a, n_resamples, rng, max_bytes)
+             - _bootstrap_medians(b, strata_b, n_resamples, rng, max_bytes))
+    tail = (100 - ci) / 2
+    low, high = np.percentile(diffs, [tail, 100 - tail])
+
+    return {
+        "estimate": float(np.median(a) - np.median(b)),
+        "ci_low": float(low),
+        "ci_high": float(high),
+        "se": float(diffs.std(ddof=1)),
+        "n_resamples": n_resamples,
+        "distribution": diffs,
+    }
+
+
+def permutation_test(a, b, n_resamples: int = 20_000, alternative: str = "greater", strata_a=None, strata_b=None,
+                     rng=None, max_bytes: int = MAX_BYTES) -> dict:
+    """
+    Permutation test of median(a) - median(b): the SMA / BH labels are shuffled over the pooled rows.
+
+    Args:
+        - a, b: array like -> CAGRs (%) per epoch
+        - n_resamples: int
+        - alternative: str -> "greater" (a better, like mannwhitneyu in main.py), "less" or "two-sided"
+        - strata_a, strata_b: array like -> ticker per row, only shuffle labels within a ticker (stratified)
+        - rng: np.random.Generator or seed
+        - max_bytes: int -> cap on one chunk's working matrices
+
+    Return:
+        dict: statistic, p_value, alternative, n_resamples, distribution (np.ndarray of permuted statistics)
+    """
+    if alternative not in ("greater", "less", "two-sided"):
+        raise ValueError("Enter 'greater', 'less' or 'two-sided' for alternative")
+
+    rng = np.random.default_rng(rng)
+    a, strata_a = _clean(a, strata_a)
+    b, strata_b = _clean(b, strata_b)
+
+    pooled = np.concatenate([a, b])
+    if strata_a is not None and strata_b is not None:
+        _, codes = np.unique(np.concatenate([strata_a, strata_b]), return_inverse=True)
+    else:
+        codes = np.zeros(len(pooled), dtype=np.int64)
+
+    observed = float(np.median(a) - np.median(b))
+    stats = _permutation_walk(pooled, codes, len(a), n_resamples, rng, max_bytes)
+
+    if alternative == "greater":
+        extreme = stats >= observed
+    elif alternative == "less":
+        extreme = stats <= observed
+    else:
+        extreme = np.abs(stats) >= abs(observed)
+
+    return {
+        "statistic": observed,
+        "p_value": float((1 + extreme.sum()) / (1 + n_resamples)),
+        "alternative": alternative,
+        "n_resamples": n_resamples,
+        "distribution": stats,
+    }
+
+
+def compare_cagrs(results: pd.DataFrame, n_resamples: int = 20_000, ci: float = 95, rng=None) -> pd.DataFrame:
+    """
+    Bootstrap CI and permutation p-value of the median CAGR difference, plain and stratified by ticker.
+
+    Args:
+        - results: pd.DataFrame -> runner.run_epochs() output
+        - n_resamples: int
+        - ci: float -> confidence level in %
+        - rng: np.random.Generator or seed
+
+    Return:
+        pd.DataFrame: one row per variant: median_diff, ci_low, ci_high, se, p_value
+    """
+    rng = np.random.default_rng(rng)
+    sma, bh = results["sma_cagr"].to_numpy(), results["bh_cagr"].to_numpy()
+
+    rows = {}
+    for name, strata in (("pooled", (None, None)), ("by ticker", (results["sma_ticker"], results["bh_ticker"]))):
+        boot = bootstrap_median_diff(sma, bh, n_resamples, ci, *strata, rng=rng)
+        perm = permutation_test(sma, bh, n_resamples, "greater", *strata, rng=rng)
+        rows[name] = {
+            "median_diff": boot["estimate"],
+            "ci_low": boot["ci_low"],
+            "ci_high": boot["ci_high"],
+            "se": boot["se"],
+            "p_value": perm["p_value"],
+        }
+
+    table = pd.DataFrame.from_dict(rows, orient="index")
+    table.index.name = "variant"
+    return table
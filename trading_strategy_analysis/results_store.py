@@ -0,0 +1,190 @@
+"""
+Docstring for results_store
+
+This file includes an append-only, checkpointed store for run_epochs() results, so a long run
+can be interrupted and resumed, and runs split over several machines merged afterwards.
+
+A store is a folder of Parquet part files plus _meta.json (the run's seed and cash). Every
+flush writes a new part (one row group, written to a .tmp file and renamed), so a crash never
+leaves a half written file behind and loses at most the epochs since the last flush. Each row
+keeps epoch, seed and the tickers, which is all run_epoch() needs to replay it.
+
+Resuming is reading the epoch column of every part and running only the epochs not there.
+Parts are named after the host and process writing them, so several processes (or machines on
+a shared folder) can append to one store, and merge() combines stores into one.
+
+pyarrow is imported on first use, a run without a store never loads it.
+
+Functions:
+    - ResultStore.init()
+    - ResultStore.append()
+    - ResultStore.epochs()
+    - ResultStore.read()
+    - merge()
+
+"""
+
+import glob
+import json
+import os
+import socket
+
+import pandas as pd
+
+
+META = "_meta.json"
+
+
+def _pq():
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("results_store needs pyarrow: pip install pyarrow") from e
+    return pq
+
+
+def _write_table(df: pd.DataFrame, path: str, row_group_size: int = None):
+    """
+    Writes df as one Parquet file through a .tmp file, so path is either complete or absent.
+    """
+    import pyarrow as pa
+
+    pq = _pq()
+    # Default seeds are 128 bit, too wide for any integer column
+    table = pa.Table.from_pandas(df.assign(seed=df["seed"].astype(str)), preserve_index=False)
+    pq.write_table(table, path + ".tmp", row_group_size=row_group_size)
+    os.replace(path + ".tmp", path)
+
+
+class ResultStore:
+    def __init__(self, path: str, prefix: str = None):
+        """
+        Args:
+            - path: str -> store folder, created on the first write
+            - prefix: str -> part file prefix, default <host>-<pid> so concurrent writers never collide
+        """
+        self.path = path
+        self.prefix = prefix or f"{socket.gethostname()}-{os.getpid()}"
+        self._seq = len(glob.glob(os.path.join(path, f"part-{self.prefix}-*.parquet")))
+
+    @property
+    def meta(self) -> dict:
+        """
+        The run settings stored with the results, {} for a new store.
+        """
+        path = os.path.join(self.path, META)
+        if not os.path.exists(path):
+            return {}
+        with open(path) as f:
+            return json.load(f)
+
+    def init(self, **meta) -> dict:
+        """
+        Records the run settings on a new store, or checks them against an existing one.
+        None values are filled from the store, e.g. init(seed=None) on a resume picks up the stored seed.
+
+        Return:
+            dict: the settings of the store
+        """
+        stored = self.meta
+        for key, value in meta.items():
+            if value is not None and key in stored and stored[key] != value:
+                raise ValueError(f"{self.path} holds a run with {key}={stored[key]}, not {value}")
+
+        merged = {**{k: v for k, v in meta.items() if v is not None}, **stored}
+        if merged != stored:
+            os.makedirs(self.path, exist_ok=True)
+            _write_json(os.path.join(self.path, META), merged)
+        return merged
+
+    def parts(self) -> list:
+        return sorted(glob.glob(os.path.join(self.path, "part-*.parquet")))
+
+    def append(self, rows: list) -> str:
+        """
+        Writes rows (run_epochs() row dicts) as one new part file.
+
+        Return:
+            str: path of the part, None if rows is empty
+        """
+        if not rows:
+            return None
+        os.makedirs(self.path, exist_ok=True)
+
+        path = os.path.join(self.path, f"part-{self.prefix}-{self._seq:06d}.parquet")
+        self._seq += 1
+
+        _write_table(pd.DataFrame(rows), path)
+        return path
+
+    def epochs(self) -> set:
+        """
+        Epochs already stored, read from the epoch column alone.
+        """
+        pq = _pq()
+        done = set()
+        for part in self.parts():
+            done.update(pq.read_table(part, columns=["epoch"]).column("epoch").to_pylist())
+        return done
+
+    def read(self, columns: list = None) -> pd.DataFrame:
+        """
+        Every stored row, one per (seed, epoch), sorted by epoch.
+
+        Return:
+            pd.DataFrame: same columns as run_epochs() returns
+        """
+        return _read_parts(self.parts(), columns)
+
+
+def _write_json(path: str, data: dict):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp, path)
+
+
+def _read_parts(parts: list, columns: list = None) -> pd.DataFrame:
+    if not parts:
+        return pd.DataFrame(columns=columns)
+
+    import pyarrow as pa
+
+    pq = _pq()
+    if columns is not None:
+        columns = list(dict.fromkeys(["epoch", "seed", *columns]))
+    df = pa.concat_tables([pq.read_table(part, columns=columns) for part in parts]).to_pandas()
+
+    # An epoch flushed by two writers (e.g. overlapping resumes) is the same replay, keep one
+    df = df.drop_duplicates(["seed", "epoch"]).sort_values("epoch").reset_index(drop=True)
+    df["seed"] = df["seed"].map(int).astype(object)
+    return df
+
+
+def merge(paths: list, out: str, row_group_size: int = 100_000) -> pd.DataFrame:
+    """
+    Combines stores of one run (e.g. one per machine, see run_epochs(shard=...)) into a new store
+    holding a single part file.
+
+    Args:
+        - paths: list -> store folders, all with the same seed and cash
+        - out: str -> folder of the merged store, must not hold parts yet
+        - row_group_size: int -> rows per Parquet row group in the merged part
+
+    Return:
+        pd.DataFrame: the merged rows
+    """
+    metas = [ResultStore(path).meta for path in paths]
+    if any(meta != metas[0] for meta in metas):
+        raise ValueError(f"Stores come from different runs: {metas}")
+
+    target = ResultStore(out, prefix="merged")
+    if target.parts():
+        raise ValueError(f"{out} already holds results")
+
+    df = _read_parts([part for path in paths for part in ResultStore(path).parts()])
+
+    os.makedirs(out, exist_ok=True)
+    _write_table(df, os.path.join(out, "part-merged-000000.parquet"), row_group_size)
+    target.init(**metas[0])
+    return df
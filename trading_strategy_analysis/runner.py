@@ -0,0 +1,205 @@
+"""
+Docstring for runner
+
+This file includes the epoch runner for the SMA vs Buy & Hold experiment.
+
+Each epoch picks one ticker per strategy, samples a back test window and records the
+result. Epochs are fanned out over a process pool and gathered into one DataFrame.
+
+Every epoch draws from its own stream, SeedSequence(seed, spawn_key=(epoch,)), so any
+single epoch can be replayed with run_epoch(epoch, seed) regardless of how the run
+was split across workers.
+
+Plots are off by default. plot_every=k renders every k-th epoch on a separate pool,
+and plot_epoch(epoch, seed) renders any epoch after the fact by replaying it.
+
+Before the loop the whole universe is warmed up (prefetch.warm(): concurrent batched downloads of
+missing / stale tickers, then every frame with its SMA columns in one in-memory store), so no
+epoch waits on the network. Forked workers share that store.
+
+store=path checkpoints the run: rows are flushed to a results_store.ResultStore every
+flush_every epochs, and rerunning with the same store skips the epochs already in it (the seed
+is read back from the store). shard=(i, n) runs only the epochs with epoch % n == i, so a run
+can be split over machines and the stores combined with results_store.merge().
+
+timing=True records per stage timings (see timing.py) in every worker and gathers them
+in this process, read them with timing.summary(). profile_every=k dumps a cProfile of
+every k-th epoch to profile_dir/epoch_<k>.prof.
+
+Functions:
+    - epoch_rng()
+    - run_epoch()
+    - plot_epoch()
+    - run_epochs()
+
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from itertools import repeat
+
+import numpy as np
+import pandas as pd
+
+import prefetch
+from investor import Investor
+from plots import render_plots
+from results_store import ResultStore
+from tickers import tickers
+from timing import drain, enable, merge, profiled, reset, stage
+
+
+BH = "Buy & Hold"
+SMA = "SMA"
+CASH = 10_000
+
+
+def epoch_rng(seed: int, epoch: int) -> np.random.Generator:
+    """
+    The generator epoch `epoch` of a run seeded with `seed` uses.
+    """
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(epoch,)))
+
+
+def _epoch(epoch: int, seed: int, cash: float, plot: bool, timed: bool = False, profile_path: str = None):
+    if timed:
+        enable()
+    rng = epoch_rng(seed, epoch)
+    row = {"epoch": epoch, "seed": seed}
+    jobs = []
+
+    with profiled(profile_path) if profile_path else nullcontext(), stage("epoch"):
+        for prefix, strategy in (("sma", SMA), ("bh", BH)):
+            ticker = tickers[rng.integers(len(tickers))]
+
+            inv = Investor(strategy, cash=cash, ticker=ticker, data=prefetch.get(ticker), rng=rng)
+            inv.run_sim(epoch)
+
+            row[f"{prefix}_ticker"] = ticker
+            row[f"{prefix}_cagr"] = inv.cagr
+            row[f"{prefix}_len"] = inv.len
+            row[f"{prefix}_num_trades"] = len(inv.trades)
+
+            if plot:
+                jobs.append(inv.plot_job(epoch))
+
+    return row, jobs, drain()
+
+
+def run_epoch(epoch: int, seed: int, cash: float = CASH) -> dict:
+    """
+    Runs one SMA and one Buy & Hold back test.
+
+    Return:
+        dict: epoch, seed and {sma,bh}_ticker / _cagr / _len / _num_trades
+    """
+    row, _, samples = _epoch(epoch, seed, cash, False)
+    merge(samples)
+    return row
+
+
+def plot_epoch(epoch: int, seed: int, cash: float = CASH) -> list:
+    """
+    Replays one epoch and renders its two plots after the fact.
+
+    Return:
+        list: paths of the saved PNGs
+    """
+    _, jobs, samples = _epoch(epoch, seed, cash, True)
+    merge(samples)
+    return render_plots(jobs)
+
+
+def _collect(results, store: ResultStore, flush_every: int):
+    """
+    Gathers _epoch() results as they come in, flushing rows to store every flush_every epochs.
+    """
+    rows, jobs, pending = [], [], []
+    for row, epoch_jobs, samples in results:
+        merge(samples)
+        rows.append(row)
+        jobs.extend(epoch_jobs)
+        pending.append(row)
+        if store is not None and len(pending) >= flush_every:
+            with stage("flush"):
+                store.append(pending)
+            pending = []
+
+    if store is not None and pending:
+        with stage("flush"):
+            store.append(pending)
+    return rows, jobs
+
+
+def run_epochs(n_epochs: int, seed: int = None, n_workers: int = None, cash: float = CASH,
+               plot_every: int = 0, plot_workers: int = None, timing: bool = False,
+               profile_every: int = 0, profile_dir: str = "profiles", warm_up: bool = True,
+               store: str = None, flush_every: int = 1000, shard: tuple = None) -> pd.DataFrame:
+    """
+    Runs n_epochs epochs across a process pool.
+
+    Args:
+        - n_epochs: int
+        - seed: int -> default a fresh one, stored in the "seed" column either way
+        - n_workers: int -> default os.cpu_count(), 1 runs in process
+        - cash: float -> starting bank roll for each Investor
+        - plot_every: int -> 0 no plots, k plots every k-th epoch
+        - plot_workers: int -> size of the separate pool the plots are rendered on, default min(4, os.cpu_count()),
+          1 renders in process (a single plot always does)
+        - timing: bool -> record per stage timings, see timing.summary()
+        - profile_every: int -> 0 no profiles, k dumps a cProfile of every k-th epoch
+        - profile_dir: str -> where the .prof files go
+        - warm_up: bool -> prefetch.warm() the universe first, otherwise tickers load lazily inside epochs
+        - store: str -> result store folder to checkpoint to and resume from, default keep rows in memory only
+        - flush_every: int -> epochs per flush to the store
+        - shard: tuple -> (i, n) only run the epochs with epoch % n == i
+
+    Return:
+        pd.DataFrame: one row per epoch, sorted by epoch (with a store, every epoch in it)
+    """
+    results_store = ResultStore(store) if store is not None else None
+    if seed is None and results_store is not None:
+        seed = results_store.meta.get("seed")
+    if seed is None:
+        seed = np.random.SeedSequence().entropy
+    if results_store is not None:
+        results_store.init(seed=seed, cash=cash)
+    n_workers = n_workers or os.cpu_count() or 1
+    plot_workers = plot_workers or min(4, os.cpu_count() or 1)
+
+    if timing:
+        enable()
+
+    if warm_up:
+        with stage("prefetch"):
+            prefetch.warm(tickers)
+
+    epochs = range(n_epochs) if shard is None else range(shard[0], n_epochs, shard[1])
+    if results_store is not None:
+        done = results_store.epochs()
+        epochs = [epoch for epoch in epochs if epoch not in done]
+
+    plot = [bool(plot_every) and epoch % plot_every == 0 for epoch in epochs]
+    profile = [os.path.join(profile_dir, f"epoch_{epoch}.prof") if profile_every and epoch % profile_every == 0 else None
+               for epoch in epochs]
+
+    if n_workers == 1:
+        results = map(_epoch, epochs, repeat(seed), repeat(cash), plot, repeat(timing), profile)
+        rows, jobs = _collect(results, results_store, flush_every)
+    else:
+        chunksize = max(1, len(epochs) // (n_workers * 4))
+        # Forked workers start with a copy of this process's samples (prefetch, load, ...), reset()
+        # clears them so drain() only hands back what the worker itself recorded
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=reset) as pool:
+            # pool.map yields in order as chunks finish, so rows are flushed while later epochs still run
+            results = pool.map(_epoch, epochs, repeat(seed), repeat(cash), plot, repeat(timing), profile,
+                               chunksize=chunksize)
+            rows, jobs = _collect(results, results_store, flush_every)
+
+    if jobs:
+        render_plots(jobs, n_workers=plot_workers)
+
+    if results_store is not None:
+        return results_store.read()
+    return pd.DataFrame(rows).sort_values("epoch").reset_index(drop=True)
@@ -0,0 +1,125 @@
+"""
+Docstring for signals
+
+This file includes the incremental SMA crossover engine for live (or replayed) bars.
+
+Each ticker keeps O(1) state: a ring buffer with a running sum per SMA window, the last
+spread and whether a position is open. One bar in, at most one event out, with the same
+rules as Investor.run_sma_sim on a window that starts on the first bar both SMAs exist:
+
+    - buy when fast - slow goes from < 0 to > 0 while flat
+    - sell when it goes from > 0 to < 0 while holding
+    - the spread before the first full bar counts as -1
+
+Replay files are CSVs with a Date,Ticker,Open header, one bar per row, sorted by date.
+
+Functions:
+    - RollingMean.update()
+    - CrossoverSignal.update()
+    - SignalBook.update()
+    - replay_csv()
+
+"""
+
+import csv
+import math
+
+from backtest import BUY, SELL
+
+
+class RollingMean:
+    __slots__ = ("window", "buf", "i", "n", "total")
+
+    def __init__(self, window: int):
+        self.window = window
+        self.buf = [0.0] * window
+        self.i = 0
+        self.n = 0
+        self.total = 0.0
+
+    def update(self, x: float):
+        """
+        Adds one value, returns the mean of the last `window` values or None until the window is full.
+        """
+        old = self.buf[self.i]
+        self.buf[self.i] = x
+        self.i += 1
+
+        if self.n < self.window:
+            self.n += 1
+            self.total += x
+        else:
+            self.total += x - old
+
+        if self.i == self.window:
+            self.i = 0
+            # Re-sum once per lap so floating point drift never builds up (amortised O(1))
+            self.total = math.fsum(self.buf)
+
+        return self.total / self.window if self.n == self.window else None
+
+
+class CrossoverSignal:
+    __slots__ = ("fast", "slow", "prev_spread", "holding")
+
+    def __init__(self, fast: int = 50, slow: int = 255):
+        self.fast = RollingMean(fast)
+        self.slow = RollingMean(slow)
+        self.prev_spread = -1.0
+        self.holding = False
+
+    def update(self, price: float) -> int:
+        """
+        Feeds one bar's open price.
+
+        Return:
+            int: BUY, SELL or 0
+        """
+        fast = self.fast.update(price)
+        slow = self.slow.update(price)
+        if fast is None or slow is None:
+            return 0
+
+        spread = fast - slow
+        prev = self.prev_spread
+        self.prev_spread = spread
+
+        if prev < 0 and spread > 0 and not self.holding:
+            self.holding = True
+            return BUY
+        if prev > 0 and spread < 0 and self.holding:
+            self.holding = False
+            return SELL
+        return 0
+
+
+class SignalBook:
+    def __init__(self, fast: int = 50, slow: int = 255):
+        self.fast = fast
+        self.slow = slow
+        self.signals = {}
+
+    def update(self, ticker: str, price: float) -> int:
+        """
+        Routes one bar to the ticker's CrossoverSignal, creating it on first sight.
+        """
+        signal = self.signals.get(ticker)
+        if signal is None:
+            signal = self.signals[ticker] = CrossoverSignal(self.fast, self.slow)
+        return signal.update(price)
+
+
+def replay_csv(path: str, fast: int = 50, slow: int = 255):
+    """
+    Replays a Date,Ticker,Open bar file through a SignalBook.
+
+    Yields:
+        (date, ticker, "buy" | "sell", price) for every event
+    """
+    book = SignalBook(fast, slow)
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            price = float(row["Open"])
+            side = book.update(row["Ticker"], price)
+            if side:
+                yield row["Date"], row["Ticker"], "buy" if side == BUY else "sell", price
@@ -0,0 +1,133 @@
+"""
+Docstring for sweep
+
+This file includes the SMA parameter sweep: back test a whole grid of (fast, slow) window
+pairs per ticker and return the CAGR surface.
+
+Every rolling mean of a ticker comes from one cumulative sum of its open prices, and all
+pairs are back tested together with backtest.walk_fills(), one lane per pair.
+
+Functions:
+    - rolling_means()
+    - sweep_surface()
+    - sweep_tickers()
+
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+import numpy as np
+import pandas as pd
+
+from backtest import BUY, SELL, calc_cagrs, crossover_signals, next_after, walk_fills
+from price_store import load_prices
+
+
+def rolling_means(open_: np.ndarray, windows) -> np.ndarray:
+    """
+    Rolling means of open_ for every window from a single cumulative sum.
+
+    Return:
+        np.ndarray: (len(windows), len(open_)), NaN until a window is full
+    """
+    open_ = np.asarray(open_, dtype=np.float64)
+    csum = np.concatenate([[0.0], np.cumsum(open_)])
+
+    out = np.full((len(windows), len(open_)), np.nan)
+    for i, w in enumerate(windows):
+        out[i, w - 1:] = (csum[w:] - csum[:-w]) / w
+    return out
+
+
+def sweep_surface(open_: np.ndarray, dates: np.ndarray, fast_windows, slow_windows,
+                  cash: float = 10_000.0, start: int = None, end: int = None) -> dict:
+    """
+    SMA back test of every (fast, slow) pair with fast < slow over the same rows.
+
+    By default the rows run from the first day the slowest SMA is defined to the end of the
+    history, so (50, 255) gives the same result as Investor on the whole populate_data() frame.
+
+    Args:
+        - open_: np.ndarray -> full history of open prices
+        - dates: np.ndarray -> datetime64 per row
+        - fast_windows, slow_windows: list of int
+        - cash: float -> starting bank roll
+        - start, end: int -> iloc style rows to evaluate, default see above
+
+    Return:
+        dict: "cagr" and "num_trades" as (len(fast_windows), len(slow_windows)) arrays, NaN / -1 where fast >= slow
+    """
+    open_ = np.asarray(open_, dtype=np.float64)
+    fast_windows = np.asarray(fast_windows, dtype=np.int64)
+    slow_windows = np.asarray(slow_windows, dtype=np.int64)
+
+    windows = np.union1d(fast_windows, slow_windows)
+    means = rolling_means(open_, windows)
+    row_of = {w: i for i, w in enumerate(windows)}
+
+    start = int(windows.max()) - 1 if start is None else start
+    end = len(open_) if end is None else end
+    seg = slice(start, end)
+    n_rows = end - start
+
+    # One signal row per valid pair, built one fast window at a time
+    pairs, signals = [], []
+    for i, f in enumerate(fast_windows):
+        js = np.flatnonzero(slow_windows > f)
+        if len(js) == 0:
+            continue
+        slow = means[[row_of[w] for w in slow_windows[js]], seg]
+        signals.append(crossover_signals(means[row_of[f], seg][None, :], slow))
+        pairs.extend((i, j) for j in js)
+
+    cagr = np.full((len(fast_windows), len(slow_windows)), np.nan)
+    trades = np.full(cagr.shape, -1, dtype=np.int64)
+    if not pairs:
+        return {"cagr": cagr, "num_trades": trades}
+
+    signals = np.concatenate(signals)
+    buy_pos = np.flatnonzero(signals == BUY)
+    sell_pos = np.flatnonzero(signals == SELL)
+
+    n_pairs = len(pairs)
+    offsets = np.arange(n_pairs, dtype=np.int64) * n_rows
+    cand = next_after(buy_pos, offsets - 1) - offsets
+
+    final_cash, num_trades = walk_fills(open_[seg], offsets, cand, np.full(n_pairs, n_rows), buy_pos, sell_pos, cash)
+
+    days = (np.asarray(dates)[end - 1] - np.asarray(dates)[start]).astype("timedelta64[D]").astype(np.int64)
+    i, j = np.array(pairs).T
+    cagr[i, j] = calc_cagrs(np.full(n_pairs, days), cash, final_cash)
+    trades[i, j] = num_trades
+    return {"cagr": cagr, "num_trades": trades}
+
+
+def _sweep_ticker(ticker: str, fast_windows, slow_windows, cash: float) -> pd.DataFrame:
+    data = load_prices(ticker)
+    if len(data) < max(slow_windows):
+        return None
+
+    result = sweep_surface(data["Open"][ticker].to_numpy(), data.index.values, fast_windows, slow_windows, cash=cash)
+    return pd.DataFrame(result["cagr"], index=pd.Index(fast_windows, name="fast"), columns=pd.Index(slow_windows, name="slow"))
+
+
+def sweep_tickers(tickers: list, fast_windows, slow_windows, cash: float = 10_000.0, n_workers: int = None) -> pd.DataFrame:
+    """
+    CAGR surface of every ticker, one ticker per task on a process pool.
+
+    Return:
+        pd.DataFrame: index (ticker, fast), columns slow. Tickers with too little history are skipped
+    """
+    n_workers = n_workers or os.cpu_count() or 1
+
+    args = (tickers, repeat(fast_windows), repeat(slow_windows), repeat(cash))
+    if n_workers == 1:
+        surfaces = list(map(_sweep_ticker, *args))
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            surfaces = list(pool.map(_sweep_ticker, *args))
+
+    found = {t: s for t, s in zip(tickers, surfaces) if s is not None}
+    return pd.concat(found, names=["ticker"])
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import investor
+from backtest import BUY, SELL, batch_backtest, crossover_signals
+from functions import populate_data, sample_windows
+from investor import Investor
+
+
+def _arrays(data: pd.DataFrame, ticker: str):
+    return [investor._column(data, name, ticker) for name in ("Open", "SMA_OPEN_50", "SMA_OPEN_255")]
+
+
+def _check(data: pd.DataFrame, ticker: str, starts, ends, monkeypatch):
+    """
+    batch_backtest() on all windows against one Investor per window and strategy.
+    """
+    open_, fast, slow = _arrays(data, ticker)
+    batch = batch_backtest(open_, fast, slow, data.index.values, starts, ends)
+
+    for w, (start, end) in enumerate(zip(starts, ends)):
+        monkeypatch.setattr(investor, "sample_start_end_idx", lambda n_rows, rng, window=(start, end): window)
+        for strategy, key in (("SMA", "sma"), ("Buy & Hold", "bh")):
+            inv = Investor(strategy, data, ticker)
+            inv.run_sim(w)
+
+            assert batch[f"{key}_num_trades"][w] == len(inv.trades), (strategy, start, end)
+            assert batch[f"{key}_cagr"][w] == pytest.approx(inv.cagr, rel=1e-12, abs=1e-12), (strategy, start, end)
+        assert batch["len"][w] == end - start
+    return batch
+
+
+def test_batch_matches_investor(synthetic, monkeypatch):
+    data = populate_data("AAA")
+    open_, fast, slow = _arrays(data, "AAA")
+    signal = crossover_signals(fast, slow)
+    buys, sells = np.flatnonzero(signal == BUY), np.flatnonzero(signal == SELL)
+    spread = fast - slow
+
+    starts, ends = sample_windows(len(data), 60, rng=0)
+
+    # Ends on the row before the first cross, so nothing trades
+    start = next(i for i in range(len(data)) if spread[i] < 0 and sells[sells > i].size and buys[buys > i].size)
+    edge = [(start, buys[buys > start][0])]
+
+    # Buys on a golden cross and ends before the next death cross, so the position is closed out
+    buy = buys[buys > 300][0]
+    edge.append((buy - 10, sells[sells > buy][0]))
+
+    # Opens above the slow SMA, buying on day one
+    above = np.flatnonzero(spread[:-300] > 0)[0]
+    edge.append((above, above + 250))
+
+    starts = np.concatenate([starts, [s for s, _ in edge]])
+    ends = np.concatenate([ends, [e for _, e in edge]])
+    batch = _check(data, "AAA", starts, ends, monkeypatch)
+
+    n = len(edge)
+    assert batch["sma_num_trades"][-n] == 0
+    assert batch["sma_num_trades"][-n + 1] % 2 == 0 and batch["sma_num_trades"][-n + 1] > 0
+    assert batch["sma_num_trades"][-n + 2] > 0
+
+
+def test_batch_cooldown_matches_investor(monkeypatch):
+    # Hourly bars with short averages, so crosses less than a day apart happen and the cooldown skips them
+    rng = np.random.default_rng(5)
+    index = pd.date_range("2020-01-01", periods=2_000, freq="h")
+    open_ = pd.Series(100 * np.exp(np.cumsum(rng.normal(0, 0.01, len(index)))), index=index)
+    data = pd.DataFrame({
+        "Open": open_,
+        "SMA_OPEN_50": open_.rolling(3).mean(),
+        "SMA_OPEN_255": open_.rolling(8).mean(),
+    }).dropna()
+
+    starts, ends = sample_windows(len(data), 40, rng=1)
+    batch = _check(data, "XYZ", starts, ends, monkeypatch)
+
+    # Without the cooldown the same windows trade more
+    plain = batch_backtest(*_arrays(data, "XYZ"), data.index.values, starts, ends, cooldown=None)
+    assert (plain["sma_num_trades"] > batch["sma_num_trades"]).any()
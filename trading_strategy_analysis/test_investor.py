@@ -0,0 +1,110 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from functions import calc_cagr, populate_data, sample_start_end_idx
+from investor import Investor
+
+
+SEEDS = range(40)
+
+
+def _series(df: pd.DataFrame, name: str) -> pd.Series:
+    col = df[name]
+    return col.iloc[:, 0] if isinstance(col, pd.DataFrame) else col
+
+
+def _reference_sma(df: pd.DataFrame, cash: float, cooldown_days: int = 1):
+    """
+    The per date loop run_sma_sim used before the array kernel, on a plain list of trades.
+    """
+    open_ = _series(df, "Open")
+    spread = _series(df, "SMA_OPEN_50") - _series(df, "SMA_OPEN_255")
+
+    # Cross dates are sign changes, zeros forward filled
+    sign = np.sign(spread).replace(0, np.nan).ffill()
+    cross_dates = df.index[sign.ne(sign.shift(1)).fillna(False).to_numpy()]
+
+    trades, shares, last = [], 0.0, None
+    for date in cross_dates:
+        if last is not None and (date - last).days < cooldown_days:
+            continue
+        i = df.index.get_loc(date)
+        prev, curr = (spread.iloc[i - 1] if i else -1), spread.iloc[i]
+        price = open_.iloc[i]
+
+        if prev < 0 and curr > 0:
+            last = date
+            size = cash // price - 1
+            if shares == 0 and size > 0:
+                cash -= size * price
+                shares = size
+                trades.append(("buy", date, price, size))
+        elif prev > 0 and curr < 0:
+            last = date
+            if shares > 0:
+                cash += shares * price
+                trades.append(("sell", date, price, shares))
+                shares = 0.0
+
+    if shares > 0:
+        price = open_.iloc[-1]
+        cash += shares * price
+        trades.append(("sell", df.index[-1], price, shares))
+    return trades, cash
+
+
+def _reference_bh(df: pd.DataFrame, cash: float):
+    open_ = _series(df, "Open")
+    size = cash // open_.iloc[0] - 1
+    trades = [("buy", df.index[0], open_.iloc[0], size), ("sell", df.index[-1], open_.iloc[-1], size)]
+    return trades, cash + size * (open_.iloc[-1] - open_.iloc[0])
+
+
+def _check(strategy: str, data: pd.DataFrame, ticker: str, seed: int):
+    inv = Investor(strategy, data, ticker, rng=seed)
+    inv.run_sim(seed)
+
+    start, end = sample_start_end_idx(len(data), rng=np.random.default_rng(seed))
+    assert (inv.start, inv.end) == (start, end)
+
+    df = data.iloc[start:end]
+    reference = _reference_sma if strategy == "SMA" else _reference_bh
+    trades, cash = reference(df, 10_000.0)
+
+    got = [(t["type"], pd.Timestamp(t["date"]), t["price"], t["shares"]) for t in inv.trades]
+    assert got == trades
+    assert inv.cash == pytest.approx(cash, rel=1e-12)
+
+    days = (df.index[-1] - df.index[0]).days
+    assert inv.cagr == pytest.approx(calc_cagr(days=days, start_balance=10_000.0, end_balance=cash), rel=1e-12)
+    return trades
+
+
+@pytest.mark.parametrize("strategy", ["SMA", "Buy & Hold"])
+@pytest.mark.parametrize("ticker", ["AAA", "BBB"])
+def test_sims_match_reference_loop(synthetic, strategy, ticker):
+    data = populate_data(ticker)
+    n_trades = [len(_check(strategy, data, ticker, seed)) for seed in SEEDS]
+
+    if strategy == "SMA":
+        assert max(n_trades) > 2
+
+
+def test_sma_cooldown_matches_reference_loop():
+    # Hourly bars with short averages, so crosses less than a day apart happen and get skipped
+    rng = np.random.default_rng(5)
+    index = pd.date_range("2020-01-01", periods=2_000, freq="h")
+    open_ = pd.Series(100 * np.exp(np.cumsum(rng.normal(0, 0.01, len(index)))), index=index)
+    data = pd.DataFrame({
+        "Open": open_,
+        "SMA_OPEN_50": open_.rolling(3).mean(),
+        "SMA_OPEN_255": open_.rolling(8).mean(),
+    }).dropna()
+
+    skipped = 0
+    for seed in SEEDS:
+        trades = _check("SMA", data, "XYZ", seed)
+        start, end = sample_start_end_idx(len(data), rng=np.random.default_rng(seed))
+        skipped += len(_reference_sma(data.iloc[start:end], 10_000.0, cooldown_days=0)[0]) - len(trades)
+    assert skipped > 0
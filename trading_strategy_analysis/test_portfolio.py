@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from portfolio import listed_span, portfolio_backtest, sleeve_growth
+
+
+def test_listed_span_fills_gaps_only_inside_history():
+    prices = np.array([[np.nan, 1.0, np.nan, 3.0, np.nan]]).T
+    np.testing.assert_array_equal(listed_span(prices).ravel(), [np.nan, 1.0, 1.0, 3.0, np.nan])
+
+
+def test_sleeve_growth_carries_return_across_gap():
+    open_ = np.array([[100.0, np.nan, 110.0, 121.0]]).T
+    growth = sleeve_growth(open_, np.ones_like(open_, dtype=bool))
+    np.testing.assert_allclose(growth.ravel(), [1.0, 1.0, 1.1, 1.21])
+
+
+def test_death_cross_after_gap_sells():
+    # Rises long enough for a golden cross, one missing bar, then falls: the fast SMA drops
+    # under the slow one within `slow` rows of the gap
+    up = np.linspace(100, 200, 30)
+    down = np.linspace(195, 100, 20)
+    opens = np.concatenate([up, [np.nan], down])
+    dates = pd.bdate_range("2000-01-03", periods=len(opens))
+    prices = pd.DataFrame({"A": opens}, index=dates)
+
+    result = portfolio_backtest(prices, fast=3, slow=10)
+
+    assert result["sma_num_trades"]["A"] == 2
+    assert result["exposure"].iloc[-1] == 0
+    assert result["equity"]["Buy & Hold"].iloc[-1] == pytest.approx(10_000 * opens[-1] / opens[9])
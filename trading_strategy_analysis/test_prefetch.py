@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+import price_store
+from data_sources import HTTPSource, SyntheticSource, serve, set_source
+from prefetch import prefetch
+
+
+TICKERS = ["AAA", "BBB", "CCC", "DDD", "EEE", "FFF"]
+
+
+@pytest.fixture
+def server():
+    """
+    The local stand in price server on a short synthetic history, every 3rd request answered with 503.
+    """
+    server = serve(SyntheticSource(seed=1, start="2010-01-04", end="2012-12-31", max_listing_lag=100), fail_every=3)
+    set_source(HTTPSource(server.url))
+    yield server
+    set_source(None)
+    server.shutdown()
+
+
+def _prefetch(server, store_dir, **kwargs):
+    kwargs = {"batch_size": 2, "max_workers": 2, "retries": 3, "backoff": 0.001, "offline": False, **kwargs}
+    return prefetch(TICKERS, store_dir=str(store_dir), source=HTTPSource(server.url), **kwargs)
+
+
+def test_fetch_with_retries_then_cached(server, tmp_path):
+    status = _prefetch(server, tmp_path)
+    assert status == {ticker: "fetched" for ticker in TICKERS}
+    # 3 batches, and every 3rd request failed and was retried
+    assert server.requests > 3
+
+    requests = server.requests
+    assert _prefetch(server, tmp_path) == {ticker: "cached" for ticker in TICKERS}
+    assert server.requests == requests
+
+
+def test_no_retries_marks_batch_failed(server, tmp_path):
+    # One batch at a time, so the 3rd request (the last batch) is the one answered with 503
+    status = _prefetch(server, tmp_path, retries=0, max_workers=1)
+    assert status == {"AAA": "fetched", "BBB": "fetched", "CCC": "fetched", "DDD": "fetched",
+                      "EEE": "failed", "FFF": "failed"}
+    assert price_store.read_bars("EEE", store_dir=str(tmp_path)) is None
+
+
+def test_stale_batch_splices_new_bars(server, tmp_path):
+    _prefetch(server, tmp_path)
+    full = {t: np.array(price_store.read_bars(t, store_dir=str(tmp_path))) for t in TICKERS}
+
+    # Each ticker lost a different number of trailing bars, a batch re-fetches from its earliest last bar
+    for k, ticker in enumerate(TICKERS):
+        price_store.write_bars(ticker, full[ticker][:-(10 + 20 * k)], store_dir=str(tmp_path))
+
+    status = _prefetch(server, tmp_path, max_age=0)
+    assert status == {ticker: "fetched" for ticker in TICKERS}
+    for ticker in TICKERS:
+        np.testing.assert_array_equal(price_store.read_bars(ticker, store_dir=str(tmp_path)), full[ticker])
+
+
+def test_offline_reports_missing(server, tmp_path):
+    status = _prefetch(server, tmp_path, offline=True)
+    assert status == {ticker: "missing" for ticker in TICKERS}
+    assert server.requests == 0
@@ -0,0 +1,143 @@
+import numpy as np
+import pytest
+from scipy.stats import ks_2samp
+
+import resampling
+from resampling import bootstrap_median_diff, permutation_test
+
+
+N_RESAMPLES = 20_000
+SMALL_BYTES = 2**16     # several chunks for the matrix paths
+FALLBACK_BYTES = 2**22
+
+
+def _data(n_a: int, n_b: int, ties: bool = False, n_strata: int = 4, singletons: int = 0, seed: int = 0):
+    """
+    Two groups of CAGRs with ticker strata; singletons tickers hold one row each.
+    """
+    rng = np.random.default_rng(seed)
+    if ties:
+        a, b = rng.integers(0, 6, n_a).astype(float), rng.integers(0, 6, n_b).astype(float)
+    else:
+        a, b = rng.normal(5, 10, n_a), rng.normal(3, 10, n_b)
+    strata_a = rng.integers(0, n_strata, n_a).astype(str)
+    strata_b = rng.integers(0, n_strata, n_b).astype(str)
+    strata_a[:singletons] = [f"one{i}" for i in range(min(singletons, n_a))]
+    strata_b[:singletons] = [f"two{i}" for i in range(min(singletons, n_b))]
+    return a, b, strata_a, strata_b
+
+
+CASES = {
+    "n=1": dict(n_a=1, n_b=2),
+    "small odd": dict(n_a=3, n_b=5),
+    "small even": dict(n_a=4, n_b=6),
+    "even": dict(n_a=60, n_b=80),
+    "odd": dict(n_a=61, n_b=79),
+    "ties": dict(n_a=51, n_b=50, ties=True),
+    "one-row strata": dict(n_a=40, n_b=41, n_strata=3, singletons=5),
+    "large": dict(n_a=700, n_b=600, n_strata=20, singletons=3),
+}
+
+
+def _same(x, y):
+    # Seeded, so the threshold only has to hold for these draws
+    assert ks_2samp(x, y).pvalue > 1e-3
+
+
+def _naive_bootstrap(values, strata, n_resamples, rng):
+    medians = np.empty(n_resamples)
+    groups = [values[strata == s] for s in np.unique(strata)] if strata is not None else [values]
+    for i in range(n_resamples):
+        medians[i] = np.median(np.concatenate([rng.choice(g, len(g)) for g in groups]))
+    return medians
+
+
+@pytest.mark.parametrize("case", CASES)
+@pytest.mark.parametrize("stratified", [False, True])
+def test_bootstrap_matches_matrix(case, stratified):
+    a, _, strata, _ = _data(**CASES[case])
+    strata = strata if stratified else None
+    rng = np.random.default_rng(1)
+
+    got = resampling._bootstrap_medians(a, strata, N_RESAMPLES, rng, resampling.MAX_BYTES)
+    values, codes = resampling._sorted_codes(a, strata if stratified else np.zeros(len(a)))
+    want = resampling._bootstrap_matrix(values, codes, N_RESAMPLES, rng, SMALL_BYTES)
+    _same(got, want)
+
+    # The matrix path itself against drawing every resample with np.random.choice
+    if len(a) <= 80:
+        _same(want, _naive_bootstrap(a, strata, 4_000, rng))
+
+
+@pytest.mark.parametrize("case", CASES)
+@pytest.mark.parametrize("stratified", [False, True])
+def test_permutation_matches_matrix(case, stratified):
+    a, b, strata_a, strata_b = _data(**CASES[case])
+    pooled = np.concatenate([a, b])
+    if stratified:
+        _, codes = np.unique(np.concatenate([strata_a, strata_b]), return_inverse=True)
+    else:
+        codes = np.zeros(len(pooled), dtype=np.int64)
+    rng = np.random.default_rng(2)
+
+    got = resampling._permutation_walk(pooled, codes, len(a), N_RESAMPLES, rng, resampling.MAX_BYTES)
+    want = resampling._permutation_matrix(pooled, codes, len(a), N_RESAMPLES, rng, SMALL_BYTES)
+    _same(got, want)
+
+
+@pytest.mark.parametrize("stratified", [False, True])
+def test_outside_window_fallback(monkeypatch, stratified):
+    # A window of +-16 rows often misses the middle at n=800, so the fallback does real work
+    monkeypatch.setattr(resampling, "WINDOW_SDS", 0)
+    a, b, strata_a, strata_b = _data(400, 400, n_strata=10, singletons=2, seed=3)
+    pooled = np.concatenate([a, b])
+    if stratified:
+        _, codes = np.unique(np.concatenate([strata_a, strata_b]), return_inverse=True)
+    else:
+        codes = np.zeros(len(pooled), dtype=np.int64)
+
+    calls = []
+    for name in ("_bootstrap_matrix", "_permutation_matrix"):
+        matrix = getattr(resampling, name)
+        monkeypatch.setattr(resampling, name, lambda *args, matrix=matrix: calls.append(args[-1]) or matrix(*args))
+
+    rng = np.random.default_rng(4)
+    values, sorted_codes = resampling._sorted_codes(pooled, codes)
+    boot = resampling._bootstrap_walk(values, sorted_codes, N_RESAMPLES, rng, FALLBACK_BYTES)
+    perm = resampling._permutation_walk(pooled, codes, len(a), N_RESAMPLES, rng, FALLBACK_BYTES)
+    assert len(calls) >= 2 and all(window is not None for window in calls)
+
+    monkeypatch.undo()
+    _same(boot, resampling._bootstrap_matrix(values, sorted_codes, N_RESAMPLES, rng, FALLBACK_BYTES))
+    _same(perm, resampling._permutation_matrix(pooled, codes, len(a), N_RESAMPLES, rng, FALLBACK_BYTES))
+
+
+@pytest.mark.parametrize("stratified", [False, True])
+def test_permutation_p_values_calibrated(stratified):
+    # Under the null (same distribution within each ticker) p-values are uniform
+    rng = np.random.default_rng(5)
+    p_values = []
+    for seed in range(400):
+        strata_a, strata_b = rng.integers(0, 4, 40), rng.integers(0, 4, 30)
+        shift = 10.0 * np.arange(4) if stratified else np.zeros(4)
+        a = rng.normal(0, 5, 40) + shift[strata_a]
+        b = rng.normal(0, 5, 30) + shift[strata_b]
+        strata = (strata_a, strata_b) if stratified else (None, None)
+        p_values.append(permutation_test(a, b, 200, "greater", *strata, rng=seed)["p_value"])
+
+    p_values = np.array(p_values)
+    for level in (0.05, 0.1, 0.25, 0.5):
+        # Within 4 binomial sd of the level
+        assert abs((p_values <= level).mean() - level) < 4 * np.sqrt(level * (1 - level) / len(p_values))
+
+
+def test_bootstrap_ci_and_p_value_small_samples():
+    a, b = [1.0, 2.0, 3.0], [1.0, 1.0]
+    boot = bootstrap_median_diff(a, b, 2_000, rng=0)
+    assert boot["estimate"] == 1.0
+    assert set(np.unique(boot["distribution"])) <= {0.0, 1.0, 2.0}
+    assert boot["ci_low"] <= boot["estimate"] <= boot["ci_high"]
+
+    perm = permutation_test(a, b, 2_000, "two-sided", rng=0)
+    assert 0 < perm["p_value"] <= 1
+    assert np.isfinite(perm["distribution"]).all()
@@ -0,0 +1,78 @@
+import pandas as pd
+import pytest
+
+import runner
+from results_store import ResultStore, merge
+
+
+def _in_memory(n_epochs, seed):
+    return runner.run_epochs(n_epochs, seed=seed, n_workers=1)
+
+
+def _same(a, b):
+    pd.testing.assert_frame_equal(a.drop(columns="seed"), b.drop(columns="seed"), check_dtype=False)
+    assert list(a["seed"]) == list(b["seed"])
+
+
+def test_resume_matches_single_run(universe, tmp_path):
+    store = str(tmp_path / "results")
+    runner.run_epochs(6, seed=5, n_workers=1, store=store, flush_every=4)
+    assert ResultStore(store).epochs() == set(range(6))
+
+    # seed=None on a resume reads the stored seed back
+    resumed = runner.run_epochs(12, n_workers=1, store=store, flush_every=4)
+    _same(resumed, _in_memory(12, seed=5))
+
+
+def test_resume_after_crash(universe, tmp_path, monkeypatch):
+    store = str(tmp_path / "results")
+    epoch = runner._epoch
+
+    def crash(n, *args):
+        if n == 9:
+            raise RuntimeError("killed")
+        return epoch(n, *args)
+
+    monkeypatch.setattr(runner, "_epoch", crash)
+    with pytest.raises(RuntimeError):
+        runner.run_epochs(12, seed=5, n_workers=1, store=store, flush_every=4)
+    # Only whole flushes survive
+    assert ResultStore(store).epochs() == set(range(8))
+
+    monkeypatch.setattr(runner, "_epoch", epoch)
+    _same(runner.run_epochs(12, seed=5, n_workers=1, store=store, flush_every=4), _in_memory(12, seed=5))
+
+
+def test_merge_shards(universe, tmp_path):
+    shards = [str(tmp_path / f"shard_{i}") for i in range(2)]
+    for i, store in enumerate(shards):
+        runner.run_epochs(10, seed=5, n_workers=1, store=store, flush_every=3, shard=(i, 2))
+    assert ResultStore(shards[1]).epochs() == {1, 3, 5, 7, 9}
+
+    merged = merge(shards, str(tmp_path / "merged"))
+    _same(merged, _in_memory(10, seed=5))
+    _same(ResultStore(str(tmp_path / "merged")).read(), merged)
+    assert ResultStore(str(tmp_path / "merged")).meta == {"seed": 5, "cash": runner.CASH}
+
+    with pytest.raises(ValueError):
+        merge(shards, str(tmp_path / "merged"))
+
+
+def test_mismatched_runs_rejected(universe, tmp_path):
+    a, b = str(tmp_path / "a"), str(tmp_path / "b")
+    runner.run_epochs(2, seed=5, n_workers=1, store=a)
+    runner.run_epochs(2, seed=6, n_workers=1, store=b)
+
+    with pytest.raises(ValueError):
+        runner.run_epochs(4, seed=6, n_workers=1, store=a)
+    with pytest.raises(ValueError):
+        merge([a, b], str(tmp_path / "merged"))
+
+
+def test_wide_seed_round_trips(universe, tmp_path):
+    seed = 2**100 + 5
+    store = str(tmp_path / "results")
+    results = runner.run_epochs(3, seed=seed, n_workers=1, store=store)
+
+    assert list(results["seed"]) == [seed] * 3
+    assert ResultStore(store).meta["seed"] == seed
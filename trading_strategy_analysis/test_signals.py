@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+
+from backtest import BUY, SELL, crossover_signals, fill_orders
+from data_sources import SyntheticSource, to_long_csv
+from signals import CrossoverSignal, RollingMean, replay_csv
+
+
+FAST, SLOW = 10, 40
+TICKERS = ["AAA", "BBB", "CCC"]
+
+
+def _expected(open_: pd.Series) -> list:
+    """
+    Investor's fills on the window that starts on the first bar both SMAs exist, close out dropped.
+    """
+    sma_fast = open_.rolling(FAST).mean().to_numpy()
+    sma_slow = open_.rolling(SLOW).mean().to_numpy()
+    window = slice(SLOW - 1, None)
+    prices = open_.to_numpy()[window]
+    dates = open_.index[window]
+
+    signal = crossover_signals(sma_fast[window], sma_slow[window])
+    fills, _ = fill_orders(prices, signal, cash=10_000.0)
+
+    # The only fill not driven by a signal: Investor sells what it still holds on the last row
+    if len(fills) and fills[-1]["side"] == SELL and signal[fills[-1]["idx"]] != SELL:
+        fills = fills[:-1]
+    return [(dates[f["idx"]].strftime("%Y-%m-%d"), "buy" if f["side"] == BUY else "sell", f["price"]) for f in fills]
+
+
+def test_rolling_mean_matches_pandas():
+    x = np.random.default_rng(0).normal(100, 5, 500)
+    mean = RollingMean(7)
+    got = [mean.update(v) for v in x]
+
+    assert got[:6] == [None] * 6
+    np.testing.assert_allclose(got[6:], pd.Series(x).rolling(7).mean().to_numpy()[6:], rtol=1e-12)
+
+
+def test_crossover_signal_rules():
+    signal = CrossoverSignal(fast=1, slow=2)
+    # No slow SMA on the first bar, then spreads -, +, +, -, -, +
+    events = [signal.update(p) for p in [10, 9, 10, 11, 10, 9, 10]]
+    assert events == [0, 0, BUY, 0, SELL, 0, BUY]
+
+
+def test_replay_matches_batch_fills(tmp_path):
+    source = SyntheticSource(seed=3, start="2005-01-03", end="2010-12-31", max_listing_lag=300)
+    data = source.generate(TICKERS)
+    path = tmp_path / "bars.csv"
+    path.write_bytes(to_long_csv(data))
+
+    events = list(replay_csv(str(path), fast=FAST, slow=SLOW))
+    assert events
+
+    for ticker in TICKERS:
+        got = [(date, side, price) for date, t, side, price in events if t == ticker]
+        expected = _expected(data["Open"][ticker].dropna())
+        assert len(expected) > 2
+        assert got == expected
@@ -0,0 +1,144 @@
+"""
+Docstring for timing
+
+This file includes the built-in stage timers and profiling hooks for the epoch pipeline.
+
+Wrap a stage in `with stage("name"):`. While timing is off (the default) that is a shared
+no-op context manager; while it is on, every call appends its wall time to the stage's samples.
+Workers hand their samples back with drain() and the parent folds them in with merge(), so
+summary() covers the whole run whatever the process layout.
+
+Stages recorded by the pipeline:
+    - prefetch: warming up the universe before the epoch loop (run_epochs)
+    - epoch: one whole _epoch() call
+    - load: price store read (populate_data)
+    - sma: rolling means (populate_data)
+    - sample_window: sample_start_end_idx()
+    - signals: crossover detection
+    - orders: fills and ledger updates
+    - cagr: calc_cagr()
+    - plot: drawing a figure
+    - png: writing it to disk
+    - flush: writing a batch of epochs to the result store (run_epochs with store=...)
+
+Functions:
+    - enable()
+    - enabled()
+    - stage()
+    - drain()
+    - merge()
+    - reset()
+    - summary()
+    - profiled()
+
+"""
+
+import contextlib
+import cProfile
+import os
+import time
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+
+ENABLED = False
+
+_samples = defaultdict(list)
+_NULL = contextlib.nullcontext()
+
+
+class _Timer:
+    __slots__ = ("name", "t0")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        _samples[self.name].append(time.perf_counter() - self.t0)
+        return False
+
+
+def enable(on: bool = True):
+    """
+    Turns stage timing on or off for this process.
+    """
+    global ENABLED
+    ENABLED = on
+
+
+def enabled() -> bool:
+    return ENABLED
+
+
+def stage(name: str):
+    """
+    Context manager timing one stage, a no-op while timing is off.
+    """
+    return _Timer(name) if ENABLED else _NULL
+
+
+def drain() -> dict:
+    """
+    Returns this process's samples ({stage: [seconds, ...]}) and clears them.
+    """
+    out = {name: list(times) for name, times in _samples.items()}
+    _samples.clear()
+    return out
+
+
+def merge(samples: dict):
+    """
+    Folds samples from drain() (e.g. from a worker) into this process's.
+    """
+    for name, times in samples.items():
+        _samples[name].extend(times)
+
+
+def reset():
+    _samples.clear()
+
+
+def summary(samples: dict = None) -> pd.DataFrame:
+    """
+    Per stage count, total, mean, p50, p95 and max in milliseconds (total in seconds), slowest total first.
+    """
+    samples = _samples if samples is None else samples
+    rows = {}
+    for name, times in samples.items():
+        if not times:
+            continue
+        t = np.asarray(times)
+        rows[name] = {
+            "count": len(t),
+            "total_s": t.sum(),
+            "mean_ms": t.mean() * 1e3,
+            "p50_ms": np.percentile(t, 50) * 1e3,
+            "p95_ms": np.percentile(t, 95) * 1e3,
+            "max_ms": t.max() * 1e3,
+        }
+    table = pd.DataFrame.from_dict(rows, orient="index")
+    if table.empty:
+        return table
+    table.index.name = "stage"
+    return table.sort_values("total_s", ascending=False)
+
+
+@contextlib.contextmanager
+def profiled(path: str):
+    """
+    Runs the block under cProfile and dumps the stats to path (open with pstats or snakeviz).
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)